@@ -0,0 +1,31 @@
+import argparse
+
+from core.agent_server import AgentServer
+from core.agent_server import DEFAULT_SERVER_WORKERS
+from core.simulation import agent_class_from_path
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser()
+	parser.add_argument(
+		"agents", nargs='+', help="Full paths to the agents to serve, remote agents use the path as the agent's name"
+	)
+	parser.add_argument(
+		"--address", default="localhost:7777",
+		help="host:port to listen on, or the path of a Unix socket"
+	)
+	parser.add_argument(
+		"--workers", type=int, default=DEFAULT_SERVER_WORKERS,
+		help="Number of threads that make decisions"
+	)
+	args = parser.parse_args()
+	server = AgentServer(
+		{path: agent_class_from_path(path) for path in args.agents},
+		args.address,
+		workers=args.workers,
+	)
+	print('Serving agents on %s' % server.address)
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		server.shutdown()
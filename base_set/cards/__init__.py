@@ -21,6 +21,7 @@ from base_set.cards.workshop import WorkshopCard
 from core.card import Card
 from core.card import CardType
 from core.card import KingdomCard
+from core.card_distribution import CARD_INDEX
 from core.counters import CounterId
 from core.counters import CounterName
 from core.locations import Location
@@ -45,6 +46,10 @@ ALL_CARDS = [
     VillageCard,
     WorkshopCard,
 ]
+# Register the cards up front so they have the same ids in every process.
+for card in ALL_CARDS:
+    CARD_INDEX.register(card)
+
 KINGDOM_CARDS = [
     card for card in ALL_CARDS if card.hasRandomizer()
 ]
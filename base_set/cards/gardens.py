@@ -11,5 +11,5 @@ class GardensCard(KingdomCard):
     
     @classmethod
     def victory_points(cls, player, game_state):
-        deck_size = len(game_state.get_deck(player))
+        deck_size = game_state.get_deck_size(player)
         return (deck_size // 10)
@@ -18,12 +18,10 @@ class MineTrashDecision(Decision):
 
 class MineGainDecision(Decision):
     def __init__(self, game_state, max_cost):
-        player = game_state.get_current_player_name()
-        cards = set(game_state.get_location(Location(None, LocationName.SUPPLY)))
-        treasure_cards_meeting_cost_constraint = [
-            card for card in cards
-            if issubclass(card, TreasureCard) and card.cost(game_state) <= max_cost
-        ]
+        supply = game_state.get_location(Location(None, LocationName.SUPPLY))
+        treasure_cards_meeting_cost_constraint = supply.cards_costing_at_most(
+            game_state, max_cost, card_type=CardType.TREASURE
+        )
         self.options = treasure_cards_meeting_cost_constraint
         self.min = 1
         self.max = 1
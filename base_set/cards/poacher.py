@@ -32,9 +32,7 @@ class PoacherCard(KingdomCard):
         game_state.draw(1)
         game_state.update_counter(counter_id=CounterId(None, CounterName.ACTIONS), delta=1)
         game_state.update_counter(counter_id=CounterId(None, CounterName.COINS), delta=1)
-        supply = game_state.get_location(Location(None, LocationName.SUPPLY))
-        cards_to_counts = supply.distribution.cards_to_counts()
-        empty_supply_piles = list(cards_to_counts.values()).count(0)
+        empty_supply_piles = game_state.get_num_empty_supply_piles()
         if empty_supply_piles == 0:
             return
         decision = PoacherDecision(game_state, empty_supply_piles)
@@ -11,10 +11,7 @@ from base_set.cards import CopperCard
 class WorkshopDecision(Decision):
     def __init__(self, game_state):
         supply = game_state.get_location(Location(None, LocationName.SUPPLY))
-        options = []
-        for card, count in supply.distribution.cards_to_counts().items():
-            if count > 0 and card.cost(game_state) <= 4:
-                options.append(card)
+        options = supply.cards_costing_at_most(game_state, 4)
         self.options = options
         # Player must gain something if possible
         self.min = 1 if options else 0
@@ -0,0 +1,59 @@
+import argparse
+import sys
+
+from benchmarks.harness import DEFAULT_MIN_TIME
+from benchmarks.harness import DEFAULT_REPEAT
+from benchmarks.harness import DEFAULT_TOLERANCE
+from benchmarks.harness import find_regressions
+from benchmarks.harness import load_report
+from benchmarks.harness import run_benchmarks
+from benchmarks.harness import save_report
+from benchmarks.macro import MACRO_BENCHMARKS
+from benchmarks.micro import MICRO_BENCHMARKS
+
+
+def print_result(name, rate, unit):
+	print('%-40s %14.1f %s' % (name, rate, unit))
+	sys.stdout.flush()
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser()
+	parser.add_argument(
+		"--suite", choices=['micro', 'macro', 'all'], default='all', help="Benchmarks to run"
+	)
+	parser.add_argument("--filter", help="Only run benchmarks whose name contains this")
+	parser.add_argument("--output", help="Save the results as JSON to this path")
+	parser.add_argument("--baseline", help="Compare the results to a JSON report at this path")
+	parser.add_argument(
+		"--tolerance", type=float, default=DEFAULT_TOLERANCE,
+		help="Fraction of a baseline rate a benchmark may lose before it fails"
+	)
+	parser.add_argument(
+		"--min-time", type=float, default=DEFAULT_MIN_TIME,
+		help="Seconds each repeat of a benchmark runs for"
+	)
+	parser.add_argument(
+		"--repeat", type=int, default=DEFAULT_REPEAT, help="Repeats of each benchmark"
+	)
+	args = parser.parse_args()
+	benchmarks = []
+	if args.suite in ('micro', 'all'):
+		benchmarks += MICRO_BENCHMARKS
+	if args.suite in ('macro', 'all'):
+		benchmarks += MACRO_BENCHMARKS
+	if args.filter:
+		benchmarks = [benchmark for benchmark in benchmarks if args.filter in benchmark.name]
+	report = run_benchmarks(benchmarks, args.min_time, args.repeat, print_result)
+	if args.output:
+		save_report(report, args.output)
+	if args.baseline:
+		regressions = find_regressions(report, load_report(args.baseline), args.tolerance)
+		for regression in regressions:
+			print('REGRESSION %s: %.1f -> %.1f (%.0f%%)' % (
+				regression.name, regression.baseline, regression.rate,
+				100 * (regression.rate / regression.baseline - 1)
+			))
+		if regressions:
+			sys.exit(1)
+		print('No regressions against %s' % args.baseline)
@@ -0,0 +1,3 @@
+"""
+Speed benchmarks for the hot paths of the simulator. Run them with the benchmark.py script.
+"""
@@ -0,0 +1,124 @@
+"""
+Timing benchmarks and comparing their results to a stored baseline.
+"""
+from collections import namedtuple
+import gc
+import json
+import platform
+import time
+
+
+# Seconds each repeat of a benchmark keeps calling it for.
+DEFAULT_MIN_TIME = 0.2
+DEFAULT_REPEAT = 5
+# Fraction of the baseline rate a benchmark may lose before it counts as a regression.
+DEFAULT_TOLERANCE = 0.25
+
+
+Benchmark = namedtuple('Benchmark', ['name', 'setup', 'run', 'operations', 'unit'])
+Benchmark.__new__.__defaults__ = (1, 'ops/s')
+Benchmark.__doc__ = """
+A piece of code to time.
+
+Parameters:
+    name (str): Unique name of the benchmark, the key of its result.
+    setup (function): Called with no arguments before every call to `run` and returns the
+        argument for `run`. Not timed.
+    run (function): The code to time.
+    operations (optional, int): Number of operations one call to `run` does. Results are
+        reported per operation. Defaults to 1.
+    unit (optional, str): Name of the unit of the result. Defaults to 'ops/s'.
+"""
+
+Regression = namedtuple('Regression', ['name', 'baseline', 'rate'])
+Regression.__doc__ = """
+A benchmark that got slower than its baseline allows.
+
+Parameters:
+    name (str): Name of the benchmark.
+    baseline (float): Rate in the baseline.
+    rate (float): Rate measured now.
+"""
+
+
+def time_benchmark(benchmark, min_time=DEFAULT_MIN_TIME, repeat=DEFAULT_REPEAT):
+    """
+    Returns the number of operations per second of the benchmark. Each repeat calls it until
+    `min_time` seconds were spent in `run`, at least once, and the fastest repeat is used since
+    slower ones were slowed down by something else running.
+    """
+    best = 0.0
+    for i in range(repeat):
+        elapsed = 0.0
+        operations = 0
+        while not operations or elapsed < min_time:
+            arg = benchmark.setup()
+            # Like timeit, keep garbage collections from landing in random calls.
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                benchmark.run(arg)
+                elapsed += time.perf_counter() - start
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+            operations += benchmark.operations
+        best = max(best, operations / elapsed)
+    return best
+
+
+def run_benchmarks(benchmarks, min_time=DEFAULT_MIN_TIME, repeat=DEFAULT_REPEAT, report=None):
+    """
+    Time every benchmark and return a dict that can be saved as JSON, with the results under
+    'results' as name -> {'rate': float, 'unit': str}.
+
+    Parameters:
+        benchmarks (list of `Benchmark`): Benchmarks to run.
+        min_time (optional, float): Seconds each repeat of a benchmark runs for.
+        repeat (optional, int): Number of repeats of each benchmark.
+        report (optional, function): Called with the name, rate and unit of each benchmark
+            as soon as it has run.
+    """
+    results = {}
+    for benchmark in benchmarks:
+        rate = time_benchmark(benchmark, min_time, repeat)
+        results[benchmark.name] = {'rate': rate, 'unit': benchmark.unit}
+        if report is not None:
+            report(benchmark.name, rate, benchmark.unit)
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def find_regressions(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns a list of `Regression` for every benchmark whose rate fell below `1 - tolerance`
+    times its rate in the baseline. Benchmarks missing from either report are skipped.
+
+    Parameters:
+        report (dict): Output of `run_benchmarks`.
+        baseline (dict): Output of `run_benchmarks` to compare against.
+        tolerance (optional, float): Fraction of the baseline rate that may be lost.
+    """
+    regressions = []
+    for name, result in sorted(report['results'].items()):
+        baseline_result = baseline['results'].get(name)
+        if baseline_result is None:
+            continue
+        if result['rate'] < (1 - tolerance) * baseline_result['rate']:
+            regressions.append(Regression(name, baseline_result['rate'], result['rate']))
+    return regressions
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_report(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,76 @@
+"""
+Benchmarks of whole games, one for each bundled agent playing against itself, and of the
+search agent's simulations.
+"""
+import itertools
+import random
+
+from base_set.cards import KINGDOM_CARDS
+from benchmarks.harness import Benchmark
+from core.agents.big_money import DumbMoneyAgent
+from core.agents.big_money import SimpleBmSmithyAgent
+from core.agents.ismcts import RolloutAgent
+from core.agents.ismcts import search
+from core.agents.test import TestAgent
+from core.decision import BuyDecision
+from core.game_controller import GameController
+from core.loggers.null import NullLogger
+from core.simulation import play_headless_game
+
+
+# Simulations per call of the search benchmark.
+SEARCH_ITERATIONS = 20
+
+# Every benchmark cycles through the same games so results can be compared between runs.
+NUM_SEEDS = 100
+
+# The command line agent is left out since it waits for a human. A whole game of the search
+# agent takes far too long, its simulations are timed by the search benchmark instead.
+BENCHMARK_AGENT_CLASSES = [
+    ('DumbMoneyAgent', DumbMoneyAgent),
+    ('SimpleBmSmithyAgent', SimpleBmSmithyAgent),
+    ('TestAgent', TestAgent),
+    ('RolloutAgent', RolloutAgent),
+]
+
+
+def _game_benchmark(name, agent_class):
+    seed_rng = random.Random(name)
+    seeds = itertools.cycle([seed_rng.getrandbits(64) for i in range(NUM_SEEDS)])
+
+    def run(seed):
+        play_headless_game([agent_class, agent_class], ['p1', 'p2'], seed=seed)
+
+    return Benchmark('game.%s' % name, lambda: next(seeds), run, unit='games/s')
+
+
+def _create_search_view():
+    """
+    Returns the view of the first player at the start of their first buy phase.
+    """
+    controller = GameController(
+        players=[DumbMoneyAgent('p1'), DumbMoneyAgent('p2')],
+        card_set=KINGDOM_CARDS,
+        log=NullLogger(),
+        verbose=False,
+        seed=0,
+    )
+    controller.setup_game()
+    game_state = controller.game_state
+    game_state.reset_counters_for_new_turn()
+    view = game_state.get_state_known_to('p1')
+    view.resolve()
+    return view
+
+
+def _search(view):
+    search(view, BuyDecision, iterations=SEARCH_ITERATIONS, seed=0)
+
+
+MACRO_BENCHMARKS = [
+    _game_benchmark(name, agent_class) for name, agent_class in BENCHMARK_AGENT_CLASSES
+] + [
+    Benchmark(
+        'search.ismcts', _create_search_view, _search, SEARCH_ITERATIONS, 'simulations/s'
+    ),
+]
@@ -0,0 +1,134 @@
+"""
+Benchmarks of the operations a game does thousands of times.
+"""
+import random
+
+from base_set.cards import CopperCard
+from base_set.cards import DuchyCard
+from base_set.cards import EstateCard
+from base_set.cards import GoldCard
+from base_set.cards import KINGDOM_CARDS
+from base_set.cards import ProvinceCard
+from base_set.cards import SilverCard
+from benchmarks.harness import Benchmark
+from core.card_distribution import ArrayCardDistribution
+from core.card_stack import CardStack
+from core.card_stack import SupplyCardStack
+from core.decision import Decision
+from core.game_state import GameState
+from core.locations import Location
+from core.locations import LocationName
+from core.loggers.null import NullLogger
+
+
+# Number of times each benchmark repeats its operation per call, enough that the time of the
+# call itself doesn't matter.
+OPERATIONS = 1000
+
+# A deck part way through a game.
+DECK = (
+    [CopperCard] * 7 + [EstateCard] * 3 + [SilverCard] * 4 + [GoldCard] * 2 +
+    [DuchyCard, ProvinceCard] + KINGDOM_CARDS[:6]
+)
+# `OPERATIONS` cards with the mix of the deck.
+CARDS = (DECK * (OPERATIONS // len(DECK) + 1))[:OPERATIONS]
+
+
+def _shuffled_cards():
+    cards = CARDS[:]
+    random.Random(0).shuffle(cards)
+    return cards
+
+
+def _card_stack_add(stack):
+    for card in CARDS:
+        stack.add(card)
+
+
+def _card_stack_draw(stack):
+    for i in range(OPERATIONS):
+        stack.draw(1)
+
+
+def _card_stack_extract(stack):
+    for card in CARDS:
+        stack.extract([card])
+
+
+def _distribution_add_subtract(distribution):
+    for card in CARDS[:OPERATIONS // 2]:
+        distribution.add(card)
+        distribution.subtract(card)
+
+
+def _distribution_count(distribution):
+    for card in CARDS:
+        distribution.count(card)
+
+
+def _distribution_deepcopy(distribution):
+    for i in range(OPERATIONS):
+        distribution.deepcopy()
+
+
+def _decision_is_valid(decision):
+    choices = [SilverCard, GoldCard]
+    for i in range(OPERATIONS):
+        decision.is_valid(choices)
+
+
+def _create_game_state():
+    supply = SupplyCardStack(
+        [ProvinceCard] * 8 + [DuchyCard] * 8 + [GoldCard] * 30 + [SilverCard] * 40 +
+        [CopperCard] * 46 + [EstateCard] * 8 + KINGDOM_CARDS[:10] * 10
+    )
+    game_state = GameState(
+        player_names=['p1', 'p2'], supply=supply,
+        starting_deck=[CopperCard] * 7 + [EstateCard] * 3, logger=NullLogger(),
+        rng=random.Random(0)
+    )
+    for player in game_state.player_names:
+        for card in DECK[10:]:
+            game_state.gain(card, player=player)
+        game_state.shuffle(Location(player, LocationName.DISCARD))
+        game_state.draw(5, player)
+    game_state.reset_counters_for_new_turn()
+    return game_state
+
+
+def _get_state_known_to(game_state):
+    for i in range(OPERATIONS):
+        game_state.get_state_known_to('p1').resolve()
+
+
+MICRO_BENCHMARKS = [
+    Benchmark(
+        'card_stack.add', lambda: CardStack(DECK), _card_stack_add, OPERATIONS
+    ),
+    Benchmark(
+        'card_stack.draw', lambda: CardStack(_shuffled_cards()), _card_stack_draw, OPERATIONS
+    ),
+    Benchmark(
+        'card_stack.extract', lambda: CardStack(_shuffled_cards()), _card_stack_extract,
+        OPERATIONS
+    ),
+    Benchmark(
+        'card_distribution.add_subtract', lambda: ArrayCardDistribution(DECK),
+        _distribution_add_subtract, OPERATIONS // 2
+    ),
+    Benchmark(
+        'card_distribution.count', lambda: ArrayCardDistribution(DECK), _distribution_count,
+        OPERATIONS
+    ),
+    Benchmark(
+        'card_distribution.deepcopy', lambda: ArrayCardDistribution(DECK),
+        _distribution_deepcopy, OPERATIONS
+    ),
+    Benchmark(
+        'decision.is_valid', lambda: Decision(options=DECK, min=0, max=3), _decision_is_valid,
+        OPERATIONS
+    ),
+    Benchmark(
+        'game_state.get_state_known_to', _create_game_state, _get_state_known_to, OPERATIONS
+    ),
+]
@@ -0,0 +1,182 @@
+"""
+A server that plays agents for games running in other processes, see `core.remote` for the
+protocol. Agents are created for each session from factories given to the server, so anything
+slow to load, like a model, can be loaded once when the server starts and shared.
+"""
+import collections
+import concurrent.futures
+import random
+import socket
+import socketserver
+import threading
+
+from core.remote import RemoteAgentError
+from core.remote import decode_decision
+from core.remote import decode_state
+from core.remote import encode_choices
+from core.remote import parse_address
+from core.remote import read_message
+from core.remote import send_message
+
+
+# Threads that make decisions, shared by all connections.
+DEFAULT_SERVER_WORKERS = 8
+# Sessions that are never closed are dropped once there are more than this many.
+MAX_SESSIONS = 10000
+
+
+def _close_agent(agent):
+    """
+    Release what a session's agent holds, such as the worker pool of an `IsmctsAgent`.
+    """
+    close = getattr(agent, 'close', None)
+    if close is not None:
+        close()
+
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super(_ConnectionHandler, self).setup()
+        self._send_lock = threading.Lock()
+
+    def handle(self):
+        agent_server = self.server.agent_server
+        while True:
+            try:
+                message = read_message(self.rfile)
+            except (OSError, ValueError, RemoteAgentError):
+                return
+            if message is None:
+                return
+            # Decisions are made on the server's threads so a slow one doesn't hold up the
+            # other requests on the connection.
+            agent_server.executor.submit(self._respond, message)
+
+    def _respond(self, message):
+        response = self.server.agent_server.handle_request(message)
+        try:
+            with self._send_lock:
+                send_message(self.connection, response)
+        except OSError:
+            pass
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def server_bind(self):
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super(_TCPServer, self).server_bind()
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+class AgentServer:
+    """
+    Plays agents for `RemoteAgent`s over TCP or a Unix socket. Each session, one remote agent,
+    gets its own agent from the factory it asks for.
+    """
+    def __init__(self, agent_factories, address, workers=DEFAULT_SERVER_WORKERS,
+            max_sessions=MAX_SESSIONS):
+        """
+        Parameters:
+            agent_factories (dict): Name -> function that takes a player name and returns a
+                `BaseAgent`, e.g. an agent class.
+            address (str): 'host:port' to listen on TCP, port 0 for any free port, or the path
+                of a Unix socket.
+            workers (optional, int): Number of threads that make decisions.
+            max_sessions (optional, int): Most sessions to keep, the least recently used ones
+                are dropped first.
+        """
+        self.agent_factories = agent_factories
+        self.max_sessions = max_sessions
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers)
+        # Session id -> agent, least recently used first.
+        self._sessions = collections.OrderedDict()
+        self._sessions_lock = threading.Lock()
+        family, socket_address = parse_address(address)
+        if family == socket.AF_INET:
+            self._server = _TCPServer(socket_address, _ConnectionHandler)
+            host, port = self._server.server_address[:2]
+            self.address = '%s:%d' % (host, port)
+        else:
+            self._server = _UnixServer(socket_address, _ConnectionHandler)
+            self.address = socket_address
+        self._server.agent_server = self
+        self._thread = None
+
+    def _session_agent(self, message):
+        session = message['session']
+        with self._sessions_lock:
+            agent = self._sessions.get(session)
+            if agent is not None:
+                self._sessions.move_to_end(session)
+        if agent is None:
+            factory = self.agent_factories.get(message['agent'])
+            if factory is None:
+                raise RemoteAgentError('No agent named %s.' % message['agent'])
+            agent = factory(message['name'])
+            dropped = []
+            with self._sessions_lock:
+                self._sessions[session] = agent
+                while len(self._sessions) > self.max_sessions:
+                    dropped.append(self._sessions.popitem(last=False)[1])
+            for dropped_agent in dropped:
+                _close_agent(dropped_agent)
+        if message.get('seed') is not None:
+            agent.set_rng(random.Random(message['seed']))
+        return agent
+
+    def handle_request(self, message):
+        """
+        Returns the response to a request.
+        """
+        response = {'id': message.get('id')}
+        try:
+            if message['type'] == 'decide':
+                agent = self._session_agent(message)
+                decision = decode_decision(message['decision'])
+                state = message['state']
+                known_state = None if state is None else decode_state(state)
+                choices = agent.make_decision(decision, known_state)
+                response['choices'] = encode_choices(decision, choices)
+            elif message['type'] == 'close':
+                with self._sessions_lock:
+                    agent = self._sessions.pop(message['session'], None)
+                if agent is not None:
+                    _close_agent(agent)
+            else:
+                raise RemoteAgentError('Unknown request type %s.' % message['type'])
+        except Exception as error:
+            response['error'] = '%s: %s' % (type(error).__name__, error)
+        return response
+
+    @property
+    def num_sessions(self):
+        return len(self._sessions)
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        """
+        Serve on a background thread.
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        self.executor.shutdown()
+        with self._sessions_lock:
+            agents = list(self._sessions.values())
+            self._sessions.clear()
+        for agent in agents:
+            _close_agent(agent)
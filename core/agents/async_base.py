@@ -0,0 +1,75 @@
+import asyncio
+import inspect
+
+from core.agents.base import BaseAgent
+
+
+class AsyncBaseAgent(BaseAgent):
+    """
+    Abstract base class for an agent that makes its decisions in a coroutine, e.g. while waiting
+    on a model server or a remote player. Played by `AsyncGameController`, which can run many
+    games on one event loop while their agents wait.
+    """
+    async def make_decision(self, decision, known_state=None):
+        """
+        Return a valid choice for the decision, see `BaseAgent.make_decision`.
+        """
+        raise NotImplementedError()
+
+    async def close(self):
+        """
+        Release anything the agent holds for the game, see `BaseAgent.close`.
+        """
+        pass
+
+
+class SyncAgentAdapter(AsyncBaseAgent):
+    """
+    Lets an `AsyncGameController` play an agent with a synchronous `make_decision`.
+    """
+    def __init__(self, agent, in_thread=False):
+        """
+        Parameters:
+            agent (`BaseAgent`): The agent to adapt.
+            in_thread (optional, bool): Make the decisions in the event loop's default executor
+                so an agent that blocks, like `CommandLineAgent`, doesn't hold up other games.
+                Decisions are made on the event loop by default, which is faster for agents that
+                only compute.
+        """
+        super(SyncAgentAdapter, self).__init__(agent.name())
+        self.agent = agent
+        self._in_thread = in_thread
+
+    def set_rng(self, rng):
+        set_rng = getattr(self.agent, 'set_rng', None)
+        if set_rng is not None:
+            set_rng(rng)
+
+    def event_sink(self):
+        event_sink = getattr(self.agent, 'event_sink', None)
+        return event_sink() if event_sink is not None else None
+
+    async def close(self):
+        close = getattr(self.agent, 'close', None)
+        if close is None:
+            return
+        if not self._in_thread:
+            close()
+            return
+        await asyncio.get_running_loop().run_in_executor(None, close)
+
+    async def make_decision(self, decision, known_state=None):
+        if not self._in_thread:
+            return self.agent.make_decision(decision, known_state)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.agent.make_decision, decision, known_state)
+
+
+def as_async_agent(agent, in_thread=False):
+    """
+    Returns the agent if its `make_decision` is a coroutine function, otherwise a
+    `SyncAgentAdapter` for it.
+    """
+    if inspect.iscoroutinefunction(agent.make_decision):
+        return agent
+    return SyncAgentAdapter(agent, in_thread)
@@ -1,9 +1,35 @@
+import random
+
+
 class BaseAgent:
     """
     Abstract base class for an agent that can play Dominion.
     """
     def __init__(self, name):
         self._name = name
+        # Agents that make random choices should use this so games can be reproduced.
+        self._rng = random
+
+    def set_rng(self, rng):
+        """
+        Use the random number generator for all random choices. Called by the
+        `GameController` with the game's generator when the game is set up.
+        """
+        self._rng = rng
+
+    def event_sink(self):
+        """
+        Returns a `GameLogger` that should receive the game's events, e.g. to keep track of
+        what the agent has seen, or None. The `GameController` adds it to the game's loggers.
+        """
+        return None
+
+    def close(self):
+        """
+        Release anything the agent holds for the game. Called by the `GameController` once the
+        game is over. The agent may still be used for another game after it.
+        """
+        pass
 
     def name(self):
         """
@@ -1,5 +1,3 @@
-import random
-
 from base_set.cards import SmithyCard
 from base_set.cards import ProvinceCard
 from core.agents.base import BaseAgent
@@ -30,7 +28,7 @@ class DumbMoneyAgent(BaseAgent):
                 else:
                     choice = []
         elif isinstance(decision, PlayActionDecision):
-            choice = [random.choice(decision.options)]
+            choice = [self._rng.choice(decision.options)]
         return choice
 
 
@@ -0,0 +1,352 @@
+from collections import OrderedDict
+import math
+import multiprocessing
+import random
+import time
+
+from base_set.cards import DuchyCard
+from base_set.cards import EstateCard
+from base_set.cards import GoldCard
+from base_set.cards import ProvinceCard
+from base_set.cards import SilverCard
+from core.agents.base import BaseAgent
+from core.decision import BuyDecision
+from core.decision import PlayActionDecision
+from core.decision import PlayTreasureDecision
+from core.determinization import DeterminizationSampler
+from core.game_controller import GameController
+from core.game_controller import TurnPhase
+
+
+DEFAULT_ITERATIONS = 200
+DEFAULT_EXPLORATION = 0.7
+# Rollouts that haven't finished after this many turns are scored on victory points.
+DEFAULT_ROLLOUT_TURNS = 60
+# The default policy's choice for the decision being searched counts this share of the
+# simulations as prior visits on top of its own. A single buy barely changes who wins a
+# simulated game, so without them the search follows the noise of a few hundred rollouts
+# instead of the policy. Another choice is only made when UCB keeps sending it most of the
+# simulations because it keeps winning more. The prior scales with the simulations so the
+# policy is as hard to overrule with any budget.
+DEFAULT_PRIOR_WEIGHT = 0.5
+# Win rate of a decision before any simulation has gone through it.
+PRIOR_WIN_RATE = 0.5
+# The default policy buys Duchies once this many Provinces are left, and Estates once this
+# many are.
+DUCHY_PROVINCES_LEFT = 4
+ESTATE_PROVINCES_LEFT = 2
+
+# Decisions made between cards in a turn, the only ones that come with a known state and can
+# be resumed with `GameController.play_until_game_over`.
+PHASE_BY_DECISION_CLASS = {
+    PlayActionDecision: TurnPhase.ACTION,
+    BuyDecision: TurnPhase.BUY,
+}
+
+
+def _tree_options(decision):
+    """
+    Returns the distinct single choices for a decision, with None for choosing nothing.
+    """
+    options = list(OrderedDict.fromkeys(decision.options))
+    if decision.min == 0:
+        options.append(None)
+    return options
+
+
+class _Node:
+    """
+    Statistics for a choice in the search tree. Children are keyed by decision class and
+    option so that different decisions at the same depth don't share nodes.
+    """
+    __slots__ = ('children', 'visits', 'wins', 'availability', 'is_default')
+
+    def __init__(self, is_default=False):
+        self.children = {}
+        self.visits = 0
+        self.wins = 0.0
+        # Number of visits to the parent where this choice was legal.
+        self.availability = 0
+        # True for the default policy's choice, which gets the prior visits.
+        self.is_default = is_default
+
+    def win_rate(self):
+        return self.wins / self.visits if self.visits else PRIOR_WIN_RATE
+
+    def total_visits(self, parent, prior_weight):
+        """
+        Returns the node's visits with its prior visits added. They are won at the node's
+        own rate.
+        """
+        if self.is_default:
+            return self.visits + prior_weight * parent.visits
+        return self.visits
+
+
+class RolloutAgent(BaseAgent):
+    """
+    The default policy used for every player in a simulated game once it leaves the search
+    tree. Plays all treasures, plays a random action and buys like big money, adding Duchies
+    and then Estates as the Provinces run out. All other decisions are made at random.
+    """
+    def __init__(self, name, rng=random):
+        super(RolloutAgent, self).__init__(name)
+        self._rng = rng
+
+    def make_decision(self, decision, known_state=None):
+        if isinstance(decision, PlayTreasureDecision):
+            return decision.options
+        if isinstance(decision, PlayActionDecision):
+            return [self._rng.choice(decision.options)]
+        if isinstance(decision, BuyDecision):
+            provinces_left = None
+            if known_state is not None:
+                provinces_left = known_state.get_supply_distribution().count(ProvinceCard)
+            buy_order = [ProvinceCard]
+            if provinces_left is not None and provinces_left <= DUCHY_PROVINCES_LEFT:
+                buy_order.append(DuchyCard)
+            buy_order.append(GoldCard)
+            if provinces_left is not None and provinces_left <= ESTATE_PROVINCES_LEFT:
+                buy_order.append(EstateCard)
+            buy_order.append(SilverCard)
+            for card in buy_order:
+                if card in decision.options:
+                    return [card]
+            return []
+        return decision.choose_random(self._rng)
+
+
+class _TreeAgent(BaseAgent):
+    """
+    Plays the searching player in a simulated game. Decisions between cards are chosen by
+    walking down the search tree until a choice that hasn't been tried is expanded, after
+    which the rollout agent decides. The default policy's choice is expanded first.
+    """
+    def __init__(self, name, root, exploration, rollout_agent, rng,
+            prior_weight=DEFAULT_PRIOR_WEIGHT):
+        super(_TreeAgent, self).__init__(name)
+        self._node = root
+        self._exploration = exploration
+        self._prior_weight = prior_weight
+        self._rollout_agent = rollout_agent
+        self._rng = rng
+        # Nodes visited in this simulation, starting with the root.
+        self.path = [root]
+
+    def _score(self, node):
+        return (
+            node.wins / node.visits +
+            self._exploration * math.sqrt(math.log(node.availability) / node.visits)
+        )
+
+    def _default_key(self, keys, decision, known_state):
+        """
+        Returns the key of the default policy's choice, or None if it isn't one of the keys.
+        """
+        choices = self._rollout_agent.make_decision(decision, known_state)
+        key = (type(decision), choices[0] if choices else None)
+        return key if key in keys else None
+
+    def make_decision(self, decision, known_state=None):
+        node = self._node
+        if node is None or type(decision) not in PHASE_BY_DECISION_CLASS:
+            return self._rollout_agent.make_decision(decision, known_state)
+        options = _tree_options(decision)
+        if len(options) < 2:
+            return self._rollout_agent.make_decision(decision, known_state)
+        keys = [(type(decision), option) for option in options]
+        children = node.children
+        unexplored = [key for key in keys if key not in children]
+        key = None
+        if self._prior_weight and len(unexplored) == len(keys):
+            key = self._default_key(keys, decision, known_state)
+        if key is not None:
+            children[key] = _Node(is_default=True)
+            self._node = None
+        elif unexplored:
+            key = self._rng.choice(unexplored)
+            children[key] = _Node()
+            self._node = None
+        else:
+            key = max(keys, key=lambda key: self._score(children[key]))
+            self._node = children[key]
+        for available_key in keys:
+            if available_key in children:
+                children[available_key].availability += 1
+        self.path.append(children[key])
+        option = key[1]
+        return [option] if option is not None else []
+
+
+def search(
+        view, decision_class, iterations=DEFAULT_ITERATIONS, time_limit=None,
+        exploration=DEFAULT_EXPLORATION, rollout_turns=DEFAULT_ROLLOUT_TURNS, seed=None,
+        tracker=None, prior_weight=DEFAULT_PRIOR_WEIGHT):
+    """
+    Runs simulations for a decision of the viewing player. Returns a dict of option -> (visits,
+    wins) for every choice that was tried, with None for choosing nothing. Wins are split
+    evenly between tied winners. The default policy's choice includes its prior visits.
+
+    Parameters:
+        view (`ViewableGameState`): The state known to the player making the decision.
+        decision_class (class): One of the classes in `PHASE_BY_DECISION_CLASS`.
+        iterations (optional, int): Number of simulations to run. None for no limit.
+        time_limit (optional, float): Seconds to run simulations for. None for no limit.
+        exploration (optional, float): Weight of exploration in the UCB formula.
+        rollout_turns (optional, int): Simulated games are scored after this many turns.
+        seed (optional, int): Seed for the simulations.
+        tracker (optional, `KnowledgeTracker`): What the player learnt over the game, used to
+            sample the hidden cards.
+        prior_weight (optional, float): Share of the simulations the default policy's choice
+            gets as prior visits.
+    """
+    rng = random.Random(seed)
+    sampler = DeterminizationSampler(view, tracker)
+    name = view.viewing_player
+    phase = PHASE_BY_DECISION_CLASS[decision_class]
+    deadline = None if time_limit is None else time.time() + time_limit
+    root = _Node()
+    iteration = 0
+    while (
+        (iterations is None or iteration < iterations) and
+        (deadline is None or time.time() < deadline)
+    ):
+        game_state = sampler.sample(rng)
+        tree_agent = _TreeAgent(
+            name, root, exploration, RolloutAgent(name, rng), rng, prior_weight
+        )
+        agents = [
+            tree_agent if player == name else RolloutAgent(player, rng)
+            for player in view.player_names
+        ]
+        game_state.set_agents(agents)
+        controller = GameController(
+            agents, [], game_state.logger, verbose=False, seed=rng.getrandbits(64)
+        )
+        controller.game_state = game_state
+        controller.player_index = view.player_names.index(view.active_player)
+        controller.turn_number = 1
+        controller.play_until_game_over(from_phase=phase, max_turns=rollout_turns)
+        winners = controller.get_winners()
+        reward = 1.0 / len(winners) if name in winners else 0.0
+        for node in tree_agent.path:
+            node.visits += 1
+            node.wins += reward
+        iteration += 1
+    result = {}
+    for (_, option), child in root.children.items():
+        visits = child.total_visits(root, prior_weight)
+        result[option] = (visits, visits * child.win_rate())
+    return result
+
+
+def _search_from_args(args):
+    return search(*args)
+
+
+class IsmctsAgent(BaseAgent):
+    """
+    An agent that chooses which action to play and what to buy with information set Monte
+    Carlo tree search. Hidden cards are dealt out at random before every simulation and the
+    rest of the game is played out with `RolloutAgent`'s default policy. The search starts out
+    trusting the policy's choice and only leaves it when the simulations clearly favour
+    another. All other decisions are left to the default policy.
+
+    Searches can run in several processes at once, each building its own tree from the same
+    root. Their statistics are added up before choosing, so more workers make a stronger agent
+    for the same time limit.
+    """
+    def __init__(
+            self, name, iterations=DEFAULT_ITERATIONS, time_limit=None, workers=1,
+            exploration=DEFAULT_EXPLORATION, rollout_turns=DEFAULT_ROLLOUT_TURNS, seed=None,
+            knowledge_tracker=None, prior_weight=DEFAULT_PRIOR_WEIGHT):
+        """
+        Parameters:
+            name (str): Name of the agent.
+            iterations (optional, int): Number of simulations each worker runs per decision.
+                None for no limit, time_limit must be set then.
+            time_limit (optional, float): Seconds each worker searches for per decision.
+            workers (optional, int): Number of processes to search in. None for one per CPU.
+                Searches run in this process when inside a daemon process, e.g. a batch of
+                games played on a `multiprocessing.Pool`.
+            exploration (optional, float): Weight of exploration in the UCB formula.
+            rollout_turns (optional, int): Simulated games are scored on victory points after
+                this many turns.
+            seed (optional, int): Seed for the searches. A `GameController` replaces it with the
+                game's generator when the game is set up.
+            knowledge_tracker (optional, `KnowledgeTracker`): Tracker for this agent's player.
+                A `GameController` sends it the game's events. Without one the hidden cards are
+                sampled from the known state alone.
+            prior_weight (optional, float): Share of the simulations the default policy's
+                choice gets as prior visits, see `DEFAULT_PRIOR_WEIGHT`. 0 for a plain search.
+        """
+        super(IsmctsAgent, self).__init__(name)
+        if iterations is None and time_limit is None:
+            raise ValueError('Either iterations or time_limit must be set.')
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        if multiprocessing.current_process().daemon:
+            workers = 1
+        self._iterations = iterations
+        self._time_limit = time_limit
+        self._workers = workers
+        self._exploration = exploration
+        self._rollout_turns = rollout_turns
+        self._prior_weight = prior_weight
+        self._rng = random.Random(seed)
+        self._knowledge_tracker = knowledge_tracker
+        self._rollout_agent = RolloutAgent(name, self._rng)
+        self._pool = None
+
+    def set_rng(self, rng):
+        super(IsmctsAgent, self).set_rng(rng)
+        self._rollout_agent.set_rng(rng)
+
+    def event_sink(self):
+        return self._knowledge_tracker
+
+    def make_decision(self, decision, known_state=None):
+        if known_state is None or type(decision) not in PHASE_BY_DECISION_CLASS:
+            return self._rollout_agent.make_decision(decision, known_state)
+        options = _tree_options(decision)
+        if len(options) < 2:
+            return self._rollout_agent.make_decision(decision, known_state)
+        known_state.resolve()
+        args = [
+            (
+                known_state, type(decision), self._iterations, self._time_limit,
+                self._exploration, self._rollout_turns, self._rng.getrandbits(32),
+                self._knowledge_tracker, self._prior_weight
+            )
+            for i in range(self._workers)
+        ]
+        if self._workers > 1:
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(self._workers)
+            results = self._pool.map(_search_from_args, args)
+        else:
+            results = [_search_from_args(args[0])]
+
+        totals = {}
+        for result in results:
+            for option, (visits, wins) in result.items():
+                total_visits, total_wins = totals.get(option, (0, 0.0))
+                totals[option] = (total_visits + visits, total_wins + wins)
+        best = max(options, key=lambda option: totals.get(option, (0, 0.0)))
+        return [best] if best is not None else []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Shut down the worker processes, if any were started. A `GameController` calls it once
+        the game is over, the processes are started again if the agent plays another game.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
@@ -0,0 +1,129 @@
+import asyncio
+import concurrent.futures
+import uuid
+
+from core.agents.async_base import AsyncBaseAgent
+from core.agents.base import BaseAgent
+from core.remote import decode_choices
+from core.remote import encode_decision
+from core.remote import encode_state
+from core.remote import get_pool
+
+
+class _RemoteSession:
+    """
+    One agent on an agent server, the state shared by `RemoteAgent` and `AsyncRemoteAgent`.
+    """
+    def __init__(self, name, agent, address, pool):
+        self.name = name
+        self.agent = agent
+        self.pool = pool or get_pool(address)
+        self.id = uuid.uuid4().hex
+        # Seed for the server's agent, sent with the next decision once set.
+        self.seed = None
+        # True once the server may have created the agent.
+        self.opened = False
+
+    def decide(self, decision, known_state):
+        """
+        Returns a `concurrent.futures.Future` of the server's response to the decision.
+        """
+        message = {
+            'type': 'decide',
+            'session': self.id,
+            'agent': self.agent,
+            'name': self.name,
+            'decision': encode_decision(decision),
+            'state': None if known_state is None else encode_state(known_state),
+        }
+        if self.seed is not None:
+            message['seed'] = self.seed
+            self.seed = None
+        self.opened = True
+        return self.pool.get().request(message)
+
+    def close(self):
+        """
+        Returns a `concurrent.futures.Future` of the server's response to dropping the agent.
+        """
+        if not self.opened:
+            # The server never heard of the session, don't connect just to drop it.
+            future = concurrent.futures.Future()
+            future.set_result({})
+            return future
+        self.opened = False
+        return self.pool.get().request({'type': 'close', 'session': self.id})
+
+
+class RemoteAgent(BaseAgent):
+    """
+    An agent that is played by an agent server in another process, see `core.agent_server`.
+    Every remote agent in a process shares a pool of persistent connections to the server, and
+    each connection carries the decisions of many games at once. The agent's session on the
+    server is closed when the game is over, the pool stays open for the next game.
+
+    Use `functools.partial` to give `run_games` remote agents, e.g.
+    `partial(RemoteAgent, agent='learned', address='/tmp/agents.sock')`.
+    """
+    def __init__(self, name, agent, address=None, pool=None, timeout=None):
+        """
+        Parameters:
+            name (str): Name of the agent.
+            agent (str): Name the server's agent is registered under.
+            address (optional, str): 'host:port' of a TCP server or the path of a Unix socket.
+                Either address or pool must be set.
+            pool (optional, `ConnectionPool`): Connections to use instead of the ones this
+                process shares for the address. The caller owns the pool and closes it.
+            timeout (optional, float): Seconds to wait for each decision. Waits forever by
+                default.
+        """
+        super(RemoteAgent, self).__init__(name)
+        self._session = _RemoteSession(name, agent, address, pool)
+        self._timeout = timeout
+
+    def set_rng(self, rng):
+        super(RemoteAgent, self).set_rng(rng)
+        # The server's agent makes its random choices from a seed drawn from the game, so the
+        # game can still be reproduced from its seed.
+        self._session.seed = rng.getrandbits(64)
+
+    def make_decision(self, decision, known_state=None):
+        response = self._session.decide(decision, known_state).result(self._timeout)
+        return decode_choices(decision, response['choices'])
+
+    def close(self):
+        """
+        Drop the agent on the server. Called by the `GameController` once the game is over.
+        """
+        self._session.close().result(self._timeout)
+
+
+class AsyncRemoteAgent(AsyncBaseAgent):
+    """
+    A `RemoteAgent` for an `AsyncGameController`. Waiting for a decision doesn't hold up the
+    event loop, so many games can wait on the server at once.
+    """
+    def __init__(self, name, agent, address=None, pool=None, timeout=None):
+        """
+        See `RemoteAgent` for the parameters.
+        """
+        super(AsyncRemoteAgent, self).__init__(name)
+        self._session = _RemoteSession(name, agent, address, pool)
+        self._timeout = timeout
+
+    def set_rng(self, rng):
+        super(AsyncRemoteAgent, self).set_rng(rng)
+        self._session.seed = rng.getrandbits(64)
+
+    async def make_decision(self, decision, known_state=None):
+        response = await asyncio.wait_for(
+            asyncio.wrap_future(self._session.decide(decision, known_state)), self._timeout
+        )
+        return decode_choices(decision, response['choices'])
+
+    async def close(self):
+        """
+        Drop the agent on the server. Called by the `AsyncGameController` once the game is
+        over.
+        """
+        await asyncio.wait_for(asyncio.wrap_future(self._session.close()), self._timeout)
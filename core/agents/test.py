@@ -12,6 +12,6 @@ class TestAgent(BaseAgent):
             # Play all treasures
             choice = decision.options
             return choice
-        choice =  decision.choose_random()
+        choice =  decision.choose_random(self._rng)
         return choice
 
@@ -0,0 +1,310 @@
+"""
+Playing games with agents that make their decisions in coroutines. Many games can be run on one
+event loop at once, so agents that spend their time waiting, on a model server, over the network
+or for a person, don't need a process per game.
+
+Cards ask agents for decisions synchronously in the middle of being played, so cards are played
+on a worker thread that waits for the decision on the event loop. The rest of the game runs on
+the event loop itself.
+"""
+import asyncio
+import concurrent.futures
+import time
+
+from base_set.cards import KINGDOM_CARDS
+from core.agents.async_base import SyncAgentAdapter
+from core.agents.async_base import as_async_agent
+from core.card import TreasureCard
+from core.counters import CounterId
+from core.counters import CounterName
+from core.game_controller import GameController
+from core.game_controller import MAX_TURNS
+from core.game_controller import TurnPhase
+from core.loggers.null import NullLogger
+from core.simulation import BatchSummary
+from core.simulation import GameResult
+from core.simulation import iter_game_args
+from core.timing import GameTimer
+
+
+# Number of games `run_async_games` plays at once by default.
+DEFAULT_CONCURRENT_GAMES = 100
+
+
+def _timed_agent(agent):
+    """
+    Returns the agent decisions are timed under, the adapted agent for adapters.
+    """
+    if isinstance(agent, SyncAgentAdapter):
+        return agent.agent
+    return agent
+
+
+class _BlockingAgent:
+    """
+    Stands in for an async agent in the game state. Cards are played on a worker thread and this
+    waits there for the agent to decide on the event loop.
+    """
+    def __init__(self, agent, loop, timer=None):
+        self._agent = agent
+        self._loop = loop
+        self._timer = timer
+
+    def make_decision(self, decision, known_state=None):
+        start = time.perf_counter()
+        future = asyncio.run_coroutine_threadsafe(
+            self._agent.make_decision(decision, known_state), self._loop
+        )
+        try:
+            return future.result()
+        finally:
+            if self._timer is not None:
+                self._timer.add_decision(
+                    _timed_agent(self._agent), time.perf_counter() - start
+                )
+
+    def __getattr__(self, name):
+        return getattr(self._agent, name)
+
+
+class AsyncGameController(GameController):
+    """
+    A `GameController` whose game is played in a coroutine. `run` and the methods that play the
+    game are coroutines, the rest are the same as `GameController`'s.
+
+    Timings are wall time, so when several games share the event loop they include the time
+    spent waiting for the other games.
+    """
+    def __init__(self, players, card_set, log, verbose=True, seed=None, timer=None,
+            executor=None):
+        """
+        Parameters:
+            players (list of `AsyncBaseAgent` or `BaseAgent`): Agents in the order of turns.
+                Agents with a synchronous `make_decision` are played through a
+                `SyncAgentAdapter`.
+            executor (optional, `concurrent.futures.Executor`): Cards are played on its threads.
+                Defaults to a thread of the controller's own, which is enough as a game plays
+                one card at a time. Never the event loop's default executor: its threads would
+                all be waiting on agents if enough games played cards at once, with none left
+                for the decisions of agents that run in it, like `SyncAgentAdapter`s made
+                with in_thread.
+
+        See `GameController` for the other parameters.
+        """
+        super(AsyncGameController, self).__init__(
+            list(map(as_async_agent, players)), card_set, log, verbose, seed, timer
+        )
+        self.executor = executor
+        # The controller's own thread for cards if no executor was given, created when the
+        # first card is played.
+        self._own_executor = None
+        self._loop = None
+
+    def setup_game(self):
+        super(AsyncGameController, self).setup_game()
+        self.game_state.set_agents([
+            _BlockingAgent(player, self._loop, self.timer) for player in self.players
+        ])
+
+    async def give_decision(self, decision, agent):
+        """
+        Give the agent a decision and return it's choices.
+        """
+        viewable_state = self.game_state.get_state_known_to(agent.name())
+        if self.timer is None:
+            return await agent.make_decision(decision, viewable_state)
+        start = time.perf_counter()
+        choices = await agent.make_decision(decision, viewable_state)
+        self.timer.add_decision(_timed_agent(agent), time.perf_counter() - start)
+        return choices
+
+    async def play_card(self, card):
+        """
+        Carry out the card's effects on a worker thread. The card must already be in play.
+        Treasures that only add their value can't ask for a decision and are played on the
+        event loop, which keeps games in step for a `DecisionBatcher`.
+        """
+        if card.play.__func__ is TreasureCard.play.__func__:
+            super(AsyncGameController, self).play_card(card)
+            return
+        executor = self.executor or self._own_executor
+        if executor is None:
+            executor = self._own_executor = concurrent.futures.ThreadPoolExecutor(1)
+        await self._loop.run_in_executor(
+            executor, super(AsyncGameController, self).play_card, card
+        )
+
+    async def play_treasures(self, player, treasures):
+        for treasure in treasures:
+            self.game_state.play(treasure)
+            await self.play_card(treasure)
+
+    async def play_phase(self, player, phase):
+        """
+        Play a single phase of the player's turn, see `GameController.play_phase`.
+        """
+        if phase == TurnPhase.ACTION:
+            while (
+                self.actions_left() > 0 and
+                len(self.action_cards_in_hand(player)) > 0
+            ):
+                decision = self.generate_action_decision(player)
+                choices = await self.give_decision(decision, player)
+                action_card = choices[0] if choices else None
+                if not action_card:
+                    break
+                self.game_state.update_counter(CounterId(None, CounterName.ACTIONS), -1)
+                self.game_state.play(action_card)
+                await self.play_card(action_card)
+        elif phase == TurnPhase.TREASURE:
+            decision = self.generate_play_treasures_decision(player)
+            treasures = await self.give_decision(decision, player)
+            await self.play_treasures(player, treasures)
+        elif phase == TurnPhase.BUY:
+            while self.buys_left() > 0:
+                decision = self.generate_buy_decision(player)
+                choices = await self.give_decision(decision, player)
+                choice = choices[0] if choices else None
+                if not choice:
+                    break
+                self.take_buy_action(player, choice)
+        else:
+            # Setup and cleanup don't ask the agents for anything.
+            super(AsyncGameController, self).play_phase(player, phase)
+
+    async def play_turn(self, player, from_phase=TurnPhase.SETUP):
+        """
+        Play the player's turn from the given phase to the end of cleanup, see
+        `GameController.play_turn`.
+        """
+        for phase in TurnPhase:
+            if phase.value < from_phase.value:
+                continue
+            if self.timer is None:
+                await self.play_phase(player, phase)
+            else:
+                start = time.perf_counter()
+                await self.play_phase(player, phase)
+                self.timer.add_phase(phase, time.perf_counter() - start)
+
+    async def play_until_game_over(self, from_phase=TurnPhase.SETUP, max_turns=MAX_TURNS):
+        """
+        Play turns until the game ends, see `GameController.play_until_game_over`.
+        """
+        phase = from_phase
+        while phase != TurnPhase.SETUP or not self.game_over():
+            player = self.players[self.player_index]
+            await self.play_turn(player, phase)
+            phase = TurnPhase.SETUP
+            self.player_index = self.increment_player_turn_index()
+            self.turn_number += 1
+            if self.turn_number > max_turns:
+                break
+
+    async def run(self):
+        """
+        Play the game on the running event loop and return the names of the winners.
+        """
+        self._loop = asyncio.get_running_loop()
+        self.setup_game()
+        try:
+            self.turn_number = 1
+            await self.play_until_game_over()
+            return self.finish_game()
+        finally:
+            if self._own_executor is not None:
+                self._own_executor.shutdown(wait=False)
+                self._own_executor = None
+            await self.close_agents()
+
+    async def close_agents(self):
+        """
+        Let every agent release what it holds for the game, see `GameController.close_agents`.
+        """
+        for player in self.players:
+            close = getattr(player, 'close', None)
+            if close is not None:
+                await close()
+
+
+async def play_headless_game_async(agent_classes, player_names, card_set=KINGDOM_CARDS,
+        seed=None, timed=False, executor=None):
+    """
+    Play one game on the running event loop with a logger that discards every event and return
+    a `GameResult`. See `simulation.play_headless_game` for the parameters.
+
+    Parameters:
+        executor (optional, `concurrent.futures.Executor`): Cards are played on its threads.
+            Defaults to a thread of the game's own, see `AsyncGameController`.
+    """
+    players = [klass(name) for klass, name in zip(agent_classes, player_names)]
+    controller = AsyncGameController(
+        players=players,
+        card_set=card_set,
+        log=NullLogger(),
+        verbose=False,
+        seed=seed,
+        timer=GameTimer() if timed else None,
+        executor=executor,
+    )
+    winners = await controller.run()
+    return GameResult(winners, controller.turn_number - 1, controller.timer)
+
+
+async def play_games_async(agent_classes, player_names, num_games,
+        concurrent_games=DEFAULT_CONCURRENT_GAMES, card_set=KINGDOM_CARDS, swap_seats=True,
+        seed=None, timed=False):
+    """
+    Play `num_games` headless games on the running event loop, at most `concurrent_games` at
+    once, and return a `BatchSummary` of the results. See `run_async_games` for the parameters.
+    """
+    summary = BatchSummary(player_names)
+    # Games are started as the ones before them finish, so only the games under way are held
+    # in memory however many there are in the batch.
+    game_args = iter_game_args(
+        agent_classes, player_names, num_games, card_set, swap_seats, seed, timed
+    )
+    concurrent_games = max(1, min(concurrent_games, num_games))
+    start = time.time()
+    # A game only needs a thread while it is playing a card, but that can be all of them if
+    # the agents are slow to decide.
+    with concurrent.futures.ThreadPoolExecutor(concurrent_games) as executor:
+        async def play_games():
+            # Every runner takes the next game from the shared iterator until there are none
+            # left. The iterator never awaits, so runners don't interleave inside it.
+            for args in game_args:
+                summary.add_result(await play_headless_game_async(*args, executor=executor))
+
+        await asyncio.gather(*[play_games() for _ in range(concurrent_games)])
+    summary.elapsed_seconds = time.time() - start
+    return summary
+
+
+def run_async_games(agent_classes, player_names, num_games,
+        concurrent_games=DEFAULT_CONCURRENT_GAMES, card_set=KINGDOM_CARDS, swap_seats=True,
+        seed=None, timed=False):
+    """
+    Play `num_games` headless games on a new event loop in this process and return a
+    `BatchSummary` of the results. The same seed gives the same results as `run_games`.
+
+    Parameters:
+        agent_classes (list of `AsyncBaseAgent` or `BaseAgent` subclasses): Agents in the order
+            of turns.
+        player_names (list of str): Name for each agent, in the same order.
+        num_games (int): Number of games to play.
+        concurrent_games (optional, int): Most games to have under way at once.
+        card_set (optional, list of `Card`): Cards the kingdom will be chosen from.
+        swap_seats (optional, bool): Reverse the turn order every other game so neither agent
+            always goes first. Defaults to True.
+        seed (optional, int): Seed the seeds of the games are drawn from.
+        timed (optional, bool): Time every game. The timings of the whole batch are in the
+            summary's `timer`.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(play_games_async(
+            agent_classes, player_names, num_games, concurrent_games, card_set, swap_seats,
+            seed, timed
+        ))
+    finally:
+        loop.close()
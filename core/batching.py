@@ -0,0 +1,148 @@
+"""
+Batching the decisions of many concurrent games for agents that decide faster in bulk, such as
+agents that evaluate a neural network.
+
+A `DecisionBatcher` stands in for every seat the batch agent plays. Games are played by
+`AsyncGameController`s on one event loop, so while one game waits for a decision the others
+keep playing until they need one too. Pending decisions are grouped by their class and once the
+loop has gone a whole pass without a new one, or a group reaches the batch size, each group is
+handed to the batch agent in a single call.
+"""
+import asyncio
+
+from core.agents.async_base import AsyncBaseAgent
+
+
+# Most decisions to hand the batch agent in one call.
+DEFAULT_MAX_BATCH_SIZE = 256
+
+
+class BatchAgent:
+    """
+    Abstract base class for an agent that makes many decisions in one call. It isn't a player
+    itself, a `DecisionBatcher` gives it a seat in any number of games.
+    """
+    def make_decisions(self, decisions, known_states):
+        """
+        Return a valid choice for each decision, see `BaseAgent.make_decision`. The decisions are
+        all of the same class and come from different games, or different players.
+
+        Parameters:
+            decisions (list of `Decision`): The decisions to be made.
+            known_states (list of `ViewableGameState`): The state known to the deciding player
+                for each decision, or None. `viewing_player` is the player deciding.
+        """
+        raise NotImplementedError()
+
+
+class _BatchedSeat(AsyncBaseAgent):
+    """
+    A player in one game whose decisions are made by the batcher's batch agent.
+    """
+    def __init__(self, name, batcher):
+        super(_BatchedSeat, self).__init__(name)
+        self._batcher = batcher
+
+    async def make_decision(self, decision, known_state=None):
+        return await self._batcher.decide(decision, known_state)
+
+
+class DecisionBatcher:
+    """
+    Collects the decisions of every seat of a `BatchAgent` and hands them over in batches.
+
+    Use `seat` as the agent class of the batch agent's players, e.g.
+    `run_async_games([batcher.seat, DumbMoneyAgent], ['p1', 'p2'], 1000)` or
+    `[batcher.seat] * 2` for self-play. The more games are under way at once, the bigger the
+    batches.
+    """
+    def __init__(self, batch_agent, max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+        """
+        Parameters:
+            batch_agent (`BatchAgent`): Makes the decisions.
+            max_batch_size (optional, int): Hand a group over as soon as it has this many
+                decisions.
+        """
+        self.batch_agent = batch_agent
+        self.max_batch_size = max_batch_size
+        # Decision class -> list of (decision, known state, future of the choices).
+        self._pending = {}
+        # Number of decisions added since the pass that checks for new ones was scheduled.
+        self._num_added = 0
+        self._flush_scheduled = False
+        self.num_batches = 0
+        self.num_decisions = 0
+
+    def seat(self, name):
+        """
+        Returns an `AsyncBaseAgent` whose decisions are made by the batch agent.
+        """
+        return _BatchedSeat(name, self)
+
+    def decide(self, decision, known_state=None):
+        """
+        Returns a future of the choices for the decision. Must be called on the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        group = self._pending.setdefault(type(decision), [])
+        group.append((decision, known_state, future))
+        if len(group) >= self.max_batch_size:
+            self._flush_group(type(decision))
+            return future
+        self._num_added += 1
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._num_added = 0
+            loop.call_soon(self._flush_when_idle, loop)
+        return future
+
+    def _flush_when_idle(self, loop):
+        # Games that were ready to run have had a pass of the loop. If any of them added a
+        # decision more may be on the way, so give them another pass.
+        if self._num_added:
+            self._num_added = 0
+            loop.call_soon(self._flush_when_idle, loop)
+            return
+        self._flush_scheduled = False
+        self.flush()
+
+    @staticmethod
+    def _fail_group(group, error):
+        for decision, known_state, future in group:
+            if not future.cancelled():
+                future.set_exception(error)
+
+    def _flush_group(self, decision_class):
+        group = self._pending.pop(decision_class)
+        decisions = [decision for decision, known_state, future in group]
+        known_states = [known_state for decision, known_state, future in group]
+        self.num_batches += 1
+        self.num_decisions += len(group)
+        try:
+            choices = self.batch_agent.make_decisions(decisions, known_states)
+        except Exception as error:
+            self._fail_group(group, error)
+            return
+        if len(choices) != len(group):
+            self._fail_group(group, ValueError(
+                '%s returned %d choices for %d decisions.' % (
+                    type(self.batch_agent).__name__, len(choices), len(group)
+                )
+            ))
+            return
+        for (decision, known_state, future), choice in zip(group, choices):
+            if not future.cancelled():
+                future.set_result(choice)
+
+    def flush(self):
+        """
+        Hand every pending decision to the batch agent, one call per decision class.
+        """
+        for decision_class in list(self._pending):
+            self._flush_group(decision_class)
+
+    def mean_batch_size(self):
+        if not self.num_batches:
+            return 0.0
+        return self.num_decisions / self.num_batches
@@ -1,4 +1,28 @@
+from array import array
 from collections import Counter
+from itertools import compress
+import operator
+
+
+# Size in bytes of one slot in an `ArrayCardDistribution`.
+_COUNT_ITEM_SIZE = array('l').itemsize
+
+
+def _padded(counts, length):
+    """
+    Returns the array of counts extended with zeros to the length.
+    """
+    if len(counts) >= length:
+        return counts
+    return counts + array('l', bytes(_COUNT_ITEM_SIZE * (length - len(counts))))
+
+
+def _nonzero(cards_to_counts):
+    return {card: count for card, count in cards_to_counts.items() if count}
+
+
+def _nonzero_counts(distribution):
+    return _nonzero(distribution.cards_to_counts())
 
 
 class CardDistribution:
@@ -8,6 +32,14 @@ class CardDistribution:
     def __init__(self, initial_card_list=None):
         initial_card_list = initial_card_list or []
         self._card_counter = Counter(initial_card_list)
+        # True while `_card_counter` is shared with a copy made by `deepcopy`. Whichever
+        # distribution is written to next makes its own copy of the counter first.
+        self._shared = False
+
+    def _prepare_for_write(self):
+        if self._shared:
+            self._card_counter = self._card_counter.copy()
+            self._shared = False
 
     def __iter__(self):
         for card, count in self.cards_to_counts().items():
@@ -29,22 +61,261 @@ class CardDistribution:
 
     def empty(self):
         self._card_counter = Counter()
+        self._shared = False
 
     def add(self, card, amount = 1):
+        self._prepare_for_write()
         self._card_counter[card] += amount
 
     def size(self):
         return sum(self._card_counter.values())
 
     def subtract(self, card, amount = 1):
+        self._prepare_for_write()
         self._card_counter.subtract({ card: amount })
 
     def deepcopy(self):
-        distribution = CardDistribution()
-        distribution._card_counter = self._card_counter.copy()
-        return distribution 
+        """
+        Returns an independent copy of the distribution. The copy is made lazily, both
+        distributions share the same counts until one of them is changed.
+        """
+        distribution = CardDistribution.__new__(CardDistribution)
+        distribution._card_counter = self._card_counter
+        distribution._shared = True
+        self._shared = True
+        return distribution
 
     def __eq__(self, other):
+        if not isinstance(other, CardDistribution):
+            return NotImplemented
         return self._card_counter == other._card_counter
 
-        
\ No newline at end of file
+        
+
+class CardIndex:
+    """
+    Assigns every card a small integer id. Cards are only ever registered explicitly, and
+    `CARD_INDEX` is only given card classes, all registered when their set is imported, so ids
+    are the same in every process. Distributions keep the counts of cards without an id apart.
+    """
+    def __init__(self, cards=None):
+        self._id_by_card = {}
+        self._cards = []
+        for card in cards or []:
+            self.register(card)
+
+    def __len__(self):
+        return len(self._cards)
+
+    def register(self, card):
+        """
+        Returns the id of the card, assigning it the next free id if it doesn't have one.
+        """
+        card_id = self._id_by_card.get(card)
+        if card_id is None:
+            card_id = len(self._cards)
+            self._id_by_card[card] = card_id
+            self._cards.append(card)
+        return card_id
+
+    def get_id(self, card):
+        """
+        Returns the id of the card or None if the card was never registered.
+        """
+        return self._id_by_card.get(card)
+
+    def get_card(self, card_id):
+        return self._cards[card_id]
+
+
+# Index shared by every `ArrayCardDistribution` unless one is given explicitly. Card sets
+# register their card classes when they are imported, see `base_set.cards`.
+CARD_INDEX = CardIndex()
+
+
+class ArrayCardDistribution:
+    """
+    Represents cards to counts mapping, stored as an array of counts with one slot per card in
+    a `CardIndex`. Cards that aren't in the index are counted in a dict alongside the array. The
+    total number of cards is kept up to date on every change so `size` is O(1), and
+    distributions sharing an index can be added and subtracted slot by slot.
+
+    Has the same interface as `CardDistribution`.
+    """
+    def __init__(self, initial_card_list=None, card_index=CARD_INDEX):
+        self._card_index = card_index
+        self._id_by_card = card_index._id_by_card
+        self._counts = array('l', bytes(_COUNT_ITEM_SIZE * len(card_index)))
+        # 1 for each card that has been added or subtracted since the distribution was last
+        # emptied, even if its count is back to 0. This matches the keys of `CardDistribution`.
+        self._present = bytearray(len(card_index))
+        # Card -> count for cards without an id in the index.
+        self._other = {}
+        self._size = 0
+        # True while `_counts`, `_present` and `_other` are shared with a copy made by
+        # `deepcopy`.
+        self._shared = False
+        for card in initial_card_list or []:
+            self.add(card)
+
+    def _card_id_for_write(self, card):
+        """
+        Returns the id of the card, or None if it isn't in the index, after making sure the
+        distribution can be written to.
+        """
+        card_id = self._id_by_card.get(card)
+        if card_id is not None and card_id >= len(self._counts):
+            self._grow()
+        if self._shared:
+            self._counts = array('l', self._counts)
+            self._present = bytearray(self._present)
+            self._other = dict(self._other)
+            self._shared = False
+        return card_id
+
+    def __getstate__(self):
+        # Counts are stored by card id, which only means something together with the card
+        # index. Pickle the cards themselves so the copy is rebuilt against the `CARD_INDEX` of
+        # the process that loads it.
+        card_index = None if self._card_index is CARD_INDEX else self._card_index
+        return card_index, self.cards_to_counts()
+
+    def __setstate__(self, state):
+        card_index, cards_to_counts = state
+        self.__init__(card_index=card_index or CARD_INDEX)
+        for card, count in cards_to_counts.items():
+            self.add(card, count)
+
+    def _grow(self):
+        missing = len(self._card_index) - len(self._counts)
+        self._counts = self._counts + array('l', bytes(_COUNT_ITEM_SIZE * missing))
+        self._present = self._present + bytearray(missing)
+
+    def __iter__(self):
+        for card, count in self.cards_to_counts().items():
+            for i in range(count):
+                yield card
+
+    def __repr__(self):
+        s = 'CardDistribution\n'
+        card_strs = ['%s:\t%d' % (str(key), val) for key, val in self.cards_to_counts().items()]
+        s += '\n'.join(card_strs)
+        s += '\n'
+        return s
+
+    def count(self, card):
+        try:
+            return self._counts[self._id_by_card[card]]
+        except KeyError:
+            return self._other.get(card, 0)
+        except IndexError:
+            return 0
+
+    @property
+    def card_index(self):
+        return self._card_index
+
+    def counts_by_id(self):
+        """
+        Returns the array of counts indexed by card id in the distribution's `CardIndex`. It may
+        be shared with copies of the distribution and must not be changed. Cards registered
+        after the distribution last changed may be past its end.
+        """
+        return self._counts
+
+    def cards_to_counts(self):
+        present = self._present
+        counts = dict(
+            zip(compress(self._card_index._cards, present), compress(self._counts, present))
+        )
+        if self._other:
+            counts.update(self._other)
+        return counts
+
+    def empty(self):
+        self._counts = array('l', bytes(_COUNT_ITEM_SIZE * len(self._card_index)))
+        self._present = bytearray(len(self._card_index))
+        self._other = {}
+        self._size = 0
+        self._shared = False
+
+    def add(self, card, amount = 1):
+        card_id = self._card_id_for_write(card)
+        if card_id is None:
+            self._other[card] = self._other.get(card, 0) + amount
+        else:
+            self._counts[card_id] += amount
+            self._present[card_id] = 1
+        self._size += amount
+
+    def size(self):
+        return self._size
+
+    def subtract(self, card, amount = 1):
+        card_id = self._card_id_for_write(card)
+        if card_id is None:
+            self._other[card] = self._other.get(card, 0) - amount
+        else:
+            self._counts[card_id] -= amount
+            self._present[card_id] = 1
+        self._size -= amount
+
+    def deepcopy(self):
+        """
+        Returns an independent copy of the distribution. The copy is made lazily, both
+        distributions share the same counts until one of them is changed.
+        """
+        distribution = ArrayCardDistribution.__new__(ArrayCardDistribution)
+        distribution._card_index = self._card_index
+        distribution._id_by_card = self._id_by_card
+        distribution._counts = self._counts
+        distribution._present = self._present
+        distribution._other = self._other
+        distribution._size = self._size
+        distribution._shared = True
+        self._shared = True
+        return distribution
+
+    def _combine(self, other, operation):
+        """
+        Returns a new distribution with the operation applied to the counts of each card. The
+        arrays are combined slot by slot in Python, they have one slot per card in the index so
+        this is cheap next to a dict of counts, but it isn't vectorized.
+        """
+        if self._card_index is not other._card_index:
+            raise ValueError('Can only combine distributions that share a CardIndex.')
+        length = len(self._card_index)
+        distribution = ArrayCardDistribution.__new__(ArrayCardDistribution)
+        distribution._card_index = self._card_index
+        distribution._id_by_card = self._id_by_card
+        distribution._counts = array(
+            'l', map(operation, _padded(self._counts, length), _padded(other._counts, length))
+        )
+        present = int.from_bytes(self._present, 'little') | int.from_bytes(other._present, 'little')
+        distribution._present = bytearray(present.to_bytes(length, 'little'))
+        other_counts = dict(self._other)
+        for card, count in other._other.items():
+            other_counts[card] = operation(other_counts.get(card, 0), count)
+        distribution._other = other_counts
+        distribution._size = operation(self._size, other._size)
+        distribution._shared = False
+        return distribution
+
+    def __add__(self, other):
+        return self._combine(other, operator.add)
+
+    def __sub__(self, other):
+        return self._combine(other, operator.sub)
+
+    def __eq__(self, other):
+        if isinstance(other, ArrayCardDistribution) and other._card_index is self._card_index:
+            length = max(len(self._counts), len(other._counts))
+            return (
+                _padded(self._counts, length) == _padded(other._counts, length) and
+                _nonzero(self._other) == _nonzero(other._other)
+            )
+        if isinstance(other, (ArrayCardDistribution, CardDistribution)):
+            # Cards with a count of 0 are left out, as a `CardDistribution` may or may not
+            # keep them.
+            return _nonzero_counts(self) == _nonzero_counts(other)
+        return NotImplemented
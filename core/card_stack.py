@@ -1,8 +1,31 @@
+from bisect import bisect_left
+from bisect import bisect_right
 from collections import deque
-from random import shuffle
+from heapq import heappop
+from heapq import merge
+from heapq import heappush
+from itertools import islice
 import enum
+import random
 
-from core.card_distribution import CardDistribution
+from core.card import Card
+from core.card_distribution import ArrayCardDistribution
+
+
+# Marks a key whose card was extracted from a `CardStack`.
+_REMOVED = object()
+# `CardStack` keeps the keys of extracted cards until they outnumber the cards in the stack and
+# there are at least this many.
+_MIN_KEYS_BEFORE_COMPACTING = 16
+# Cost index entry for a `CardType` no pile in the supply has.
+_NO_PILES = ((), ())
+
+
+def _pile_order(pile):
+    """
+    Sort key of a (cost, card name, card) pile: cheapest first, ties broken by name.
+    """
+    return pile[:2]
 
 
 class StackPosition(enum.Enum):
@@ -16,15 +39,67 @@ class StackPosition(enum.Enum):
 class CardStack:
     """
     An ordered stack of cards.
+
+    Every card in the stack has an integer key and keys increase from the top of the stack to
+    the bottom. `_keys` holds the keys in stack order and `_card_by_key` maps the keys of the
+    cards still in the stack to the cards. Cards extracted from the middle of the stack are
+    only removed from `_card_by_key`, their keys are skipped until the deque is compacted.
+
+    The first extract builds an index of each card's keys in a heap so the topmost copy of a
+    card is found in O(log n) instead of scanning the stack.
     """
+    # Class used to keep the count of each card in the stack.
+    distribution_class = ArrayCardDistribution
+
     def __init__(self, initial_card_list=None):
         initial_card_list = initial_card_list or []
-        self.distribution = CardDistribution(initial_card_list)
-        self._stack = deque(initial_card_list)
+        self.distribution = self.distribution_class(initial_card_list)
+        self._set_order(initial_card_list)
+
+    def _set_order(self, cards):
+        """
+        Replace the order of the stack with the list of cards, top first. The distribution
+        is not changed.
+        """
+        self._keys = deque(range(len(cards)))
+        self._card_by_key = dict(enumerate(cards))
+        self._next_top_key = -1
+        self._next_bottom_key = len(cards)
+        # Card -> heap of the keys of that card. Built by the first extract.
+        self._keys_by_card = None
+
+    def _build_keys_by_card(self):
+        keys_by_card = {}
+        for key in self._keys:
+            card = self._card_by_key.get(key, _REMOVED)
+            if card is _REMOVED:
+                continue
+            # Keys are visited in increasing order so each list is already a heap.
+            keys_by_card.setdefault(card, []).append(key)
+        self._keys_by_card = keys_by_card
+
+    def _compact(self):
+        """
+        Drop the keys of extracted cards from `_keys` once they make up most of it.
+        """
+        if len(self._keys) <= 2 * len(self._card_by_key) + _MIN_KEYS_BEFORE_COMPACTING:
+            return
+        card_by_key = self._card_by_key
+        self._keys = deque(key for key in self._keys if key in card_by_key)
 
     def __iter__(self):
-        for card in self._stack:
-            yield card
+        card_by_key = self._card_by_key
+        for key in self._keys:
+            card = card_by_key.get(key, _REMOVED)
+            if card is not _REMOVED:
+                yield card
+
+    def _iter_from_bottom(self):
+        card_by_key = self._card_by_key
+        for key in reversed(self._keys):
+            card = card_by_key.get(key, _REMOVED)
+            if card is not _REMOVED:
+                yield card
 
     def add(self, cards, position=None):
         """
@@ -44,46 +119,168 @@ class CardStack:
             cards = [cards]
         for card in cards:
             self.distribution.add(card)
+        number = len(cards)
         if position == StackPosition.TOP:
-            # Have to reverse cards because extendleft reverses them
-            self._stack.extendleft(cards[::-1])
+            # The first card gets the smallest key so it ends up on top
+            keys = range(self._next_top_key - number + 1, self._next_top_key + 1)
+            self._next_top_key -= number
+            self._keys.extendleft(reversed(keys))
         else:
-            self._stack.extend(cards)
+            keys = range(self._next_bottom_key, self._next_bottom_key + number)
+            self._next_bottom_key += number
+            self._keys.extend(keys)
+        self._card_by_key.update(zip(keys, cards))
+        keys_by_card = self._keys_by_card
+        if keys_by_card is not None:
+            for key, card in zip(keys, cards):
+                heappush(keys_by_card.setdefault(card, []), key)
 
-    def extract(self, cards):
+    def extract(self, cards, removed_keys=None):
         """
         Remove the cards from the stack and return them. If there are multiple of one of the cards
         in the stack then the one closest to the top will be extracted.
+
+        Parameters:
+            cards (list): The cards to remove.
+            removed_keys (optional, list): If given, the key of each removed card is appended to
+                it so the cards can be put back with `restore`.
+
+        Raises:
+            ValueError: If one of the cards is not in the stack.
         """
+        if self._keys_by_card is None:
+            self._build_keys_by_card()
+        keys_by_card = self._keys_by_card
         for card in cards:
+            card_keys = keys_by_card.get(card)
+            if not card_keys:
+                raise ValueError('%s is not in the stack.' % card)
+            key = heappop(card_keys)
+            del self._card_by_key[key]
             self.distribution.subtract(card)
-            self._stack.remove(card)
+            if removed_keys is not None:
+                removed_keys.append(key)
+        self._compact()
         return cards
 
-    def draw(self, amount, from_position=None):
-        cards = []
-        for i in range(amount):
-            card = self._stack.popleft()
-            cards.append(card)
+    def draw(self, amount, from_position=None, removed_keys=None):
+        """
+        Remove `amount` cards from the position, defaults to the top of the stack, and return
+        them in the order they were removed.
+
+        Parameters:
+            amount (int): Number of cards to remove.
+            from_position (optional, `StackPosition`): End of the stack to remove them from.
+            removed_keys (optional, list): If given, the key of each removed card is appended to
+                it so the cards can be put back with `restore`.
+
+        Raises:
+            IndexError: If the stack has fewer than `amount` cards. The stack is not changed.
+        """
+        if amount > len(self._card_by_key):
+            raise IndexError(
+                'Can not draw %d cards from a stack of %d.' % (amount, len(self._card_by_key))
+            )
+        if from_position == StackPosition.BOTTOM:
+            pop = self._keys.pop
+            # Only the top of each heap in the index can be removed efficiently.
+            self._keys_by_card = None
+        else:
+            pop = self._keys.popleft
+        card_by_key = self._card_by_key
+        if removed_keys is None and len(self._keys) == len(card_by_key):
+            cards = [card_by_key.pop(pop()) for i in range(amount)]
+        else:
+            cards = []
+            while len(cards) < amount:
+                key = pop()
+                card = card_by_key.pop(key, _REMOVED)
+                if card is not _REMOVED:
+                    cards.append(card)
+                    if removed_keys is not None:
+                        removed_keys.append(key)
+        keys_by_card = self._keys_by_card
+        if keys_by_card is not None:
+            for card in cards:
+                # The top card of the stack has the smallest key of all copies of the card.
+                heappop(keys_by_card[card])
+        for card in cards:
             self.distribution.subtract(card)
         return cards
 
+    def restore(self, cards, keys):
+        """
+        Put cards removed by `draw` or `extract` back where they were, given the keys those
+        collected. Only valid if the stack's order is the same as right after they were
+        removed, e.g. when undoing changes in reverse. Takes O(log n) per card.
+        """
+        all_keys = self._keys
+        card_by_key = self._card_by_key
+        keys_by_card = self._keys_by_card
+        for card, key in zip(cards, keys):
+            self.distribution.add(card)
+            card_by_key[key] = card
+            # Keys of extracted cards stay in `_keys` until it is compacted.
+            index = bisect_left(all_keys, key)
+            if index == len(all_keys) or all_keys[index] != key:
+                all_keys.insert(index, key)
+            if keys_by_card is not None:
+                heappush(keys_by_card.setdefault(card, []), key)
+
+    def get_order(self):
+        """
+        Returns the order of the stack, the keys of its cards included, for `set_order`.
+        """
+        return (
+            deque(self._keys), self._card_by_key.copy(), self._next_top_key,
+            self._next_bottom_key
+        )
+
+    def set_order(self, order):
+        """
+        Put the stack back in an order returned by `get_order`. The stack must have the same
+        cards as it had then.
+        """
+        keys, card_by_key, self._next_top_key, self._next_bottom_key = order
+        self._keys = deque(keys)
+        self._card_by_key = card_by_key.copy()
+        self._keys_by_card = None
+
     def has_card(self, card):
         return self.distribution.count(card) > 0
 
     def empty(self):
-        self._stack = deque()
-        self.distribution  = CardDistribution()
+        self._set_order([])
+        self.distribution = self.distribution_class()
 
-    def shuffle(self):
-        shuffle(self._stack)
+    def shuffle(self, rng=random):
+        """
+        Parameters:
+            rng (optional, `random.Random`): Source of randomness. Defaults to the `random`
+                module.
+        """
+        cards = list(self)
+        rng.shuffle(cards)
+        self._set_order(cards)
+
+    def reorder(self, cards):
+        """
+        Put the cards in the stack in the given order, top first. `cards` must contain exactly
+        the cards that are in the stack.
+        """
+        self._set_order(list(cards))
 
     def peek(self, index=0):
         """
         See what card is at the index without moving it. Index counts from the top of the
         stack and starts at 0.
         """
-        return self._stack[index]
+        if len(self._keys) == len(self._card_by_key):
+            return self._card_by_key[self._keys[index]]
+        try:
+            return next(islice(self, index, None))
+        except StopIteration:
+            raise IndexError('Stack index out of range')
 
     def peek_from_position(self, position, number=1):
         """
@@ -93,18 +290,23 @@ class CardStack:
             position (`StackPosition`): Position to peek from (e.g. `TOP`)
             number (`int`): Number of cards peek at. Defaults to 1
         """
-        # TODO (michelle): inefficient to create a new list, itertools.islice?
         if position == StackPosition.TOP:
-            return list(self._stack)[:number]
-        return list(self._stack)[-1 * number:]
+            return list(islice(self, number))
+        cards = list(islice(self._iter_from_bottom(), number))
+        cards.reverse()
+        return cards
 
     def size(self):
-        return len(self._stack)
+        return len(self._card_by_key)
 
     def deepcopy(self):
-        card_stack = CardStack()
+        card_stack = CardStack.__new__(CardStack)
         card_stack.distribution = self.distribution.deepcopy()
-        card_stack._stack = deque(self._stack)
+        card_stack._keys = deque(self._keys)
+        card_stack._card_by_key = self._card_by_key.copy()
+        card_stack._next_top_key = self._next_top_key
+        card_stack._next_bottom_key = self._next_bottom_key
+        card_stack._keys_by_card = None
         return card_stack
 
 
@@ -114,7 +316,7 @@ class UnorderedCardStack(CardStack):
     """
     def __init__(self, initial_card_list=None):
         initial_card_list = initial_card_list or []
-        self.distribution = CardDistribution(initial_card_list)
+        self.distribution = self.distribution_class(initial_card_list)
 
     def __iter__(self):
         for card, count in self.distribution.cards_to_counts().items():
@@ -141,8 +343,11 @@ class UnorderedCardStack(CardStack):
     def has_card(self, card):
         return self.distribution.count(card) > 0
 
-    def shuffle(self):
-        return        
+    def shuffle(self, rng=random):
+        return
+
+    def reorder(self, cards):
+        return
 
     def size(self):
         return self.distribution.size()
@@ -151,3 +356,133 @@ class UnorderedCardStack(CardStack):
         card_stack = UnorderedCardStack()
         card_stack.distribution = self.distribution.deepcopy()
         return card_stack
+
+
+class SupplyCardStack(UnorderedCardStack):
+    """
+    The supply. Every card that has been in the stack is a pile, and piles stay in the supply
+    after they run out. The number of empty piles is updated as cards are added and removed.
+
+    Piles are also indexed by cost and `CardType` so the cards a player can buy or gain are
+    found without looking at every pile. Cards that override `Card.cost` may cost a different
+    amount depending on the game state, so they are left out of the index and their cost is
+    checked on every lookup.
+    """
+    def __init__(self, initial_card_list=None):
+        super(SupplyCardStack, self).__init__(initial_card_list)
+        self._piles = set(self.distribution.cards_to_counts())
+        self._num_empty_piles = 0
+        # `CardType` or None for all piles -> (list of costs, list of cards) sorted by cost.
+        # Built on the first lookup and reset when a new pile is added.
+        self._piles_by_type = None
+        # Piles whose cost depends on the game state.
+        self._variable_cost_piles = None
+
+    def _build_cost_index(self):
+        piles_by_type = {None: []}
+        variable_cost_piles = []
+        for card in self._piles:
+            if card.cost.__func__ is not Card.cost.__func__:
+                variable_cost_piles.append(card)
+                continue
+            piles_by_type[None].append((card.base_cost, card))
+            for card_type in card.types:
+                piles_by_type.setdefault(card_type, []).append((card.base_cost, card))
+        for card_type, piles in piles_by_type.items():
+            # Break ties by name so the order is the same in every process
+            piles.sort(key=lambda pile: (pile[0], pile[1].__name__))
+            costs = [cost for cost, card in piles]
+            cards = [card for cost, card in piles]
+            piles_by_type[card_type] = (costs, cards)
+        self._piles_by_type = piles_by_type
+        self._variable_cost_piles = variable_cost_piles
+
+    def cards_costing_at_most(self, game_state, max_cost, card_type=None):
+        """
+        Returns one of each card in a non-empty pile that costs at most max_cost, cheapest
+        first.
+
+        Parameters:
+            game_state (`GameState`): State used to get the current cost of cards.
+            max_cost (int): Maximum cost of the cards.
+            card_type (optional, `CardType`): Only return cards of this type.
+        """
+        if self._piles_by_type is None:
+            self._build_cost_index()
+        costs, cards = self._piles_by_type.get(card_type, _NO_PILES)
+        count = self.distribution.count
+        affordable = [card for card in cards[:bisect_right(costs, max_cost)] if count(card) > 0]
+        variable_cost_piles = []
+        for card in self._variable_cost_piles:
+            if card_type is not None and card_type not in card.types:
+                continue
+            if count(card) > 0:
+                cost = card.cost(game_state)
+                if cost <= max_cost:
+                    variable_cost_piles.append((cost, card.__name__, card))
+        if not variable_cost_piles:
+            return affordable
+        # Merge in the piles whose cost depends on the game state by their current cost, in
+        # the same order as the index.
+        variable_cost_piles.sort(key=_pile_order)
+        piles = merge(
+            ((card.base_cost, card.__name__, card) for card in affordable), variable_cost_piles,
+            key=_pile_order
+        )
+        return [card for cost, name, card in piles]
+
+    @classmethod
+    def from_stack(cls, stack):
+        """
+        Create a supply with the same piles as another stack, including its empty piles.
+        """
+        supply = cls()
+        for card, count in stack.distribution.cards_to_counts().items():
+            if count:
+                supply.add([card] * count)
+            else:
+                supply.distribution.add(card, 0)
+                supply._piles.add(card)
+                supply._piles_by_type = None
+                supply._num_empty_piles += 1
+        return supply
+
+    def add(self, cards, position=None):
+        if type(cards) != list:
+            cards = [cards]
+        for card in cards:
+            if card not in self._piles:
+                self._piles.add(card)
+                self._piles_by_type = None
+            elif self.distribution.count(card) == 0:
+                self._num_empty_piles -= 1
+            self.distribution.add(card)
+
+    def empty(self):
+        super(SupplyCardStack, self).empty()
+        self._piles = set()
+        self._num_empty_piles = 0
+        self._piles_by_type = None
+
+    def extract(self, cards):
+        for card in cards:
+            if card not in self._piles:
+                self._piles.add(card)
+                self._piles_by_type = None
+            if self.distribution.count(card) == 1:
+                self._num_empty_piles += 1
+            self.distribution.subtract(card)
+        return cards
+
+    def num_empty_piles(self):
+        return self._num_empty_piles
+
+    def deepcopy(self):
+        card_stack = SupplyCardStack.__new__(SupplyCardStack)
+        card_stack.distribution = self.distribution.deepcopy()
+        card_stack._piles = set(self._piles)
+        card_stack._num_empty_piles = self._num_empty_piles
+        # The index is never changed in place so copies can share it.
+        card_stack._piles_by_type = self._piles_by_type
+        card_stack._variable_cost_piles = self._variable_cost_piles
+        return card_stack
@@ -16,14 +16,21 @@ class Decision:
         self.min = min
         self.max = max
 
-    def choose_random(self):
+    def choose_random(self, rng=random):
+        """
+        Returns a random valid choice.
+
+        Parameters:
+            rng (optional, `random.Random`): Source of randomness. Defaults to the `random`
+                module.
+        """
         if not self.options:
             return []
-        num_to_choose = random.randint(self.min, self.max)
+        num_to_choose = rng.randint(self.min, self.max)
         opt_copy = self.options[:]
         res = []
         for i in range(num_to_choose):
-            pick = random.choice(opt_copy)
+            pick = rng.choice(opt_copy)
             opt_copy.remove(pick)
             res.append(pick)
         return res
@@ -0,0 +1,311 @@
+"""
+Sampling full game states that are consistent with what one player knows, for agents that
+search through the hidden information of the game.
+"""
+from collections import Counter
+import random
+
+from core.card_stack import StackPosition
+from core.events import CardEventType
+from core.events import CardKnowledgeEvent
+from core.events import CardMoveEvent
+from core.events import ShuffleEvent
+from core.game_state import GameState
+from core.game_state import STACK_CLASS_BY_LOCATION_NAME
+from core.locations import GLOBAL_LOCATIONS
+from core.locations import Location
+from core.locations import LocationName
+from core.loggers.base import GameLogger
+
+
+# Moves that every player sees, wherever the cards come from or go to.
+PUBLIC_MOVE_TYPES = frozenset((
+    CardEventType.PLAY,
+    CardEventType.GAIN,
+    CardEventType.BUY,
+    CardEventType.TRASH,
+    CardEventType.REVEAL,
+))
+# Locations whose cards are face up. Every move into or out of them is seen by every player.
+PUBLIC_LOCATION_NAMES = frozenset((
+    LocationName.IN_PLAY,
+    LocationName.SET_ASIDE,
+    LocationName.SUPPLY,
+    LocationName.TRASH,
+))
+PLAYER_LOCATION_NAMES = tuple(
+    name for name in STACK_CLASS_BY_LOCATION_NAME if name not in GLOBAL_LOCATIONS
+)
+
+
+class KnowledgeTracker(GameLogger):
+    """
+    Follows the events of a game and keeps track of what one player knows about where every
+    player's cards are. Only the parts of each event the player would have seen are used: the
+    number of cards in every move is public, which cards were moved is only known for public
+    moves and the player's own cards.
+
+    For each player location the tracker knows its size, a multiset of cards that are known
+    to be in it, and for draw piles the cards known to be on top in order, e.g. a card gained to
+    the top of a deck. Knowledge that an unseen move might have invalidated is dropped, so
+    what remains is always true.
+
+    Log every event of the game to the tracker from the start, e.g. by using it as the game's
+    logger, and pass it to a `DeterminizationSampler`.
+    """
+    event_classes = (CardMoveEvent, CardKnowledgeEvent, ShuffleEvent)
+
+    def __init__(self, player, player_names, starting_deck):
+        """
+        Parameters:
+            player (str): Name of the player whose knowledge is tracked.
+            player_names (list of str): List of the names of players in the order of turns.
+            starting_deck (list of `Card`): Cards each player starts with in their draw pile.
+        """
+        self.player = player
+        self.player_names = player_names
+        self._sizes = {}
+        self._known = {}
+        self._tops = {}
+        for player_name in player_names:
+            for location_name in PLAYER_LOCATION_NAMES:
+                location = Location(player_name, location_name)
+                self._sizes[location] = 0
+                self._known[location] = Counter()
+            draw_pile = Location(player_name, LocationName.DRAW_PILE)
+            self._sizes[draw_pile] = len(starting_deck)
+            self._known[draw_pile].update(starting_deck)
+            self._tops[draw_pile] = []
+
+    def log(self, event):
+        if isinstance(event, CardMoveEvent):
+            visible = self._is_visible(event)
+            moved = self._take(event.from_location, event.cards, event.from_position, visible)
+            self._put(event.to_location, moved, event.to_position)
+        elif isinstance(event, ShuffleEvent):
+            if event.location in self._tops:
+                self._tops[event.location] = []
+        elif isinstance(event, CardKnowledgeEvent):
+            if self.player in event.players:
+                self._learn(event.from_location, event.cards, event.from_position)
+
+    def _is_visible(self, event):
+        """
+        Returns True if the player sees which cards were moved.
+        """
+        if event.type in PUBLIC_MOVE_TYPES:
+            return True
+        from_location = event.from_location
+        to_location = event.to_location
+        if (
+            from_location.name in PUBLIC_LOCATION_NAMES or
+            to_location.name in PUBLIC_LOCATION_NAMES
+        ):
+            return True
+        # Cards are discarded from a deck face up, e.g. by Vassal
+        if event.type == CardEventType.DISCARD and from_location.name == LocationName.DRAW_PILE:
+            return True
+        owners = set((from_location.player, to_location.player))
+        owners.discard(None)
+        return owners == set((self.player,))
+
+    def _take(self, location, cards, position, visible):
+        """
+        Remove the cards from the location. Returns the list of cards that were moved with
+        None for each card that is not known.
+        """
+        if location not in self._sizes:
+            return list(cards)
+        number = len(cards)
+        known = self._known[location]
+        top = self._tops.get(location)
+        from_top = position in (None, StackPosition.TOP)
+        if number >= self._sizes[location]:
+            # The whole location moved so everything known about it moved too.
+            moved = list(cards) if visible else list(known.elements())
+            moved += [None] * (number - len(moved))
+            known.clear()
+            if top is not None:
+                self._tops[location] = []
+        elif visible:
+            moved = list(cards)
+            known.subtract(cards)
+            for card in [card for card, count in known.items() if count <= 0]:
+                del known[card]
+            if top is not None:
+                self._tops[location] = top[number:] if from_top else []
+        else:
+            moved = []
+            if top and from_top:
+                moved = top[:number]
+                known.subtract(moved)
+                self._tops[location] = top = top[len(moved):]
+            if len(moved) < number:
+                # Unseen cards left from somewhere below the known top, any other known card
+                # could have been one of them.
+                known.clear()
+                known.update(top or [])
+                moved += [None] * (number - len(moved))
+        self._sizes[location] -= number
+        return moved
+
+    def _put(self, location, moved, position):
+        if location not in self._sizes:
+            return
+        self._sizes[location] += len(moved)
+        self._known[location].update(card for card in moved if card is not None)
+        top = self._tops.get(location)
+        if top is None or position not in (None, StackPosition.TOP):
+            return
+        if None in moved:
+            self._tops[location] = moved[:moved.index(None)]
+        else:
+            self._tops[location] = moved + top
+
+    def _learn(self, location, cards, position):
+        """
+        Record cards the player was shown in a location.
+        """
+        if location not in self._sizes:
+            return
+        known = self._known[location]
+        shown = Counter(cards)
+        if position is None:
+            # The whole location was shown
+            known.clear()
+            known.update(shown)
+            if location in self._tops:
+                self._tops[location] = []
+            return
+        for card, count in shown.items():
+            if known[card] < count:
+                known[card] = count
+        if location in self._tops and position == StackPosition.TOP:
+            self._tops[location] = list(cards)
+
+    def get_size(self, location):
+        """
+        Returns the number of cards in a player's location.
+        """
+        return self._sizes[location]
+
+    def get_known_cards(self, location):
+        """
+        Returns a `Counter` of the cards known to be in a player's location.
+        """
+        return Counter(self._known[location])
+
+    def get_known_top(self, location):
+        """
+        Returns the list of cards known to be on top of a draw pile, top first.
+        """
+        return list(self._tops.get(location, []))
+
+
+class DeterminizationSampler:
+    """
+    Samples `GameState`s that are consistent with everything a player knows. Each player's
+    cards that are not known to be in a location are shuffled and dealt into the unknown
+    places in their hidden locations, so every sample is valid without rejecting any. All the
+    work that doesn't depend on the shuffle is done once when the sampler is created.
+
+    Without a `KnowledgeTracker` only the `ViewableGameState` is used. Every player's unseen
+    cards are then dealt to fill their hidden hand and their draw pile, whose sizes are public,
+    and the discard pile is made up of whatever is left under its known top card.
+    """
+    def __init__(self, view, tracker=None):
+        """
+        Parameters:
+            view (`ViewableGameState`): The state known to the player.
+            tracker (optional, `KnowledgeTracker`): What the player learnt over the game.
+        """
+        self.player_names = view.player_names
+        self.current_player_index = view.player_names.index(view.active_player)
+        self.counters = view.counters
+        self._global_stacks = {}
+        for location_name in GLOBAL_LOCATIONS:
+            location = Location(None, location_name)
+            self._global_stacks[location] = view.get_location_info(location).stack
+        # List of (player, unknown cards, list of (location, top cards, known cards, number of
+        # unknown cards)) with each player's locations in the order they are dealt.
+        self._plans = []
+        for player in view.player_names:
+            if tracker is None:
+                slots = self._slots_from_view(view, player)
+            else:
+                slots = self._slots_from_tracker(view, tracker, player)
+            unknown = Counter(iter(view.get_deck_distribution(player)))
+            for location, top, known, num_unknown in slots:
+                unknown.subtract(top)
+                unknown.subtract(known)
+            unknown_cards = list(unknown.elements())
+            self._plans.append((player, unknown_cards, slots))
+
+    def _slots_from_view(self, view, player):
+        slots = []
+        for location_name in PLAYER_LOCATION_NAMES:
+            location = Location(player, location_name)
+            info = view.get_location_info(location)
+            if info is not None and info.stack is not None:
+                slots.append((location, [], list(info.stack), 0))
+
+        discard = Location(player, LocationName.DISCARD)
+        top_of_discard = view.get_location_info(discard).top_card
+        top = [] if top_of_discard is None else [top_of_discard]
+        hand = Location(player, LocationName.HAND)
+        if player != view.viewing_player:
+            slots.append((hand, [], [], view.get_location_info(hand).size))
+        draw_pile = Location(player, LocationName.DRAW_PILE)
+        slots.append((draw_pile, [], [], view.get_location_info(draw_pile).size))
+        # The rest of the cards go to the discard pile
+        slots.append((discard, top, [], None))
+        return slots
+
+    def _slots_from_tracker(self, view, tracker, player):
+        slots = []
+        discard = Location(player, LocationName.DISCARD)
+        top_of_discard = view.get_location_info(discard).top_card
+        for location_name in PLAYER_LOCATION_NAMES:
+            location = Location(player, location_name)
+            if location == discard and top_of_discard is not None:
+                # The tracker only follows the order of draw piles, the view knows the top of
+                # every discard pile.
+                top = [top_of_discard]
+            else:
+                top = tracker.get_known_top(location)
+            known = tracker.get_known_cards(location)
+            known.subtract(top)
+            known_cards = list(known.elements())
+            num_unknown = tracker.get_size(location) - len(top) - len(known_cards)
+            slots.append((location, top, known_cards, num_unknown))
+        return slots
+
+    def sample(self, rng=random):
+        """
+        Returns a new `GameState` with the unknown cards dealt at random. The state has a
+        `NullLogger` and no agents.
+
+        Parameters:
+            rng (optional, `random.Random`): Source of randomness, also used by the new state
+                for shuffling. Defaults to the `random` module.
+        """
+        stacks = {
+            location: stack.deepcopy() for location, stack in self._global_stacks.items()
+        }
+        for player, unknown_cards, slots in self._plans:
+            unknown_cards = unknown_cards[:]
+            rng.shuffle(unknown_cards)
+            dealt = 0
+            for location, top, known, num_unknown in slots:
+                if num_unknown is None:
+                    # Takes every card that is left
+                    num_unknown = len(unknown_cards) - dealt
+                cards = known + unknown_cards[dealt:dealt + num_unknown]
+                dealt += num_unknown
+                if known and num_unknown:
+                    rng.shuffle(cards)
+                stack_class = STACK_CLASS_BY_LOCATION_NAME[location.name]
+                stacks[location] = stack_class(top + cards)
+        return GameState.from_stacks(
+            self.player_names, stacks, self.counters, self.current_player_index, rng=rng
+        )
@@ -0,0 +1,177 @@
+"""
+Encoding what a player knows about a game as a fixed size vector of numbers, for agents that
+learn. Cards are placed by their id in a `CardIndex`, so a card has the same slot in every game
+and every process, and players are placed relative to the player the state is known to, so the
+deciding player's features are always first.
+
+Requires NumPy, which is not needed by the rest of the project.
+"""
+import numpy as np
+
+from core.card_distribution import ArrayCardDistribution
+from core.card_distribution import CARD_INDEX
+from core.counters import CounterId
+from core.counters import CounterName
+from core.locations import LocationName
+
+
+# Value of a size that isn't known to the player.
+UNKNOWN_SIZE = -1
+
+# Sizes encoded for each player, in order.
+SIZE_LOCATIONS = (LocationName.HAND, LocationName.DRAW_PILE, LocationName.DISCARD)
+
+_GLOBAL_COUNTERS = [CounterId(None, name) for name in CounterName]
+_COUNT_DTYPE = np.dtype('l')
+
+
+class FeatureEncoder:
+    """
+    Writes a `ViewableGameState` into a preallocated NumPy array. The array is reused by every
+    call, copy it to keep the features of more than one state.
+
+    The features are, in order:
+        supply     Count of each card in the supply.
+        trash      Count of each card in the trash.
+        hand       Count of each card in the player's hand.
+        in_play    Count of each card in play.
+        decks      Count of each card owned by each player.
+        discard    1 for the known top card of each player's discard pile.
+        sizes      Size of each player's hand, draw pile and discard pile, `UNKNOWN_SIZE` if
+                   the player doesn't know it.
+        counters   Value of each global counter, in `CounterName` order.
+        active     1 if it's the player's turn.
+
+    Blocks with one row per player start with the player the state is known to, followed by the
+    others in turn order. `slices` maps each name to its part of the vector.
+    """
+    def __init__(self, num_players=2, card_index=CARD_INDEX, dtype=np.float32):
+        """
+        Parameters:
+            num_players (optional, int): Most players in the games to encode. Blocks for seats
+                that are missing are left at 0.
+            card_index (optional, `CardIndex`): Gives each card its slot. Only the cards
+                registered when the encoder is created are encoded, register every card up
+                front, as `base_set.cards` does.
+            dtype (optional): NumPy type of the features.
+        """
+        self.num_players = num_players
+        self.card_index = card_index
+        self.num_cards = len(card_index)
+        self.dtype = np.dtype(dtype)
+        num_cards = self.num_cards
+        sizes = [
+            ('supply', num_cards),
+            ('trash', num_cards),
+            ('hand', num_cards),
+            ('in_play', num_cards),
+            ('decks', num_players * num_cards),
+            ('discard', num_players * num_cards),
+            ('sizes', num_players * len(SIZE_LOCATIONS)),
+            ('counters', len(_GLOBAL_COUNTERS)),
+            ('active', 1),
+        ]
+        self.slices = {}
+        start = 0
+        for name, size in sizes:
+            self.slices[name] = slice(start, start + size)
+            start += size
+        self.size = start
+        self.buffer = np.zeros(self.size, self.dtype)
+        self._batch_buffer = np.zeros((0, self.size), self.dtype)
+        self._size_slot = {
+            location_name: index for index, location_name in enumerate(SIZE_LOCATIONS)
+        }
+
+    def _add_counts(self, out, start, distribution):
+        """
+        Write the distribution's counts into out from start, one slot per card.
+        """
+        if (
+            isinstance(distribution, ArrayCardDistribution) and
+            distribution.card_index is self.card_index
+        ):
+            counts = np.frombuffer(distribution.counts_by_id(), _COUNT_DTYPE)
+            length = min(len(counts), self.num_cards)
+            out[start:start + length] = counts[:length]
+            return
+        for card, count in distribution.cards_to_counts().items():
+            card_id = self.card_index.get_id(card)
+            if card_id is not None and card_id < self.num_cards:
+                out[start + card_id] = count
+
+    def encode(self, known_state, out=None):
+        """
+        Returns the features of the state, in `buffer` unless out is given.
+
+        Parameters:
+            known_state (`ViewableGameState`): The state to encode.
+            out (optional, array): Array of `size` to write the features to.
+        """
+        if out is None:
+            out = self.buffer
+        out.fill(0)
+        slices = self.slices
+        num_cards = self.num_cards
+        player_names = known_state.player_names
+        num_players = len(player_names)
+        if num_players > self.num_players:
+            raise ValueError(
+                'Encoder is for %d players, the game has %d.' % (self.num_players, num_players)
+            )
+        viewer_index = player_names.index(known_state.viewing_player)
+        seat_by_player = {
+            name: (index - viewer_index) % num_players for index, name in enumerate(player_names)
+        }
+        out[slices['sizes']] = UNKNOWN_SIZE
+        sizes_start = slices['sizes'].start
+        num_sizes = len(SIZE_LOCATIONS)
+        size_slot = self._size_slot
+        for info in known_state.iter_location_info():
+            location = info.location
+            name = location.name
+            if location.player is not None and name in size_slot:
+                seat = seat_by_player[location.player]
+                if info.size is not None:
+                    out[sizes_start + seat * num_sizes + size_slot[name]] = info.size
+                if name == LocationName.DISCARD and info.top_card is not None:
+                    card_id = self.card_index.get_id(info.top_card)
+                    if card_id is not None and card_id < num_cards:
+                        out[slices['discard'].start + seat * num_cards + card_id] = 1
+            if info.stack is None:
+                continue
+            if name == LocationName.SUPPLY:
+                start = slices['supply'].start
+            elif name == LocationName.TRASH:
+                start = slices['trash'].start
+            elif name == LocationName.IN_PLAY:
+                start = slices['in_play'].start
+            elif name == LocationName.HAND and location.player == known_state.viewing_player:
+                start = slices['hand'].start
+            else:
+                continue
+            self._add_counts(out, start, info.stack.distribution)
+        decks_start = slices['decks'].start
+        for player in player_names:
+            deck = known_state.get_deck_distribution(player)
+            if deck is not None:
+                self._add_counts(out, decks_start + seat_by_player[player] * num_cards, deck)
+        counters = known_state.counters
+        counters_start = slices['counters'].start
+        for index, counter_id in enumerate(_GLOBAL_COUNTERS):
+            out[counters_start + index] = counters.get(counter_id, 0)
+        if known_state.active_player == known_state.viewing_player:
+            out[slices['active'].start] = 1
+        return out
+
+    def encode_many(self, known_states):
+        """
+        Returns a 2-D array with the features of each state in a row, e.g. for the decisions
+        handed to a `BatchAgent`. The array is reused by every call.
+        """
+        if len(self._batch_buffer) < len(known_states):
+            self._batch_buffer = np.zeros((len(known_states), self.size), self.dtype)
+        batch = self._batch_buffer[:len(known_states)]
+        for row, known_state in zip(batch, known_states):
+            self.encode(known_state, row)
+        return batch
@@ -1,8 +1,10 @@
+import enum
 import itertools
-from random import sample
+import random
+import time
 
 from core.card import CardType
-from core.card_stack import UnorderedCardStack
+from core.card_stack import SupplyCardStack
 from core.counters import CounterId
 from core.counters import CounterName
 from core.decision import PlayActionDecision
@@ -11,6 +13,7 @@ from core.decision import PlayTreasureDecision
 from core.game_state import GameState
 from core.locations import Location
 from core.locations import LocationName
+from core.loggers.bus import EventBus
 
 from base_set.cards import GoldCard
 from base_set.cards import SilverCard
@@ -52,11 +55,34 @@ STARTING_SILVER_SUPPLY = 40
 STARTING_GOLD_SUPPLY = 30
 
 
+class TurnPhase(enum.Enum):
+    """
+    Phases of a turn, in the order they are played.
+    """
+    SETUP = 0
+    ACTION = 1
+    TREASURE = 2
+    BUY = 3
+    CLEANUP = 4
+
+
 class GameController(object):
     """
     The Game manages the control flow, soliciting actions from Players.
     """
-    def __init__(self, players, card_set, log):
+    def __init__(self, players, card_set, log, verbose=True, seed=None, timer=None):
+        """
+        Parameters:
+            players (list of `BaseAgent`): Agents in the order of turns.
+            card_set (list of `Card`): Cards the kingdom will be chosen from.
+            log (`GameLogger`): All changes to game state will be logged here.
+            verbose (optional, bool): Print the final scores when the game is over. Defaults
+                to True.
+            seed (optional, int): Seed for the game's random numbers. Defaults to one drawn
+                from the `random` module.
+            timer (optional, `GameTimer`): Records how long each phase, card play and agent
+                decision took. Games are not timed by default.
+        """
         self.players = players # array of agents
         self.num_players = len(players)
         # all agents need to implement a .name() method
@@ -67,7 +93,16 @@ class GameController(object):
         self.player_index = 0 # TODO: randomize start player
         self.starting_player_index = self.player_index
         self.log = log
-
+        self.verbose = verbose
+        # Number of the turn being played, starting at 1. Set once the game is running.
+        self.turn_number = 0
+        # Each game has its own stream of random numbers, shared by the game state and the
+        # agents, so a game can be reproduced from its seed alone wherever it is played.
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.timer = timer
 
     def get_starting_supply(self):
         """
@@ -79,7 +114,7 @@ class GameController(object):
         # TODO cards need hasRandomizer method
         randomizer_cards = [x for x in self.card_set if x.hasRandomizer()]
         num_to_sample = min(NUM_KINGDOM_CARDS, len(self.card_set))
-        kingdom_cards = sample(randomizer_cards, num_to_sample) * INITIAL_SUPPLY_COUNT
+        kingdom_cards = self.rng.sample(randomizer_cards, num_to_sample) * INITIAL_SUPPLY_COUNT
         treasure_cards = (
             [GoldCard] * STARTING_GOLD_SUPPLY +
             [SilverCard] * STARTING_SILVER_SUPPLY +
@@ -93,7 +128,7 @@ class GameController(object):
         curse_starting_supply = STARTING_CURSE_SUPPLY_BY_PLAYER_COUNT[self.num_players]
         curse_cards = [CurseCard] * curse_starting_supply
         # TODO: how to handle gardens etc. which depend on num_players
-        return UnorderedCardStack(kingdom_cards + treasure_cards + flattened_victory_cards)
+        return SupplyCardStack(kingdom_cards + treasure_cards + flattened_victory_cards)
 
     def get_starting_deck(self):
         return (
@@ -127,8 +162,7 @@ class GameController(object):
         supply = self.game_state.get_location(Location(None, LocationName.SUPPLY))
         if supply.distribution.count(ProvinceCard) == 0:
             return True
-        cards_to_counts = supply.distribution.cards_to_counts()
-        if list(cards_to_counts.values()).count(0) >= 3:
+        if self.game_state.get_num_empty_supply_piles() >= NUM_EMPTY_PILES_FOR_GAME_END:
             return True
         return False
 
@@ -142,8 +176,8 @@ class GameController(object):
             supply cards that the player can afford
         """
         money = self.money_in_play()
-        available_cards = set(list(self.game_state.get_location(Location(None, LocationName.SUPPLY))))
-        affordable_cards = [card for card in available_cards if card.cost(self.game_state) <= money]
+        supply = self.game_state.get_location(Location(None, LocationName.SUPPLY))
+        affordable_cards = supply.cards_costing_at_most(self.game_state, money)
         return BuyDecision(options=affordable_cards, min=0, max=1)
 
     def generate_action_decision(self, player):
@@ -192,7 +226,7 @@ class GameController(object):
         """
         for treasure in treasures:
             self.game_state.play(treasure)
-            treasure.play(self.game_state)
+            self.play_card(treasure)
 
     def player_name_to_vp(self):
         """
@@ -201,9 +235,7 @@ class GameController(object):
         """
         player_name_to_vp = {}
         for player_name in list(map(lambda p: p.name(), self.players)):
-            deck = self.game_state.get_deck(player_name)
-            victory_points = sum([card.victory_points(player_name, self.game_state) for card in deck])
-            player_name_to_vp[player_name] = victory_points
+            player_name_to_vp[player_name] = self.game_state.get_victory_points(player_name)
         return player_name_to_vp
 
     def give_decision(self, decision, agent):
@@ -211,9 +243,22 @@ class GameController(object):
         Give the agent a decision and return it's choices.
         """
         viewable_state = self.game_state.get_state_known_to(agent.name())
+        if self.timer is None:
+            return agent.make_decision(decision, viewable_state)
+        start = time.perf_counter()
         choices = agent.make_decision(decision, viewable_state)
+        self.timer.add_decision(agent, time.perf_counter() - start)
         return choices
 
+    def play_card(self, card):
+        """
+        Carry out the card's effects. The card must already be in play.
+        """
+        if self.timer is None:
+            card.play(self.game_state)
+        else:
+            self.timer.play_card(card, self.game_state)
+
     def get_winner_indices(self, start_turn_index, next_turn_index, scores):
         """
         Returns a list of the indices of the winning players. There can be multiple if there is a tie.
@@ -255,42 +300,17 @@ class GameController(object):
         winners = [self.players[ind].name() for ind in winner_indices]
         return winners
 
-    def run(self):
-        """
-        Main control loop for game play
+    def play_phase(self, player, phase):
         """
-        #################
-        # Initialization
-        #################
-
-        starting_supply = self.get_starting_supply()
-        starting_deck = self.get_starting_deck()
-        self.game_state = GameState(
-            list(map(lambda x: x.name(), self.players)),
-            starting_supply,
-            starting_deck,
-            self.log
-        )
-        # TODO: inform Players of initial state for learning agents
-        self.game_state.set_agents(self.players)
-        for player in self.players:
-            # shuffle player decks
-            self.game_state.shuffle(Location(player.name(), LocationName.DRAW_PILE))
-            # draw starting hands
-            self.game_state.draw(NUM_CARDS_IN_HAND, player.name())
+        Play a single phase of the player's turn.
 
-        #################
-        # Gameplay loop
-        #################
-        turn_number = 1
-        while not self.game_over():
-            # Fetch the next player
-            player = self.players[self.player_index]
-            ### Setup Phase
+        Parameters:
+            player (`BaseAgent`): Agent whose turn it is.
+            phase (`TurnPhase`): Phase to play.
+        """
+        if phase == TurnPhase.SETUP:
             self.game_state.reset_counters_for_new_turn()
-
-            ### Action phase
-
+        elif phase == TurnPhase.ACTION:
             while (
                 self.actions_left() > 0 and
                 len(self.action_cards_in_hand(player)) > 0
@@ -303,13 +323,12 @@ class GameController(object):
                     break
                 self.game_state.update_counter(CounterId(None, CounterName.ACTIONS), -1)
                 self.game_state.play(action_card)
-                action_card.play(self.game_state)
-
-            ### Buy phase
+                self.play_card(action_card)
+        elif phase == TurnPhase.TREASURE:
             decision = self.generate_play_treasures_decision(player)
             treasures = self.give_decision(decision, player)
             self.play_treasures(player, treasures)
-
+        elif phase == TurnPhase.BUY:
             while self.buys_left() > 0:
                 decision = self.generate_buy_decision(player)
                 choices = self.give_decision(decision, player)
@@ -318,30 +337,153 @@ class GameController(object):
                 if not choice:
                     break
                 self.take_buy_action(player, choice)
-            
+        elif phase == TurnPhase.CLEANUP:
             ### Discard cards in play and in hand
             self.game_state.discard_location(Location(player.name(), LocationName.IN_PLAY))
             self.game_state.discard_location(Location(player.name(), LocationName.HAND))
-
             ### Draw next hand
             self.game_state.draw(NUM_CARDS_IN_HAND, player.name())
 
+    def play_turn(self, player, from_phase=TurnPhase.SETUP):
+        """
+        Play the player's turn from the given phase to the end of cleanup.
+
+        Parameters:
+            player (`BaseAgent`): Agent whose turn it is.
+            from_phase (optional, `TurnPhase`): Phase to start from. Starting anywhere but
+                `TurnPhase.SETUP` resumes a turn that is already under way, e.g. from a forked
+                game state. Defaults to the start of the turn.
+        """
+        for phase in TurnPhase:
+            if phase.value < from_phase.value:
+                continue
+            if self.timer is None:
+                self.play_phase(player, phase)
+            else:
+                start = time.perf_counter()
+                self.play_phase(player, phase)
+                self.timer.add_phase(phase, time.perf_counter() - start)
+
+    def play_until_game_over(self, from_phase=TurnPhase.SETUP, max_turns=MAX_TURNS):
+        """
+        Play turns until the game ends. `game_state` has to be set up already.
+
+        Parameters:
+            from_phase (optional, `TurnPhase`): Phase of the current player's turn to resume
+                from. Defaults to the start of the turn.
+            max_turns (optional, int): Stop once `turn_number` goes past this. Defaults to
+                `MAX_TURNS`.
+        """
+        phase = from_phase
+        # The game only ends between turns so a turn under way is always finished.
+        while phase != TurnPhase.SETUP or not self.game_over():
+            player = self.players[self.player_index]
+            self.play_turn(player, phase)
             # TODO: inform Players of after turn state for learning agents
-            
+            phase = TurnPhase.SETUP
             # rotate player index
             self.player_index = self.increment_player_turn_index()
-            turn_number += 1
+            self.turn_number += 1
             # Safety to avoid bots getting stuck in infinite game.
-            if turn_number > MAX_TURNS:
+            if self.turn_number > max_turns:
                 break
 
+    def get_game_logger(self):
+        """
+        Returns the logger for the game state. Events go to the controller's log and to the
+        sinks the agents ask for, through an `EventBus` when there are any.
+        """
+        sinks = []
+        for player in self.players:
+            # Agents that don't extend `BaseAgent` may not have an event_sink.
+            event_sink = getattr(player, 'event_sink', None)
+            sink = event_sink() if event_sink is not None else None
+            if sink is not None:
+                sinks.append(sink)
+        if not sinks:
+            return self.log
+        return EventBus([self.log] + sinks)
+
+    def setup_game(self):
+        """
+        Create the game state with the starting supply and decks, and draw each player's
+        first hand.
+        """
+        starting_supply = self.get_starting_supply()
+        starting_deck = self.get_starting_deck()
+        self.game_state = GameState(
+            list(map(lambda x: x.name(), self.players)),
+            starting_supply,
+            starting_deck,
+            self.get_game_logger(),
+            self.rng
+        )
+        # TODO: inform Players of initial state for learning agents
+        if self.timer is None:
+            self.game_state.set_agents(self.players)
+        else:
+            # Cards ask the agents in game state for decisions, time those too.
+            self.game_state.set_agents(list(map(self.timer.wrap_agent, self.players)))
+        for player in self.players:
+            set_rng = getattr(player, 'set_rng', None)
+            if set_rng is not None:
+                set_rng(self.rng)
+        for player in self.players:
+            # shuffle player decks
+            self.game_state.shuffle(Location(player.name(), LocationName.DRAW_PILE))
+            # draw starting hands
+            self.game_state.draw(NUM_CARDS_IN_HAND, player.name())
+
+    def run(self):
+        """
+        Main control loop for game play
+        """
+        #################
+        # Initialization
+        #################
+        self.setup_game()
+
+        #################
+        # Gameplay loop
+        #################
+        try:
+            self.turn_number = 1
+            self.play_until_game_over()
+            return self.finish_game()
+        finally:
+            self.close_agents()
+
+    def close_agents(self):
+        """
+        Let every agent release what it holds for the game, e.g. worker processes or a session
+        on an agent server. Called by `run` once the game is over.
+        """
+        for player in self.players:
+            # Agents that don't extend `BaseAgent` may not have a close.
+            close = getattr(player, 'close', None)
+            if close is not None:
+                close()
+
+    def finish_game(self):
+        """
+        Flush the game's log and return the names of the winners, printing the final scores
+        when verbose.
+        """
+        # Loggers that write in the background finish before the game is resolved. Loggers
+        # that don't extend `GameLogger` may not have a flush.
+        flush = getattr(self.game_state.logger, 'flush', None)
+        if flush is not None:
+            flush()
+
         #################
         # Resolve game
         #################
-        print('\nGAME OVER on Turn %d\n-----------------\n' % (turn_number / 2))
+        winners = self.get_winners()
+        if not self.verbose:
+            return winners
+        print('\nGAME OVER on Turn %d\n-----------------\n' % (self.turn_number / 2))
         for name, vp in self.player_name_to_vp().items():
             print('%s: %d' % (name, vp))
-        winners = self.get_winners()
         if len(winners) == 1:
             print('Winner: ' + winners[0])
         elif len(winners) == 2:
@@ -1,7 +1,12 @@
 from collections import namedtuple
+import random
+import weakref
 
+from core.card import Card
+from core.card_distribution import ArrayCardDistribution
 from core.card_stack import CardStack
 from core.card_stack import StackPosition
+from core.card_stack import SupplyCardStack
 from core.card_stack import UnorderedCardStack
 from core.counters import CounterId
 from core.counters import CounterName
@@ -12,10 +17,12 @@ from core.events import CardKnowledgeEventType
 from core.events import CardMoveEvent
 from core.events import CounterEvent
 from core.events import CounterEventType
+from core.events import EVENT_CLASSES
 from core.events import ShuffleEvent
 from core.locations import GLOBAL_LOCATIONS
 from core.locations import Location
 from core.locations import LocationName
+from core.loggers.null import NullLogger
 
 
 STACK_CLASS_BY_LOCATION_NAME = {
@@ -24,7 +31,7 @@ STACK_CLASS_BY_LOCATION_NAME = {
     LocationName.DISCARD: CardStack,
     LocationName.IN_PLAY: UnorderedCardStack,
     LocationName.TRASH: UnorderedCardStack,
-    LocationName.SUPPLY: UnorderedCardStack,
+    LocationName.SUPPLY: SupplyCardStack,
     LocationName.SET_ASIDE: UnorderedCardStack,
 }
 COUNTER_VALUES_AT_TURN_START = {
@@ -38,27 +45,129 @@ class ImpossibleMoveEvent(Exception):
     pass
 
 
+JournalEntry = namedtuple('JournalEntry', ['event', 'undo_info'])
+JournalEntry.__doc__ = """
+A change to game state recorded in the journal so it can be undone.
+
+Parameters:
+    event (One of `events.EVENT_CLASSES`): The event describing the change.
+    undo_info: Whatever else is needed to undo the change. The keys the moved cards had in the
+        from location for a `CardMoveEvent` from an ordered stack, see `CardStack.restore`, the
+        order before shuffling from `CardStack.get_order` for a `ShuffleEvent` and the previous
+        value for a `CounterEvent` that sets a counter.
+"""
+
+
+GameStateSnapshot = namedtuple('GameStateSnapshot', [
+    'locations',
+    'counters',
+    'current_player_index',
+    'decks',
+    'static_victory_points',
+    'variable_victory_point_cards',
+])
+GameStateSnapshot.__doc__ = """
+A copy of everything in a `GameState` that changes during a game. Created by
+`GameState.snapshot` and passed to `GameState.restore`. It is never changed once created so it
+can be restored any number of times.
+
+Parameters:
+    locations (dict): `Location` -> copy of the `CardStack` at that location.
+    counters (dict): `CounterId` -> int for all game state counters.
+    current_player_index (int): Index of the player whose turn it is.
+    decks (dict): Player name -> `CardDistribution` of the cards in the player's deck.
+    static_victory_points (dict): Player name -> total of their static victory points.
+    variable_victory_point_cards (dict): Player name -> set of cards in their deck whose victory
+        points depend on the game state.
+"""
+
+
+# Card -> the card's victory points, or None if they depend on the game state.
+_STATIC_VICTORY_POINTS_BY_CARD = {}
+
+
+def _static_victory_points(card):
+    """
+    Returns the victory points of the card if they don't depend on the game state, otherwise
+    None.
+    """
+    try:
+        return _STATIC_VICTORY_POINTS_BY_CARD[card]
+    except KeyError:
+        pass
+    if card.victory_points.__func__ is Card.victory_points.__func__:
+        vp = card.vp
+    else:
+        vp = None
+    _STATIC_VICTORY_POINTS_BY_CARD[card] = vp
+    return vp
+
+
 class GameState:
     """
     Represents all game state.
     """
-    def __init__(self, player_names, supply, starting_deck, logger):
+    def __init__(self, player_names, supply, starting_deck, logger, rng=random):
         """
         Parameters:
             player_names (list of str): List of the names of players in the order of turns.
-            supply (`UnorderedCardStack`): Starting supply for the game.
+            supply (`SupplyCardStack`): Starting supply for the game. Other stacks are copied
+                into a `SupplyCardStack`.
             starting_deck (`UnorderedCardStack`): Cards each player will start with.
             logger (`GameLogger`): All changes to game state will be logged here.
+            rng (optional, `random.Random`): Source of randomness for shuffling. Defaults to
+                the `random` module.
         """
-        self.logger = logger
+        self.set_logger(logger)
+        self.rng = rng
         self.player_names = player_names
         self._counters = self._create_counters(player_names)
         self._locations = self._create_locations(player_names)
+        # Every card each player owns and the total of their victory points that don't depend
+        # on the game state. Kept up to date as cards move between players' locations.
+        self._decks = {player: ArrayCardDistribution() for player in player_names}
+        self._static_victory_points = {player: 0 for player in player_names}
+        # Cards that have been in each player's deck whose victory points depend on game state.
+        self._variable_victory_point_cards = {player: set() for player in player_names}
         for player in player_names:
             stack = self.get_location(Location(player, LocationName.DRAW_PILE))
             stack.add(list(starting_deck))
+            self._add_to_deck(player, starting_deck)
+        if not isinstance(supply, SupplyCardStack):
+            supply = SupplyCardStack.from_stack(supply)
         self._locations[Location(None, LocationName.SUPPLY)] = supply
         self._current_player_index = 0
+        # Weak references to `ViewableGameState`s that have not read their state yet. They are
+        # resolved before the next change to game state. Views agents have already dropped
+        # are never resolved.
+        self._unresolved_views = []
+        # List of `JournalEntry` for every change since journaling started, or None if changes
+        # are not being journaled.
+        self._journal = None
+
+    def set_logger(self, logger):
+        """
+        Log all future changes to game state to the logger. Only events of the classes in the
+        logger's `event_classes` will be constructed. Loggers that don't declare
+        `event_classes` receive every event. Loggers whose event classes can change, like an
+        `EventBus`, have an `attach` method that is given the game state so they can call
+        `update_event_classes`.
+        """
+        self.logger = logger
+        self.update_event_classes()
+        attach = getattr(logger, 'attach', None)
+        if attach is not None:
+            attach(self)
+
+    def update_event_classes(self):
+        """
+        Read the logger's `event_classes` again, after they changed.
+        """
+        event_classes = getattr(self.logger, 'event_classes', EVENT_CLASSES)
+        self._log_card_moves = CardMoveEvent in event_classes
+        self._log_card_knowledge = CardKnowledgeEvent in event_classes
+        self._log_counters = CounterEvent in event_classes
+        self._log_shuffles = ShuffleEvent in event_classes
 
     def _create_locations(self, player_names):
         """
@@ -85,6 +194,24 @@ class GameState:
             counters[CounterId(None, counter_name)] = 0
         return counters
 
+    def _add_to_deck(self, player, cards):
+        deck = self._decks[player]
+        for card in cards:
+            deck.add(card)
+            vp = _static_victory_points(card)
+            if vp is None:
+                self._variable_victory_point_cards[player].add(card)
+            else:
+                self._static_victory_points[player] += vp
+
+    def _remove_from_deck(self, player, cards):
+        deck = self._decks[player]
+        for card in cards:
+            deck.subtract(card)
+            vp = _static_victory_points(card)
+            if vp is not None:
+                self._static_victory_points[player] -= vp
+
     def _shuffle_discard_into_draw(self, player):
         """
         Shuffle the discard pile of the player and put it under their draw pile.
@@ -109,10 +236,39 @@ class GameState:
         """
         Returns a `ViewableGameState` that has the information the given player would be
         able to see.
+
+        The view is lazy, nothing is copied until the view is first read. It still reflects the
+        game state at the time it was created because game state resolves all outstanding
+        views before changing.
+        """
+        view = ViewableGameState(
+            None, None, self.get_current_player_name(), player, game_state=self,
+            player_names=self.player_names
+        )
+        self._unresolved_views.append(weakref.ref(view))
+        return view
+
+    def _resolve_views(self):
+        """
+        Make every outstanding `ViewableGameState` read its state. Must be called before any
+        change to game state.
+        """
+        for view_ref in self._unresolved_views:
+            view = view_ref()
+            if view is not None:
+                view.resolve()
+        self._unresolved_views = []
+
+    def _location_infos_known_to(self, player, current_player):
+        """
+        Returns a list of `LocationInfo`, the counters dict and a dict of player name to deck
+        distribution with the information the given player is able to see. Every gain and
+        trash is public so the cards in each deck are known, though not where they are. The
+        stacks and distributions are copy on write, they share cards with game state until
+        either one changes.
         """
         infos = []
         # Completely public locations
-        current_player = self.get_current_player_name()
         public_locations = (
             Location(None, LocationName.SUPPLY),
             Location(None, LocationName.TRASH),
@@ -143,12 +299,191 @@ class GameState:
                 continue
             infos.append(LocationInfo(location, None, stack.size(), None))
 
-        # Size of one's own draw pile
-        players_draw_pile = Location(player, LocationName.DRAW_PILE)
-        draw_pile_stack = self.get_location(players_draw_pile)
-        infos.append(LocationInfo(players_draw_pile, None, draw_pile_stack.size(), None))
+        # Size of each player's draw pile, anyone can count the cards in a deck
+        for player_name in self.player_names:
+            location = Location(player_name, LocationName.DRAW_PILE)
+            infos.append(LocationInfo(location, None, self.get_location(location).size(), None))
         counters = self._counters.copy()
-        return ViewableGameState(infos, counters, current_player, player)
+        decks = {name: self.get_deck_distribution(name) for name in self.player_names}
+        return infos, counters, decks
+
+    def snapshot(self):
+        """
+        Returns a `GameStateSnapshot` of the current state. The logger and agents are not part
+        of the snapshot.
+        """
+        return self._copy_mutable_state(
+            self._locations,
+            self._counters,
+            self._current_player_index,
+            self._decks,
+            self._static_victory_points,
+            self._variable_victory_point_cards,
+        )
+
+    def restore(self, snapshot):
+        """
+        Return the game state to the state it was in when the snapshot was taken. Nothing is
+        logged. The snapshot can be restored again later. Any journal is discarded.
+        """
+        if self._unresolved_views:
+            self._resolve_views()
+        self._journal = None
+        self._set_mutable_state(self._copy_mutable_state(*snapshot))
+
+    def _set_mutable_state(self, state):
+        self._locations = state.locations
+        self._counters = state.counters
+        self._current_player_index = state.current_player_index
+        self._decks = state.decks
+        self._static_victory_points = state.static_victory_points
+        self._variable_victory_point_cards = state.variable_victory_point_cards
+
+    @staticmethod
+    def _copy_mutable_state(
+            locations, counters, current_player_index, decks, static_victory_points,
+            variable_victory_point_cards):
+        return GameStateSnapshot(
+            {location: stack.deepcopy() for location, stack in locations.items()},
+            counters.copy(),
+            current_player_index,
+            {player: deck.deepcopy() for player, deck in decks.items()},
+            static_victory_points.copy(),
+            {player: set(cards) for player, cards in variable_victory_point_cards.items()},
+        )
+
+    def fork(self, logger=None, rng=None):
+        """
+        Returns a new `GameState` with a copy of the current state that can be played forward
+        without affecting this one, e.g. to search ahead. The fork has no agents, call
+        `set_agents` before playing cards that need decisions.
+
+        Parameters:
+            logger (optional, `GameLogger`): Logger for the fork. Defaults to a `NullLogger`.
+            rng (optional, `random.Random`): Source of randomness for the fork. Defaults to
+                the one of this game state, pass another to leave its stream untouched.
+        """
+        game_state = GameState.__new__(GameState)
+        game_state.set_logger(logger or NullLogger())
+        game_state.rng = rng or self.rng
+        game_state.player_names = self.player_names
+        game_state._unresolved_views = []
+        game_state._journal = None
+        game_state._agents = []
+        game_state._set_mutable_state(self.snapshot())
+        return game_state
+
+    @classmethod
+    def from_stacks(
+            cls, player_names, stacks, counters, current_player_index=0, logger=None,
+            rng=random):
+        """
+        Returns a new `GameState` with the cards already laid out, e.g. a guess at the hidden
+        state of a game in progress. Each player's deck is made up of the cards in their
+        locations. Like a fork, the new state has no agents.
+
+        Parameters:
+            player_names (list of str): List of the names of players in the order of turns.
+            stacks (dict): `Location` -> `CardStack`. The stacks are used as they are, locations
+                that are left out are empty.
+            counters (dict): `CounterId` -> int. Counters that are left out are 0.
+            current_player_index (optional, int): Index of the player whose turn it is.
+                Defaults to 0.
+            logger (optional, `GameLogger`): Defaults to a `NullLogger`.
+            rng (optional, `random.Random`): Source of randomness for shuffling. Defaults to
+                the `random` module.
+        """
+        supply = stacks.get(Location(None, LocationName.SUPPLY), SupplyCardStack())
+        game_state = cls(player_names, supply, [], logger or NullLogger(), rng)
+        game_state._agents = []
+        for location, stack in stacks.items():
+            if location.name == LocationName.SUPPLY:
+                continue
+            game_state._locations[location] = stack
+            if location.player is not None:
+                game_state._add_to_deck(location.player, list(stack))
+        game_state._counters.update(counters)
+        game_state._current_player_index = current_player_index
+        return game_state
+
+    def mark(self):
+        """
+        Returns a mark for the current point in the journal that can be passed to `rollback`.
+        Starts journaling changes to game state if they aren't being journaled already.
+        """
+        if self._journal is None:
+            self._journal = []
+        return len(self._journal)
+
+    def rollback(self, mark):
+        """
+        Undo every change made since `mark` returned the given mark. This is O(changes). Nothing
+        is logged for the undone changes, and marks made after this one are no longer valid.
+        """
+        if self._unresolved_views:
+            self._resolve_views()
+        journal = self._journal
+        while len(journal) > mark:
+            event, undo_info = journal.pop()
+            event_class = type(event)
+            if event_class is CardMoveEvent:
+                self._undo_move(event, undo_info)
+            elif event_class is CounterEvent:
+                if event.type == CounterEventType.SET:
+                    self._counters[event.counter_id] = undo_info
+                else:
+                    self._counters[event.counter_id] -= event.value
+            elif event_class is ShuffleEvent:
+                if undo_info is not None:
+                    self.get_location(event.location).set_order(undo_info)
+
+    def stop_journal(self):
+        """
+        Stop journaling changes and discard the journal.
+        """
+        self._journal = None
+
+    def _undo_move(self, event, removed_keys):
+        cards = event.cards
+        to_stack = self.get_location(event.to_location)
+        if isinstance(to_stack, UnorderedCardStack):
+            to_stack.extract(cards)
+        else:
+            to_stack.draw(len(cards), event.to_position)
+        from_stack = self.get_location(event.from_location)
+        if isinstance(from_stack, UnorderedCardStack):
+            from_stack.add(cards)
+        else:
+            from_stack.restore(cards, removed_keys)
+        if event.from_location.player != event.to_location.player:
+            self._change_owner(cards, event.to_location.player, event.from_location.player)
+
+    def apply_event(self, event):
+        """
+        Make the change a logged event describes, e.g. to replay a game from its log. Nothing
+        is logged or journaled.
+
+        Shuffle events don't record the new order, so they are not replayed and moved cards are
+        taken out by name instead of from a position. Every location ends up with the right
+        cards. Their order is right too except for cards that were shuffled in place and not
+        moved since, e.g. the rest of the draw pile after the first shuffle of the game.
+        """
+        if self._unresolved_views:
+            self._resolve_views()
+        event_class = type(event)
+        if event_class is CardMoveEvent:
+            cards = event.cards
+            if not cards:
+                return
+            self.get_location(event.from_location).extract(cards)
+            self.get_location(event.to_location).add(cards, event.to_position)
+            if event.from_location.player != event.to_location.player:
+                self._change_owner(cards, event.from_location.player, event.to_location.player)
+        elif event_class is CounterEvent:
+            if event.type == CounterEventType.SET:
+                self._counters[event.counter_id] = event.value
+            else:
+                self._counters[event.counter_id] += event.value
 
     # ToDo(JM): Decide if we really want the game state to have knowledge of the agents.
     # This was a quick hack so that when a card needs to get an agent's decision on something
@@ -180,6 +515,41 @@ class GameState:
         """
         return self._counters[counter_id]
 
+    def get_num_empty_supply_piles(self):
+        """
+        Return the number of supply piles that have run out. This is kept up to date as cards
+        leave the supply so it is O(1).
+        """
+        return self.get_location(Location(None, LocationName.SUPPLY)).num_empty_piles()
+
+    def get_deck_size(self, player):
+        """
+        Returns the number of cards in the player's deck. This is kept up to date as cards
+        move so it is O(1). Cards added to a location's stack directly, without going through
+        game state, are not counted.
+        """
+        return self._decks[player].size()
+
+    def get_deck_distribution(self, player):
+        """
+        Returns a `CardDistribution` of the cards in the player's deck. See `get_deck_size`.
+        """
+        return self._decks[player].deepcopy()
+
+    def get_victory_points(self, player):
+        """
+        Returns the player's current victory points. Static victory points are kept up to date
+        as cards move, only cards whose victory points depend on game state (e.g. Gardens) are
+        evaluated, once per card rather than once per copy.
+        """
+        victory_points = self._static_victory_points[player]
+        deck = self._decks[player]
+        for card in self._variable_victory_point_cards[player]:
+            count = deck.count(card)
+            if count:
+                victory_points += count * card.victory_points(player, self)
+        return victory_points
+
     def get_deck(self, player):
         """
         Returns a list of Cards in the players deck. "Deck" refers to all cards belonging
@@ -227,38 +597,62 @@ class GameState:
         """
         if bool(cards) == bool(number):
             raise ImpossibleMoveEvent('Either cards or number must be specified, but not both.')
-        if number:
-            from_stack = self.get_location(from_location)
-            to_stack = self.get_location(to_location)
-            cards = from_stack.draw(number, from_position)
-            to_stack.add(cards, to_position)
-            # To do handle privacy here, not all player should see what was moved.
-            self.logger.log(
-                CardMoveEvent(
-                    cards, from_location, from_position, to_location, to_position, event_type
-                )
-            )
-            return
+        if self._unresolved_views:
+            self._resolve_views()
         from_stack = self.get_location(from_location)
-        cards = from_stack.extract(cards)
         to_stack = self.get_location(to_location)
+        removed_keys = None
+        if self._journal is not None and not isinstance(from_stack, UnorderedCardStack):
+            # Remember where the cards were so rolling back puts them back in place
+            removed_keys = []
+        if number:
+            cards = from_stack.draw(number, from_position, removed_keys)
+        elif removed_keys is None:
+            cards = from_stack.extract(cards)
+        else:
+            cards = from_stack.extract(cards, removed_keys)
         to_stack.add(cards, to_position)
-        self.logger.log(
-            CardMoveEvent(
+        if from_location.player != to_location.player:
+            self._change_owner(cards, from_location.player, to_location.player)
+        if self._log_card_moves or self._journal is not None:
+            event = CardMoveEvent(
                 cards, from_location, from_position, to_location, to_position, event_type
             )
-        )
-        return
+            if self._journal is not None:
+                self._journal.append(JournalEntry(event, removed_keys))
+            # To do handle privacy here, not all player should see what was moved.
+            if self._log_card_moves:
+                self.logger.log(event)
+
+    def _change_owner(self, cards, from_player, to_player):
+        if from_player is not None:
+            self._remove_from_deck(from_player, cards)
+        if to_player is not None:
+            self._add_to_deck(to_player, cards)
 
     def update_counter(self, counter_id, delta):
+        if self._unresolved_views:
+            self._resolve_views()
         self._counters[counter_id] += delta
-        event = CounterEvent(counter_id, CounterEventType.UPDATE, delta)
-        self.logger.log(event)
+        if self._log_counters or self._journal is not None:
+            event = CounterEvent(counter_id, CounterEventType.UPDATE, delta)
+            if self._journal is not None:
+                self._journal.append(JournalEntry(event, None))
+            if self._log_counters:
+                self.logger.log(event)
 
     def set_counter(self, counter_id, value):
+        if self._unresolved_views:
+            self._resolve_views()
+        previous_value = self._counters[counter_id]
         self._counters[counter_id] = value
-        event = CounterEvent(counter_id, CounterEventType.SET, value)
-        
+        if self._log_counters or self._journal is not None:
+            event = CounterEvent(counter_id, CounterEventType.SET, value)
+            if self._journal is not None:
+                self._journal.append(JournalEntry(event, previous_value))
+            if self._log_counters:
+                self.logger.log(event)
+
     def reveal(self, location, position=None, number=None):
         """
         Reveal a card or cards to all players.
@@ -273,6 +667,8 @@ class GameState:
         card_stack = self.get_location(location)
         if number and location.type == LocationName.DRAW_PILE:
             self.shuffle_discard_in_if_insufficient_cards(number)
+        if not self._log_card_knowledge:
+            return
         if position and number:
             cards = card_stack.peek_from_position(position, number)
 
@@ -296,10 +692,16 @@ class GameState:
         """
         Shuffle the cards at the location.
         """
+        if self._unresolved_views:
+            self._resolve_views()
         stack = self.get_location(location)
-        stack.shuffle()
-        event = ShuffleEvent(location)
-        self.logger.log(event)
+        if self._journal is not None:
+            order = None if isinstance(stack, UnorderedCardStack) else stack.get_order()
+            self._journal.append(JournalEntry(ShuffleEvent(location), order))
+        stack.shuffle(self.rng)
+        if self._log_shuffles:
+            event = ShuffleEvent(location)
+            self.logger.log(event)
 
     def shuffle_discard_in_if_insufficient_cards(self, number, player=None):
         """
@@ -462,25 +864,84 @@ class ViewableGameState:
     because it does not contain the complete state, only the state viewable by a specific
     player.
     """
-    def __init__(self, location_infos, counters, active_player, viewing_player):
+    def __init__(
+            self, location_infos, counters, active_player, viewing_player, game_state=None,
+            deck_distributions=None, player_names=None):
+        """
+        Parameters:
+            location_infos (list of `LocationInfo`): What the player knows about each location.
+            counters (dict): `CounterId` -> int for all game state counters.
+            active_player (str): The name of the player whose turn it is.
+            viewing_player (str): The name of the player the state is viewable by.
+            game_state (optional, `GameState`): If set, location_infos, counters and
+                deck_distributions should be None. They are read from the game state the first
+                time they are needed.
+            deck_distributions (optional, dict): Player name -> `CardDistribution` of all the
+                cards the player owns.
+            player_names (optional, list of str): Names of the players in the order of turns.
+        """
+        self._game_state = game_state
+        if game_state is None:
+            self._set_known_state(location_infos, counters, deck_distributions)
+        # The name of the player whose turn it is. Not necessarily the player currently making
+        # a decision.
+        self.active_player = active_player
+        self.viewing_player = viewing_player
+        self.player_names = player_names
+
+    def __getstate__(self):
+        # A view is pickled with what it knows, never with the game state it reads from.
+        self.resolve()
+        return self.__dict__
+
+    def _set_known_state(self, location_infos, counters, deck_distributions=None):
         self._location_infos = location_infos
         info_by_location = {}
         for info in location_infos:
             info_by_location[info.location] = info
         self._info_by_location = info_by_location
-        self.counters = counters
-        # The name of the player whose turn it is. Not necessarily the player currently making
-        # a decision.
-        self.active_player = active_player
-        self.viewing_player = viewing_player
+        self._counters = counters
+        self._deck_distributions = deck_distributions or {}
+
+    def resolve(self):
+        """
+        Read the known state from the game state if that has not happened yet.
+        """
+        game_state = self._game_state
+        if game_state is None:
+            return
+        self._game_state = None
+        location_infos, counters, decks = game_state._location_infos_known_to(
+            self.viewing_player, self.active_player
+        )
+        self._set_known_state(location_infos, counters, decks)
+
+    @property
+    def counters(self):
+        self.resolve()
+        return self._counters
 
     def iter_location_info(self):
+        self.resolve()
         for info in self._location_infos:
             yield info
 
     def get_location_info(self, location):
+        self.resolve()
         return self._info_by_location.get(location, None)
 
     def get_supply_distribution(self):
+        game_state = self._game_state
+        if game_state is not None:
+            # The supply is public, it can be copied without reading the rest of the state.
+            supply = game_state.get_location(Location(None, LocationName.SUPPLY))
+            return supply.distribution.deepcopy()
         info = self.get_location_info(Location(None, LocationName.SUPPLY))
         return info.stack.distribution
+
+    def get_deck_distribution(self, player):
+        """
+        Returns a `CardDistribution` of all the cards the player owns, or None if unknown.
+        """
+        self.resolve()
+        return self._deck_distributions.get(player)
@@ -0,0 +1,277 @@
+"""
+Lockstep simulation of many games at once between strategies that only buy treasure and
+victory cards. Such a game comes down to drawing five cards, adding up their treasure and
+buying by threshold, so the state of every game is kept in count arrays and each turn is
+played for all of the games together.
+
+Requires NumPy, which is not needed by the rest of the project.
+"""
+from collections import namedtuple
+import time
+
+import numpy as np
+
+from base_set.cards import CopperCard
+from base_set.cards import DuchyCard
+from base_set.cards import EstateCard
+from base_set.cards import GoldCard
+from base_set.cards import ProvinceCard
+from base_set.cards import SilverCard
+from core.card import Card
+from core.card import CardType
+from core.game_controller import MAX_TURNS
+from core.game_controller import NUM_CARDS_IN_HAND
+from core.game_controller import NUM_COPPERS_IN_STARTING_HAND
+from core.game_controller import NUM_EMPTY_PILES_FOR_GAME_END
+from core.game_controller import NUM_ESTATES_IN_STARTING_HAND
+from core.game_controller import STARTING_COPPER_SUPPLY
+from core.game_controller import STARTING_GOLD_SUPPLY
+from core.game_controller import STARTING_SILVER_SUPPLY
+from core.game_controller import STARTING_VICTORY_CARD_SUPPLY_BY_PLAYER_COUNT
+from core.simulation import BatchSummary
+
+
+BuyRule = namedtuple('BuyRule', ['card', 'min_coins', 'max_provinces_left'])
+BuyRule.__new__.__defaults__ = (None, None)
+BuyRule.__doc__ = """
+A row of a buy table. Each turn a player buys the card of the first row in their table whose
+conditions hold and whose supply pile is not empty, or nothing if no row applies.
+
+Parameters:
+    card (`Card`): Card to buy. One of `LOCKSTEP_CARDS`.
+    min_coins (optional, int): Buy the card with at least this many coins. Defaults to the
+        card's cost.
+    max_provinces_left (optional, int): Only buy the card once this many Provinces or fewer are
+        left in the supply, e.g. to start buying Duchies late in the game.
+"""
+
+# Buys the same cards as `DumbMoneyAgent`.
+DUMB_MONEY_BUY_TABLE = [
+    BuyRule(ProvinceCard),
+    BuyRule(GoldCard),
+    BuyRule(SilverCard),
+]
+
+# The supply piles of a lockstep game. The kingdom cards are left out since they are never
+# bought.
+LOCKSTEP_CARDS = [CopperCard, SilverCard, GoldCard, EstateCard, DuchyCard, ProvinceCard]
+
+
+def _check_card(card):
+    if card not in LOCKSTEP_CARDS:
+        raise ValueError('%s is not one of the lockstep cards.' % card)
+    if CardType.ACTION in card.types:
+        raise ValueError('%s is an action card.' % card)
+    if (
+        card.cost.__func__ is not Card.cost.__func__ or
+        card.victory_points.__func__ is not Card.victory_points.__func__
+    ):
+        raise ValueError('%s does not have a fixed cost and victory points.' % card)
+
+
+class LockstepSimulator:
+    """
+    Plays batches of games between buy tables in lockstep. Every game in a batch has the same
+    turn number and current player, games that are over just stop changing.
+
+    Each player's draw pile, hand and discard pile are arrays of card counts. Drawing from a
+    shuffled draw pile is the same as sampling the counts without replacement, so draws are
+    multivariate hypergeometric samples and no order is ever stored. When the draw pile runs
+    out the rest of the cards are drawn from the discard pile, which matches shuffling the
+    discard pile under the draw pile like `GameState` does.
+    """
+    def __init__(self, buy_tables, player_names, seed=None):
+        """
+        Parameters:
+            buy_tables (list of list of `BuyRule`): Buy table for each player in the order of
+                turns.
+            player_names (list of str): Name for each player, in the same order.
+            seed (optional, int): Seed for the random number generator.
+        """
+        if len(buy_tables) != len(player_names):
+            raise ValueError('Need one buy table per player.')
+        self.player_names = player_names
+        self.num_players = len(player_names)
+        self._rng = np.random.default_rng(seed)
+        self._card_ids = {card: card_id for card_id, card in enumerate(LOCKSTEP_CARDS)}
+        self._buy_tables = [self._compile(table) for table in buy_tables]
+        self._treasure_values = np.array(
+            [getattr(card, 'base_treasure_value', 0) for card in LOCKSTEP_CARDS]
+        )
+        self._victory_points = np.array([card.vp for card in LOCKSTEP_CARDS])
+        victory_supply = STARTING_VICTORY_CARD_SUPPLY_BY_PLAYER_COUNT[self.num_players]
+        starting_supply = {
+            CopperCard: STARTING_COPPER_SUPPLY,
+            SilverCard: STARTING_SILVER_SUPPLY,
+            GoldCard: STARTING_GOLD_SUPPLY,
+            EstateCard: victory_supply,
+            DuchyCard: victory_supply,
+            ProvinceCard: victory_supply,
+        }
+        self._starting_supply = np.array([starting_supply[card] for card in LOCKSTEP_CARDS])
+        self._starting_deck = np.zeros(len(LOCKSTEP_CARDS), dtype=np.int64)
+        self._starting_deck[self._card_ids[CopperCard]] = NUM_COPPERS_IN_STARTING_HAND
+        self._starting_deck[self._card_ids[EstateCard]] = NUM_ESTATES_IN_STARTING_HAND
+
+    def _compile(self, table):
+        """
+        Returns the table as a list of (card id, min coins, max provinces left) with the
+        defaults filled in.
+        """
+        rows = []
+        for rule in table:
+            _check_card(rule.card)
+            min_coins = rule.card.base_cost if rule.min_coins is None else rule.min_coins
+            rows.append((self._card_ids[rule.card], min_coins, rule.max_provinces_left))
+        return rows
+
+    def _sample(self, counts, number):
+        """
+        Returns counts of `number` cards drawn without replacement from each row of `counts`,
+        or every card in the row if there are fewer.
+        """
+        drawn = np.zeros_like(counts)
+        remaining = counts.sum(axis=1)
+        left_to_draw = np.minimum(number, remaining)
+        for card_id in range(counts.shape[1] - 1):
+            good = counts[:, card_id]
+            remaining = remaining - good
+            taken = self._rng.hypergeometric(good, remaining, left_to_draw)
+            drawn[:, card_id] = taken
+            left_to_draw = left_to_draw - taken
+        drawn[:, -1] = left_to_draw
+        return drawn
+
+    def _draw_hands(self, games, player, draw_piles, discards, hands):
+        """
+        Draw a new hand for the player in each of the games.
+        """
+        draw_pile = draw_piles[games, player]
+        discard = discards[games, player]
+        sizes = draw_pile.sum(axis=1)
+        short = sizes < NUM_CARDS_IN_HAND
+        # The whole draw pile is drawn then the rest comes from the shuffled discard pile.
+        source = np.where(short[:, None], discard, draw_pile)
+        number = np.where(short, NUM_CARDS_IN_HAND - sizes, NUM_CARDS_IN_HAND)
+        drawn = self._sample(source, number)
+        hands[games, player] = drawn + np.where(short[:, None], draw_pile, 0)
+        draw_piles[games, player] = source - drawn
+        discards[games, player] = np.where(short[:, None], 0, discard)
+
+    def _buy(self, games, player, table, coins, supply, discards):
+        choices = np.full(len(games), -1)
+        provinces_left = supply[games, self._card_ids[ProvinceCard]]
+        for card_id, min_coins, max_provinces_left in table:
+            can_buy = (choices < 0) & (coins >= min_coins) & (supply[games, card_id] > 0)
+            if max_provinces_left is not None:
+                can_buy &= provinces_left <= max_provinces_left
+            choices[can_buy] = card_id
+        bought = choices >= 0
+        buyers = games[bought]
+        cards = choices[bought]
+        supply[buyers, cards] -= 1
+        discards[buyers, player, cards] += 1
+
+    def play(self, num_games, reverse_seats=False):
+        """
+        Play a batch of games. Returns a (num_games, num_players) bool array that is True for
+        the winners of each game and an array of the number of player turns played in each game.
+
+        Parameters:
+            num_games (int): Number of games to play.
+            reverse_seats (optional, bool): Reverse the turn order of the players. The columns
+                of the winners are in the reversed order too.
+        """
+        buy_tables = self._buy_tables[::-1] if reverse_seats else self._buy_tables
+        num_players = self.num_players
+        num_cards = len(LOCKSTEP_CARDS)
+        supply = np.tile(self._starting_supply, (num_games, 1))
+        draw_piles = np.tile(self._starting_deck, (num_games, num_players, 1))
+        discards = np.zeros((num_games, num_players, num_cards), dtype=np.int64)
+        hands = np.zeros((num_games, num_players, num_cards), dtype=np.int64)
+        all_games = np.arange(num_games)
+        for player in range(num_players):
+            self._draw_hands(all_games, player, draw_piles, discards, hands)
+
+        province_id = self._card_ids[ProvinceCard]
+        active = np.ones(num_games, dtype=bool)
+        turns = np.zeros(num_games, dtype=np.int64)
+        # Index of the player whose turn would be next when each game ended.
+        next_players = np.zeros(num_games, dtype=np.int64)
+        turn_number = 1
+        player = 0
+        while True:
+            game_over = (
+                (supply[:, province_id] == 0) |
+                ((supply == 0).sum(axis=1) >= NUM_EMPTY_PILES_FOR_GAME_END)
+            )
+            ended = active & game_over
+            turns[ended] = turn_number - 1
+            next_players[ended] = player
+            active &= ~game_over
+            games = np.nonzero(active)[0]
+            if not len(games):
+                break
+
+            hand = hands[games, player]
+            coins = hand @ self._treasure_values
+            self._buy(games, player, buy_tables[player], coins, supply, discards)
+            discards[games, player] += hand
+            hands[games, player] = 0
+            self._draw_hands(games, player, draw_piles, discards, hands)
+
+            player = (player + 1) % num_players
+            turn_number += 1
+            # Safety to avoid strategies that never end the game.
+            if turn_number > MAX_TURNS:
+                turns[active] = turn_number - 1
+                next_players[active] = player
+                break
+
+        decks = draw_piles + discards + hands
+        scores = decks @ self._victory_points
+        return self._winners(scores, next_players), turns
+
+    def _winners(self, scores, next_players):
+        """
+        Same rules as `GameController.get_winner_indices` with the first player starting:
+        players that had one turn fewer win ties.
+        """
+        is_top = scores == scores.max(axis=1)[:, None]
+        seats = np.arange(self.num_players)[None, :]
+        had_fewer_turns = (seats >= next_players[:, None]) & (next_players[:, None] != 0)
+        top_with_fewer_turns = is_top & had_fewer_turns
+        return np.where(
+            top_with_fewer_turns.any(axis=1)[:, None], top_with_fewer_turns, is_top
+        )
+
+    def _add_results(self, summary, player_names, winners, turns):
+        num_winners = winners.sum(axis=1)
+        for seat, name in enumerate(player_names):
+            summary.wins[name] += int((winners[:, seat] & (num_winners == 1)).sum())
+        summary.ties += int((num_winners > 1).sum())
+        summary.num_games += len(turns)
+        summary.total_turns += int(turns.sum())
+
+    def run(self, num_games, swap_seats=True):
+        """
+        Play `num_games` games and return a `BatchSummary` of the results.
+
+        Parameters:
+            num_games (int): Number of games to play.
+            swap_seats (optional, bool): Play half of the games with the turn order reversed.
+                Defaults to True.
+        """
+        summary = BatchSummary(self.player_names)
+        start = time.time()
+        if swap_seats:
+            num_swapped = num_games // 2
+            winners, turns = self.play(num_games - num_swapped)
+            self._add_results(summary, self.player_names, winners, turns)
+            winners, turns = self.play(num_swapped, reverse_seats=True)
+            self._add_results(summary, self.player_names[::-1], winners, turns)
+        else:
+            winners, turns = self.play(num_games)
+            self._add_results(summary, self.player_names, winners, turns)
+        summary.elapsed_seconds = time.time() - start
+        return summary
@@ -1,7 +1,29 @@
+from core.events import EVENT_CLASSES
+
+
 class GameLogger:
+	# The classes from `events.EVENT_CLASSES` this logger consumes. Game state will not
+	# construct or log events of any other class, so leaving out an event class makes
+	# emitting it free.
+	event_classes = EVENT_CLASSES
+
 	def log(self, event):
 		"""
 		Parameters:
 			event (One of `events.EVENT_CLASSES`): An event that changed the game state.
 		"""
 		raise NotImplementedError()
+
+	def flush(self):
+		"""
+		Finish handling every event logged so far. Loggers that hold on to events before
+		handling them override this.
+		"""
+		pass
+
+	def close(self):
+		"""
+		Flush and release anything the logger holds, e.g. an open file. Call once the game
+		is over.
+		"""
+		self.flush()
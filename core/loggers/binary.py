@@ -0,0 +1,332 @@
+"""
+A compact binary format for event logs and a reader that scans it without building event
+objects.
+
+A log file is an 8 byte magic header, a run of fixed size records and a JSON footer with the
+tables that map ids back to player names and cards, followed by the footer's offset and the
+magic again. Each record holds one card of an event, so an event with several cards is written
+as several records with `FLAG_CONTINUES` set on all but the last. Every field of a record is an
+unsigned byte except the card id, an unsigned short, and the value, a signed int:
+
+    kind         One of the `KIND_` constants.
+    type         Value of the event's type enum, e.g. `CardEventType`.
+    flags        `FLAG_CONTINUES` if the next record has another card of the same event.
+    from_player  Player id of the from location. Player of the counter for counter events.
+    from_name    `LocationName` value of the from location. `CounterName` for counter events.
+    from_pos     `StackPosition` value of the from position.
+    to_player    Player id of the to location.
+    to_name      `LocationName` value of the to location.
+    to_pos       `StackPosition` value of the to position.
+    card         Card id, `NO_CARD` for events without cards.
+    value        Counter value for counter events. For knowledge events a bit mask of the
+                 players that saw the cards, bit i for player id i.
+
+Fields an event doesn't have are `NONE`.
+"""
+import json
+import mmap
+import os
+import struct
+
+from core.card_stack import StackPosition
+from core.counters import CounterId
+from core.counters import CounterName
+from core.events import CardEventType
+from core.events import CardKnowledgeEvent
+from core.events import CardKnowledgeEventType
+from core.events import CardMoveEvent
+from core.events import CounterEvent
+from core.events import CounterEventType
+from core.events import ShuffleEvent
+from core.locations import Location
+from core.locations import LocationName
+from core.loggers.base import GameLogger
+
+
+MAGIC = b'DOMLOG1\0'
+RECORD = struct.Struct('<BBBBBBBBBxHi')
+FOOTER_OFFSET = struct.Struct('<Q')
+TRAILER_SIZE = FOOTER_OFFSET.size + len(MAGIC)
+
+KIND_MOVE = 0
+KIND_KNOWLEDGE = 1
+KIND_SHUFFLE = 2
+KIND_COUNTER = 3
+
+FLAG_CONTINUES = 1
+
+NONE = 0xFF
+NO_CARD = 0xFFFF
+# Knowledge events keep their players in the bits of a signed int.
+MAX_PLAYERS = 31
+
+# Records are written to the file once this many are buffered.
+DEFAULT_BUFFER_RECORDS = 4096
+
+
+def _card_path(card):
+    return '%s.%s' % (card.__module__, card.__qualname__)
+
+
+def _card_from_path(path):
+    parts = path.split('.')
+    module = __import__('.'.join(parts[:-1]), fromlist=[parts[-1]])
+    return getattr(module, parts[-1])
+
+
+def _enum_value(member):
+    return NONE if member is None else member.value
+
+
+class BinaryLogger(GameLogger):
+    """
+    Logger that writes every event to a file in the binary format. Call `close` once the game
+    is over to write the footer, a log without one can't be read.
+    """
+    def __init__(self, path, player_names, metadata=None, buffer_records=DEFAULT_BUFFER_RECORDS):
+        """
+        Parameters:
+            path (str): Path of the file to write.
+            player_names (list of str): Names of the players, their ids are their indices.
+            metadata (optional, dict): Anything JSON serializable to keep with the log, e.g.
+                the seed of the game.
+            buffer_records (optional, int): Number of records to buffer before writing.
+        """
+        if len(player_names) > MAX_PLAYERS:
+            raise ValueError('Too many players for the binary format.')
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self.player_names = player_names
+        self.metadata = metadata or {}
+        self._player_ids = {name: player_id for player_id, name in enumerate(player_names)}
+        self._card_ids = {}
+        self._cards = []
+        self._buffer = bytearray()
+        self._buffer_bytes = buffer_records * RECORD.size
+        self.num_records = 0
+
+    def _card_id(self, card):
+        card_id = self._card_ids.get(card)
+        if card_id is None:
+            card_id = len(self._cards)
+            if card_id >= NO_CARD:
+                raise ValueError('Too many distinct cards for the binary format.')
+            self._card_ids[card] = card_id
+            self._cards.append(card)
+        return card_id
+
+    def _player_id(self, player):
+        return NONE if player is None else self._player_ids[player]
+
+    def _location_fields(self, location):
+        if location is None:
+            return NONE, NONE
+        return self._player_id(location.player), location.name.value
+
+    def _write(self, kind, event_type, from_player, from_name, from_pos, to_player, to_name,
+            to_pos, cards, value):
+        pack = RECORD.pack
+        buffer = self._buffer
+        if not cards:
+            buffer += pack(
+                kind, event_type, 0, from_player, from_name, from_pos, to_player, to_name,
+                to_pos, NO_CARD, value
+            )
+            self.num_records += 1
+        else:
+            last = len(cards) - 1
+            for index, card in enumerate(cards):
+                buffer += pack(
+                    kind, event_type, FLAG_CONTINUES if index < last else 0, from_player,
+                    from_name, from_pos, to_player, to_name, to_pos, self._card_id(card), value
+                )
+            self.num_records += len(cards)
+        if len(buffer) >= self._buffer_bytes:
+            self.flush()
+
+    def log(self, event):
+        if isinstance(event, CardMoveEvent):
+            from_player, from_name = self._location_fields(event.from_location)
+            to_player, to_name = self._location_fields(event.to_location)
+            self._write(
+                KIND_MOVE, event.type.value, from_player, from_name,
+                _enum_value(event.from_position), to_player, to_name,
+                _enum_value(event.to_position), event.cards, 0
+            )
+        elif isinstance(event, CounterEvent):
+            self._write(
+                KIND_COUNTER, event.type.value, self._player_id(event.counter_id.player),
+                event.counter_id.name.value, NONE, NONE, NONE, NONE, None, event.value
+            )
+        elif isinstance(event, ShuffleEvent):
+            player, name = self._location_fields(event.location)
+            self._write(
+                KIND_SHUFFLE, NONE, player, name, NONE, NONE, NONE, NONE, None, 0
+            )
+        elif isinstance(event, CardKnowledgeEvent):
+            player, name = self._location_fields(event.from_location)
+            mask = 0
+            for viewer in event.players:
+                mask |= 1 << self._player_ids[viewer]
+            self._write(
+                KIND_KNOWLEDGE, event.type.value, player, name,
+                _enum_value(event.from_position), NONE, NONE, NONE, event.cards, mask
+            )
+
+    def flush(self):
+        """
+        Write the buffered records to the file.
+        """
+        self._file.write(self._buffer)
+        self._buffer = bytearray()
+        self._file.flush()
+
+    def close(self):
+        """
+        Write the buffered records and the footer and close the file.
+        """
+        if self._file.closed:
+            return
+        self._file.write(self._buffer)
+        self._buffer = bytearray()
+        footer_offset = self._file.tell()
+        footer = {
+            'num_records': self.num_records,
+            'player_names': self.player_names,
+            'cards': [_card_path(card) for card in self._cards],
+            'metadata': self.metadata,
+        }
+        self._file.write(json.dumps(footer).encode('utf-8'))
+        self._file.write(FOOTER_OFFSET.pack(footer_offset))
+        self._file.write(MAGIC)
+        self._file.close()
+
+
+class BinaryLogReader:
+    """
+    Reads a log written by `BinaryLogger`. The file is memory mapped, so opening a log only
+    reads its footer and records are only read as they are iterated.
+    """
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._mmap = None
+        self._records = None
+        try:
+            # An empty file can't be memory mapped, so check the size first.
+            if os.fstat(self._file.fileno()).st_size < len(MAGIC) + TRAILER_SIZE:
+                raise ValueError('%s is not a complete binary event log.' % path)
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            size = len(self._mmap)
+            if (
+                self._mmap[:len(MAGIC)] != MAGIC or
+                self._mmap[size - len(MAGIC):] != MAGIC
+            ):
+                raise ValueError('%s is not a complete binary event log.' % path)
+            footer_offset, = FOOTER_OFFSET.unpack_from(self._mmap, size - TRAILER_SIZE)
+            footer = json.loads(
+                self._mmap[footer_offset:size - TRAILER_SIZE].decode('utf-8')
+            )
+        except Exception:
+            self.close()
+            raise
+        self.num_records = footer['num_records']
+        self.player_names = footer['player_names']
+        self.card_paths = footer['cards']
+        self.metadata = footer['metadata']
+        self._records = memoryview(self._mmap)[len(MAGIC):footer_offset]
+        self._cards = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.num_records
+
+    def close(self):
+        """
+        Close the file. Iterators over the records that haven't finished keep the file's memory
+        mapped, and it is unmapped once they are garbage collected.
+        """
+        self._file.close()
+        if self._mmap is None:
+            return
+        try:
+            if self._records is not None:
+                self._records.release()
+            self._mmap.close()
+        except BufferError:
+            # An iterator still reads from the mapping. Leave it to be closed with the
+            # iterator rather than pull the memory out from under it.
+            pass
+        self._records = None
+        self._mmap = None
+
+    @property
+    def cards(self):
+        """
+        List of the card classes by id. Importing them is left until they are needed.
+        """
+        if self._cards is None:
+            self._cards = [_card_from_path(path) for path in self.card_paths]
+        return self._cards
+
+    def iter_records(self):
+        """
+        Yields every record as a tuple of its fields, see the module docstring.
+        """
+        return RECORD.iter_unpack(self._records)
+
+    def _location(self, player, name):
+        if name == NONE:
+            return None
+        return Location(
+            None if player == NONE else self.player_names[player], LocationName(name)
+        )
+
+    def _event(self, record, cards):
+        (kind, event_type, flags, from_player, from_name, from_pos, to_player, to_name,
+            to_pos, card, value) = record
+        if kind == KIND_MOVE:
+            return CardMoveEvent(
+                cards,
+                self._location(from_player, from_name),
+                None if from_pos == NONE else StackPosition(from_pos),
+                self._location(to_player, to_name),
+                None if to_pos == NONE else StackPosition(to_pos),
+                CardEventType(event_type),
+            )
+        if kind == KIND_COUNTER:
+            player = None if from_player == NONE else self.player_names[from_player]
+            return CounterEvent(
+                CounterId(player, CounterName(from_name)), CounterEventType(event_type), value
+            )
+        if kind == KIND_SHUFFLE:
+            return ShuffleEvent(self._location(from_player, from_name))
+        players = [
+            name for player_id, name in enumerate(self.player_names) if value & (1 << player_id)
+        ]
+        return CardKnowledgeEvent(
+            players,
+            cards,
+            self._location(from_player, from_name),
+            None if from_pos == NONE else StackPosition(from_pos),
+            CardKnowledgeEventType(event_type),
+        )
+
+    def iter_events(self):
+        """
+        Yields the logged events in order, decoded back into event objects.
+        """
+        card_by_id = self.cards
+        cards = []
+        for record in self.iter_records():
+            card = record[9]
+            if card != NO_CARD:
+                cards.append(card_by_id[card])
+            if record[2] & FLAG_CONTINUES:
+                continue
+            yield self._event(record, cards)
+            cards = []
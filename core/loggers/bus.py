@@ -0,0 +1,169 @@
+import weakref
+
+from core.events import EVENT_CLASSES
+from core.loggers.base import GameLogger
+
+
+class _BatchingSink:
+    """
+    Holds events for a sink and hands them over `batch_size` at a time.
+    """
+    def __init__(self, sink, batch_size):
+        self._sink = sink
+        self._batch_size = batch_size
+        self._events = []
+        log_batch = getattr(sink, 'log_batch', None)
+        if log_batch is None:
+            sink_log = sink.log
+
+            def log_batch(events):
+                for event in events:
+                    sink_log(event)
+        self._log_batch = log_batch
+
+    def log(self, event):
+        events = self._events
+        events.append(event)
+        if len(events) >= self._batch_size:
+            self._events = []
+            self._log_batch(events)
+
+    def flush(self):
+        if self._events:
+            events = self._events
+            self._events = []
+            self._log_batch(events)
+
+
+class EventBus(GameLogger):
+    """
+    Logger that passes every event on to any number of sinks, e.g. a human readable logger,
+    a binary archive and a statistics collector. Each sink only receives the event classes it
+    consumes, and the bus's `event_classes` is the union of them so game state doesn't construct
+    events no sink wants.
+
+    For each event class the bus keeps a tuple of the functions to call, so logging an event is
+    one dict lookup and a direct call per interested sink.
+
+    Sinks can be added and removed at any time. Game states the bus is the logger of are told
+    when its `event_classes` change, so they start or stop constructing events as needed.
+    """
+    def __init__(self, sinks=None):
+        """
+        Parameters:
+            sinks (optional, list of `GameLogger`): Sinks to add with their own event classes
+                and no batching.
+        """
+        # List of (sink, event classes, function to call with each event, batching sink or
+        # None) in the order the sinks were added.
+        self._sinks = []
+        self._handlers_by_class = {}
+        # Weak references to the game states the bus was given to.
+        self._game_states = []
+        for sink in sinks or []:
+            self.add_sink(sink)
+
+    @property
+    def event_classes(self):
+        return tuple(self._handlers_by_class)
+
+    def attach(self, game_state):
+        """
+        Called by `GameState.set_logger`. The game state is updated whenever sinks are added
+        or removed while the bus is its logger.
+        """
+        self._game_states = [
+            game_state_ref for game_state_ref in self._game_states
+            if game_state_ref() is not None
+        ]
+        self._game_states.append(weakref.ref(game_state))
+
+    def add_sink(self, sink, event_classes=None, filter=None, batch_size=None):
+        """
+        Parameters:
+            sink (`GameLogger`): Receives the events. Sinks that don't extend `GameLogger` only
+                need a `log` method.
+            event_classes (optional, tuple): Classes from `events.EVENT_CLASSES` the sink
+                receives. Defaults to the sink's `event_classes`, or every class if it has none.
+            filter (optional, function): Called with each event of those classes, the sink only
+                receives the event if it returns True.
+            batch_size (optional, int): Hand the sink events this many at a time, to its
+                `log_batch` method if it has one and otherwise one by one. Events still held
+                are handed over by `flush`.
+        """
+        if event_classes is None:
+            event_classes = getattr(sink, 'event_classes', EVENT_CLASSES)
+        batching_sink = None
+        handler = sink.log
+        if batch_size is not None:
+            batching_sink = _BatchingSink(sink, batch_size)
+            handler = batching_sink.log
+        if filter is not None:
+            handler = self._filtered(handler, filter)
+        self._sinks.append((sink, tuple(event_classes), handler, batching_sink))
+        self._build_handlers()
+
+    def remove_sink(self, sink):
+        """
+        Stop passing events to the sink. Events it still has batched are handed over first.
+        """
+        for entry in self._sinks:
+            if entry[0] is sink:
+                if entry[3] is not None:
+                    entry[3].flush()
+                self._sinks.remove(entry)
+                break
+        else:
+            raise ValueError('%s is not a sink of the bus.' % sink)
+        self._build_handlers()
+
+    @staticmethod
+    def _filtered(handler, filter):
+        def filtered_handler(event):
+            if filter(event):
+                handler(event)
+        return filtered_handler
+
+    def _build_handlers(self):
+        handlers_by_class = {}
+        for event_class in EVENT_CLASSES:
+            handlers = tuple(
+                handler for sink, event_classes, handler, batching_sink in self._sinks
+                if event_class in event_classes
+            )
+            if handlers:
+                handlers_by_class[event_class] = handlers
+        self._handlers_by_class = handlers_by_class
+        game_states = []
+        for game_state_ref in self._game_states:
+            game_state = game_state_ref()
+            if game_state is not None and game_state.logger is self:
+                game_state.update_event_classes()
+                game_states.append(game_state_ref)
+        self._game_states = game_states
+
+    def log(self, event):
+        for handler in self._handlers_by_class.get(type(event), ()):
+            handler(event)
+
+    def flush(self):
+        """
+        Hand over every batched event and flush every sink.
+        """
+        for sink, event_classes, handler, batching_sink in self._sinks:
+            if batching_sink is not None:
+                batching_sink.flush()
+            flush = getattr(sink, 'flush', None)
+            if flush is not None:
+                flush()
+
+    def close(self):
+        """
+        Hand over every batched event and close every sink.
+        """
+        for sink, event_classes, handler, batching_sink in self._sinks:
+            if batching_sink is not None:
+                batching_sink.flush()
+            close = getattr(sink, 'close', None)
+            if close is not None:
+                close()
@@ -1,7 +1,12 @@
+import queue
+import sys
+import threading
+
 from core.counters import CounterName
 from core.events import CardEventType
 from core.events import CardMoveEvent
 from core.events import CounterEvent
+from core.events import CounterEventType
 from core.events import ShuffleEvent
 from core.loggers.base import GameLogger
 from core.locations import LocationName
@@ -32,6 +37,14 @@ class HumanReadableLogger(GameLogger):
         return s
 
     def _counter_event_to_str(self, event):
+        if event.type == CounterEventType.SET:
+            s = '''
+            {counter} set to {value}.
+            '''.format(
+                counter=CounterName(event.counter_id.name).name,
+                value=event.value,
+            )
+            return s.strip()
         s = '''
         {player}{number} {counter}.
         '''.format(
@@ -52,8 +65,10 @@ class HumanReadableLogger(GameLogger):
         s = s.strip()
         return s
 
-    def log(self, event):
-        self._log.append(event)
+    def format_event(self, event):
+        """
+        Returns the event in plain english.
+        """
         event_str = ''
         if type(event) == CardMoveEvent:
             event_str = self._card_move_event_to_str(event)
@@ -61,6 +76,108 @@ class HumanReadableLogger(GameLogger):
             event_str = self._counter_event_to_str(event)
         elif type(event) == ShuffleEvent:
             event_str = self._shuffle_event_to_str(event)
-        print(event_str)
+        return event_str
+
+    def log(self, event):
+        self._log.append(event)
+        print(self.format_event(event))
+
+
+# Marks the end of the batches in a `BufferedHumanReadableLogger`'s queue.
+_CLOSE = object()
+# Number of events a `BufferedHumanReadableLogger` hands to its writer thread at once.
+DEFAULT_BATCH_SIZE = 256
+# Most batches waiting to be written before `log` waits for the writer.
+DEFAULT_MAX_QUEUED_BATCHES = 64
+
+
+class BufferedHumanReadableLogger(HumanReadableLogger):
+    """
+    Prints the same lines as `HumanReadableLogger`, but `log` only adds the event to a batch.
+    Full batches are queued for a background thread that formats them and writes each batch
+    at once, so a game doesn't wait on output. The queue is bounded, `log` blocks while it is
+    full.
+
+    Call `flush` to wait until everything logged so far is written, e.g. before asking a human
+    for input, and `close` when done. If writing fails, e.g. with `BrokenPipeError` once the
+    reader of a pipe has gone, later batches are dropped and the error is raised again by
+    `log`, `flush` and `close`. Events are kept unformatted until written, so this is only
+    for games that don't change the cards lists of events after logging them, as `GameState`
+    doesn't.
+    """
+    def __init__(self, stream=None, batch_size=DEFAULT_BATCH_SIZE,
+            max_queued_batches=DEFAULT_MAX_QUEUED_BATCHES):
+        """
+        Parameters:
+            stream (optional, file): Where to write. Defaults to `sys.stdout` at the time of
+                each write.
+            batch_size (optional, int): Number of events handed to the writer at once.
+            max_queued_batches (optional, int): Most batches held before `log` blocks.
+        """
+        super(BufferedHumanReadableLogger, self).__init__()
+        self._stream = stream
+        self._batch_size = batch_size
+        self._batch = []
+        self._queue = queue.Queue(max_queued_batches)
+        # The exception that stopped the writer from writing, if any.
+        self._error = None
+        self._thread = threading.Thread(target=self._write_batches, daemon=True)
+        self._thread.start()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def log(self, event):
+        self._raise_error()
+        batch = self._batch
+        batch.append(event)
+        if len(batch) >= self._batch_size:
+            self._queue.put(batch)
+            self._batch = []
+
+    def _write_batches(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is _CLOSE:
+                    return
+                if self._error is None:
+                    text = ''.join([self.format_event(event) + '\n' for event in batch])
+                    stream = self._stream or sys.stdout
+                    stream.write(text)
+                    stream.flush()
+            except Exception as error:
+                # Keep taking batches off the queue so `log` never waits on a full queue.
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """
+        Wait until every event logged so far has been written.
+
+        Raises:
+            Exception: Whatever stopped the writer from writing.
+        """
+        if self._thread.is_alive():
+            if self._batch:
+                self._queue.put(self._batch)
+                self._batch = []
+            self._queue.join()
+        self._raise_error()
 
+    def close(self):
+        """
+        Write every event logged so far and stop the writer thread.
 
+        Raises:
+            Exception: Whatever stopped the writer from writing.
+        """
+        if self._thread.is_alive():
+            if self._batch:
+                self._queue.put(self._batch)
+                self._batch = []
+            self._queue.put(_CLOSE)
+            self._thread.join()
+        self._raise_error()
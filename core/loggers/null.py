@@ -0,0 +1,11 @@
+from core.loggers.base import GameLogger
+
+
+class NullLogger(GameLogger):
+    """
+    Logger that discards every event. Used for headless games where nobody is watching.
+    """
+    event_classes = ()
+
+    def log(self, event):
+        pass
@@ -0,0 +1,451 @@
+"""
+Protocol for playing agents that run in another process, and the client side of it.
+
+Messages are JSON objects sent as frames: a 4 byte big endian length followed by the UTF-8
+encoded JSON. The client sends requests with an integer `id` and the server answers each with a
+response carrying the same `id`, in any order, so requests from many games can be in flight on
+one connection at once. A response with an `error` means the request failed.
+
+Requests:
+    decide  Asks the agent of `session` for a decision. Has the `agent` to create for a new
+            session, the player `name`, an optional `seed` for the agent's random numbers, the
+            `decision` and the `state` known to the player or null. Answered with `choices`, the
+            indices of the chosen options.
+    close   Drops the agent of `session` on the server.
+
+Cards and decision classes are sent as their full dotted paths, e.g.
+'base_set.cards.gold.GoldCard'. Only cards registered in `CARD_INDEX` and subclasses of
+`Decision` that are already defined are accepted, nothing is imported for a message. Locations are [player, `LocationName` value] and counters are
+[player, `CounterName` value, value].
+"""
+import atexit
+import concurrent.futures
+import itertools
+import json
+import os
+import socket
+import struct
+import threading
+
+from core.card_distribution import CARD_INDEX
+from core.card_stack import CardStack
+from core.card_stack import SupplyCardStack
+from core.card_stack import UnorderedCardStack
+from core.counters import CounterId
+from core.counters import CounterName
+from core.decision import Decision
+from core.game_state import LocationInfo
+from core.game_state import ViewableGameState
+from core.locations import Location
+from core.locations import LocationName
+
+
+FRAME_HEADER = struct.Struct('>I')
+# Frames longer than this are refused, a corrupt length shouldn't make us read forever.
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+# Connections each process opens to an agent server.
+DEFAULT_POOL_SIZE = 2
+
+_STACK_CLASSES = {
+    cls.__name__: cls for cls in (CardStack, UnorderedCardStack, SupplyCardStack)
+}
+
+
+class RemoteAgentError(Exception):
+    """
+    Raised when an agent server can't be reached or fails to make a decision.
+    """
+    pass
+
+
+def parse_address(address):
+    """
+    Returns the socket family and address for an agent server address, 'host:port' for TCP or
+    the path of a Unix socket.
+    """
+    host, separator, port = address.rpartition(':')
+    if separator and port.isdigit():
+        return socket.AF_INET, (host or 'localhost', int(port))
+    return socket.AF_UNIX, address
+
+
+def send_message(sock, message):
+    data = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    sock.sendall(FRAME_HEADER.pack(len(data)) + data)
+
+
+def read_message(stream):
+    """
+    Returns the next message from a binary file-like stream, or None if it was closed
+    between messages.
+    """
+    header = stream.read(FRAME_HEADER.size)
+    if not header:
+        return None
+    if len(header) < FRAME_HEADER.size:
+        raise RemoteAgentError('Connection closed in the middle of a message.')
+    length, = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise RemoteAgentError('Message of %d bytes is too long.' % length)
+    data = stream.read(length)
+    if len(data) < length:
+        raise RemoteAgentError('Connection closed in the middle of a message.')
+    return json.loads(data.decode('utf-8'))
+
+
+def class_path(cls):
+    return '%s.%s' % (cls.__module__, cls.__qualname__)
+
+
+_card_by_path = {}
+_decision_class_by_path = {}
+
+
+def _subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        for descendant in _subclasses(subclass):
+            yield descendant
+
+
+def _find_class(path, class_by_path, classes):
+    cls = class_by_path.get(path)
+    if cls is None:
+        # Card sets and decisions may have been defined since the last lookup.
+        class_by_path.update((class_path(known), known) for known in classes())
+        cls = class_by_path.get(path)
+    return cls
+
+
+def card_from_path(path):
+    """
+    Returns the card registered in `CARD_INDEX` with the full dotted path.
+
+    Raises:
+        RemoteAgentError: If no registered card has the path.
+    """
+    card = _find_class(
+        path, _card_by_path,
+        lambda: [
+            card for card in map(CARD_INDEX.get_card, range(len(CARD_INDEX)))
+            if isinstance(card, type)
+        ]
+    )
+    if card is None:
+        raise RemoteAgentError('%s is not a known card.' % path)
+    return card
+
+
+def decision_class_from_path(path):
+    """
+    Returns the subclass of `Decision` with the full dotted path. Only classes that are
+    already defined are found, no module is imported.
+
+    Raises:
+        RemoteAgentError: If no decision class has the path.
+    """
+    cls = _find_class(path, _decision_class_by_path, lambda: _subclasses(Decision))
+    if cls is None:
+        raise RemoteAgentError('%s is not a known decision.' % path)
+    return cls
+
+
+def encode_decision(decision):
+    return {
+        'class': class_path(type(decision)),
+        'options': [class_path(option) for option in decision.options],
+        'min': decision.min,
+        'max': decision.max,
+    }
+
+
+def decode_decision(message):
+    """
+    Returns a decision of the sent class. Decisions are usually built from a game state, so the
+    decision's own `__init__` isn't called.
+    """
+    cls = decision_class_from_path(message['class'])
+    decision = cls.__new__(cls)
+    decision.options = [card_from_path(option) for option in message['options']]
+    decision.min = message['min']
+    decision.max = message['max']
+    return decision
+
+
+def encode_choices(decision, choices):
+    """
+    Returns the indices in the decision's options of the chosen options.
+    """
+    if type(choices) != list:
+        choices = [choices]
+    indices = []
+    for choice in choices:
+        for index, option in enumerate(decision.options):
+            if option == choice and index not in indices:
+                indices.append(index)
+                break
+        else:
+            raise RemoteAgentError('%s is not an option of the decision.' % choice)
+    return indices
+
+
+def decode_choices(decision, indices):
+    return [decision.options[index] for index in indices]
+
+
+def _encode_stack(stack):
+    if stack is None:
+        return None
+    if type(stack) is CardStack:
+        return {'class': 'CardStack', 'cards': [class_path(card) for card in stack]}
+    return {
+        'class': type(stack).__name__,
+        'counts': [
+            [class_path(card), count]
+            for card, count in stack.distribution.cards_to_counts().items() if count
+        ],
+    }
+
+
+def _decode_stack(message):
+    if message is None:
+        return None
+    cls = _STACK_CLASSES.get(message['class'])
+    if cls is None:
+        raise RemoteAgentError('%s is not a known stack.' % message['class'])
+    if 'cards' in message:
+        return cls([card_from_path(card) for card in message['cards']])
+    cards = []
+    for path, count in message['counts']:
+        cards.extend([card_from_path(path)] * count)
+    return cls(cards)
+
+
+def _encode_location(location):
+    return [location.player, location.name.value]
+
+
+def _decode_location(message):
+    return Location(message[0], LocationName(message[1]))
+
+
+def encode_state(known_state):
+    known_state.resolve()
+    decks = {}
+    for player in known_state.player_names or []:
+        deck = known_state.get_deck_distribution(player)
+        if deck is not None:
+            decks[player] = [
+                [class_path(card), count] for card, count in deck.cards_to_counts().items() if count
+            ]
+    return {
+        'active_player': known_state.active_player,
+        'viewing_player': known_state.viewing_player,
+        'player_names': known_state.player_names,
+        'locations': [
+            [
+                _encode_location(info.location),
+                _encode_stack(info.stack),
+                info.size,
+                None if info.top_card is None else class_path(info.top_card),
+            ]
+            for info in known_state.iter_location_info()
+        ],
+        'counters': [
+            [counter_id.player, counter_id.name.value, value]
+            for counter_id, value in known_state.counters.items()
+        ],
+        'decks': decks,
+    }
+
+
+def decode_state(message):
+    location_infos = [
+        LocationInfo(
+            _decode_location(location),
+            _decode_stack(stack),
+            size,
+            None if top_card is None else card_from_path(top_card),
+        )
+        for location, stack, size, top_card in message['locations']
+    ]
+    counters = {
+        CounterId(player, CounterName(name)): value
+        for player, name, value in message['counters']
+    }
+    deck_distributions = {}
+    for player, counts in message['decks'].items():
+        cards = []
+        for path, count in counts:
+            cards.extend([card_from_path(path)] * count)
+        deck_distributions[player] = CardStack.distribution_class(cards)
+    return ViewableGameState(
+        location_infos, counters, message['active_player'], message['viewing_player'],
+        deck_distributions=deck_distributions, player_names=message['player_names']
+    )
+
+
+class AgentConnection:
+    """
+    A connection to an agent server that any number of threads can send requests on at once.
+    A background thread reads the responses and hands each to the request it answers.
+    """
+    def __init__(self, address, connect_timeout=None):
+        """
+        Parameters:
+            address (str): 'host:port' of a TCP server or the path of a Unix socket.
+            connect_timeout (optional, float): Seconds to wait for the connection.
+        """
+        family, socket_address = parse_address(address)
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            self._socket.settimeout(connect_timeout)
+            self._socket.connect(socket_address)
+            self._socket.settimeout(None)
+        except OSError as error:
+            self._socket.close()
+            raise RemoteAgentError('Could not connect to %s: %s' % (address, error))
+        if family == socket.AF_INET:
+            # Requests are small and answered one at a time, don't hold them back.
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._send_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        # Request id -> `concurrent.futures.Future` of its response.
+        self._pending = {}
+        self._ids = itertools.count()
+        self.closed = False
+        self._reader = threading.Thread(target=self._read_responses, daemon=True)
+        self._reader.start()
+
+    def request(self, message):
+        """
+        Send the request and return a `concurrent.futures.Future` of the response. The `id` of
+        the message is set here.
+        """
+        future = concurrent.futures.Future()
+        request_id = next(self._ids)
+        message['id'] = request_id
+        with self._pending_lock:
+            if self.closed:
+                raise RemoteAgentError('The connection to the agent server is closed.')
+            self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                send_message(self._socket, message)
+        except OSError as error:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            raise RemoteAgentError('Could not send to the agent server: %s' % error)
+        return future
+
+    def _read_responses(self):
+        error = 'The agent server closed the connection.'
+        stream = self._socket.makefile('rb')
+        try:
+            while True:
+                message = read_message(stream)
+                if message is None:
+                    break
+                with self._pending_lock:
+                    future = self._pending.pop(message['id'], None)
+                if future is None:
+                    continue
+                if 'error' in message:
+                    future.set_exception(RemoteAgentError(message['error']))
+                else:
+                    future.set_result(message)
+        except (OSError, ValueError, RemoteAgentError) as exception:
+            error = 'Lost the connection to the agent server: %s' % exception
+        finally:
+            stream.close()
+            with self._pending_lock:
+                self.closed = True
+                pending = list(self._pending.values())
+                self._pending = {}
+            for future in pending:
+                future.set_exception(RemoteAgentError(error))
+
+    def close(self):
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+        self._reader.join()
+
+
+class ConnectionPool:
+    """
+    Persistent connections to one agent server, handed out in turn. Broken connections are
+    replaced the next time they would be handed out.
+
+    Agents don't close the pool they use. The pools shared by `get_pool` belong to this module
+    and are closed by `close_pools`, which runs when the process exits. A pool made directly
+    belongs to whoever made it, who closes it once its agents are done.
+    """
+    def __init__(self, address, size=DEFAULT_POOL_SIZE, connect_timeout=None):
+        self.address = address
+        self.size = size
+        self.connect_timeout = connect_timeout
+        self._connections = []
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Returns an open `AgentConnection`.
+        """
+        with self._lock:
+            if len(self._connections) < self.size:
+                connection = AgentConnection(self.address, self.connect_timeout)
+                self._connections.append(connection)
+                return connection
+            index = self._next
+            self._next = (index + 1) % self.size
+            connection = self._connections[index]
+            if connection.closed:
+                connection.close()
+                connection = AgentConnection(self.address, self.connect_timeout)
+                self._connections[index] = connection
+            return connection
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+
+
+# (process id, address) -> `ConnectionPool`. Keyed by process so processes forked by a worker
+# pool open their own connections instead of sharing their parent's sockets.
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(address):
+    """
+    Returns the `ConnectionPool` this process shares for the agent server address. It stays
+    open for the life of the process, see `close_pools`.
+    """
+    key = (os.getpid(), address)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(address)
+        return pool
+
+
+def close_pools():
+    """
+    Close every pool shared by `get_pool` in this process. Called when the process exits, call
+    it earlier to drop the connections sooner. Pools are opened again by the next `get_pool`.
+    """
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [_pools.pop(key) for key in list(_pools) if key[0] == pid]
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_pools)
@@ -0,0 +1,125 @@
+"""
+Rebuilding the state of a logged game at any turn.
+"""
+import bisect
+
+from core.counters import CounterId
+from core.counters import CounterName
+from core.events import CounterEvent
+from core.events import CounterEventType
+from core.game_state import GameState
+from core.loggers.null import NullLogger
+
+
+# Number of turns between checkpoints.
+DEFAULT_CHECKPOINT_TURNS = 10
+
+_ACTIONS = CounterId(None, CounterName.ACTIONS)
+
+
+def is_turn_start(event):
+    """
+    Returns True if the event starts a turn. Only the start of a turn sets the number of actions,
+    cards only ever add to it.
+    """
+    return (
+        type(event) is CounterEvent and
+        event.type == CounterEventType.SET and
+        event.counter_id == _ACTIONS
+    )
+
+
+class Replayer:
+    """
+    Replays the events of a game to rebuild its `GameState` at the start of any turn. A snapshot
+    is kept every `checkpoint_every` turns so getting to a turn only replays the events since the
+    last checkpoint before it.
+
+    The game must have started with the first player, like games run by `GameController`.
+    """
+    def __init__(self, player_names, supply, starting_deck, events,
+            checkpoint_every=DEFAULT_CHECKPOINT_TURNS):
+        """
+        Parameters:
+            player_names (list of str): Names of the players in the order of turns.
+            supply (`SupplyCardStack`): The supply the game started with.
+            starting_deck (list of `Card`): Cards each player started with.
+            events (iterable): Every event logged in the game, in order. A log must include
+                `CardMoveEvent`s and `CounterEvent`s to be replayed.
+            checkpoint_every (optional, int): Number of turns between checkpoints.
+        """
+        self.player_names = player_names
+        self.events = list(events)
+        self.checkpoint_every = checkpoint_every
+        self._game_state = GameState(
+            player_names, supply.deepcopy(), starting_deck, NullLogger()
+        )
+        # Index of the first event of each turn, turn 1 first.
+        self._turn_starts = [
+            index for index, event in enumerate(self.events) if is_turn_start(event)
+        ]
+        # Sorted event indices of the checkpoints, and the snapshot at each one.
+        self._checkpoint_indices = [0]
+        self._checkpoints = [self._game_state.snapshot()]
+        # Index of the next event to apply to the working game state.
+        self._position = 0
+        for turn in range(1 + checkpoint_every, self.num_turns + 1, checkpoint_every):
+            self._advance(self._turn_starts[turn - 1])
+            self._checkpoint_indices.append(self._position)
+            self._checkpoints.append(self._game_state.snapshot())
+
+    @property
+    def num_turns(self):
+        """
+        Number of turns that were started in the game.
+        """
+        return len(self._turn_starts)
+
+    def _advance(self, index):
+        """
+        Apply events to the working game state until `index` is the next one.
+        """
+        game_state = self._game_state
+        turn_starts = self._turn_starts
+        events = self.events
+        for position in range(self._position, index):
+            event = events[position]
+            if is_turn_start(event):
+                turn = bisect.bisect_left(turn_starts, position)
+                game_state._current_player_index = turn % len(self.player_names)
+            game_state.apply_event(event)
+        self._position = index
+
+    def _seek(self, index):
+        """
+        Bring the working game state to just before the event at `index`, from the last
+        checkpoint before it or from where it is now if that is closer.
+        """
+        checkpoint = bisect.bisect_right(self._checkpoint_indices, index) - 1
+        checkpoint_index = self._checkpoint_indices[checkpoint]
+        if not checkpoint_index <= self._position <= index:
+            self._game_state.restore(self._checkpoints[checkpoint])
+            self._position = checkpoint_index
+        self._advance(index)
+
+    def state_at_event(self, index):
+        """
+        Returns a new `GameState` as it was just before the event at `index` happened. Use
+        `len(events)` for the state at the end of the game. The state has no agents.
+        """
+        if not 0 <= index <= len(self.events):
+            raise IndexError('No event %d in a log of %d events.' % (index, len(self.events)))
+        self._seek(index)
+        return self._game_state.fork()
+
+    def state_at_turn(self, turn):
+        """
+        Returns a new `GameState` as it was when the turn started, the state
+        `GameController.play_turn` would play the turn from. Turns are numbered from 1. The
+        state has no agents.
+        """
+        if not 1 <= turn <= self.num_turns:
+            raise IndexError('No turn %d in a game of %d turns.' % (turn, self.num_turns))
+        game_state = self.state_at_event(self._turn_starts[turn - 1])
+        game_state._current_player_index = (turn - 1) % len(self.player_names)
+        return game_state
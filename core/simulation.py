@@ -0,0 +1,188 @@
+"""
+Headless batch simulation. Plays many games between two agents without printing any events
+and summarizes the results. Games can be spread over a pool of worker processes.
+"""
+from collections import namedtuple
+import multiprocessing
+import random
+import time
+
+from base_set.cards import KINGDOM_CARDS
+from core.game_controller import GameController
+from core.loggers.null import NullLogger
+from core.timing import GameTimer
+
+
+GameResult = namedtuple('GameResult', ['winners', 'turns', 'timer'])
+GameResult.__new__.__defaults__ = (None,)
+GameResult.__doc__ = """
+The outcome of a single headless game.
+
+Parameters:
+    winners (list of str): Names of the winning players. More than one means a tie.
+    turns (int): Number of player turns played in the game. A round, in which every player
+        takes a turn, counts once for each player.
+    timer (optional, `GameTimer`): Timings of the game, if it was timed.
+"""
+
+
+class BatchSummary:
+    """
+    Aggregate results of a batch of games between the same players.
+    """
+    def __init__(self, player_names):
+        self.player_names = player_names
+        self.wins = {name: 0 for name in player_names}
+        self.ties = 0
+        self.num_games = 0
+        self.total_turns = 0
+        self.elapsed_seconds = 0.0
+        # Timings of every game added up, if the games were timed.
+        self.timer = None
+
+    def add_result(self, result):
+        self.num_games += 1
+        self.total_turns += result.turns
+        if result.timer is not None:
+            if self.timer is None:
+                self.timer = GameTimer()
+            self.timer.merge(result.timer)
+        if len(result.winners) == 1:
+            self.wins[result.winners[0]] += 1
+        else:
+            self.ties += 1
+
+    def win_rate(self, player_name):
+        if not self.num_games:
+            return 0.0
+        return self.wins[player_name] / self.num_games
+
+    def tie_rate(self):
+        if not self.num_games:
+            return 0.0
+        return self.ties / self.num_games
+
+    def average_game_length(self):
+        """
+        Returns the average number of player turns per game.
+        """
+        if not self.num_games:
+            return 0.0
+        return self.total_turns / self.num_games
+
+    def games_per_second(self):
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.num_games / self.elapsed_seconds
+
+    def __str__(self):
+        lines = ['Games played: %d' % self.num_games]
+        for name in self.player_names:
+            lines.append('%s win rate: %.2f%%' % (name, 100 * self.win_rate(name)))
+        lines.append('Tie rate: %.2f%%' % (100 * self.tie_rate()))
+        lines.append('Average game length: %.1f player turns' % self.average_game_length())
+        lines.append('Games per second: %.1f' % self.games_per_second())
+        return '\n'.join(lines)
+
+
+def agent_class_from_path(path):
+    """
+    Returns the agent class with the full dotted path, e.g.
+    'core.agents.big_money.DumbMoneyAgent'.
+    """
+    parts = path.split('.')
+    klass = parts[-1]
+    module_str = '.'.join(parts[:-1])
+    module = __import__(module_str, fromlist=[klass])
+    return getattr(module, klass)
+
+
+def play_headless_game(agent_classes, player_names, card_set=KINGDOM_CARDS, seed=None,
+        timed=False):
+    """
+    Play one game with a logger that discards every event and return a `GameResult`.
+
+    Parameters:
+        agent_classes (list of `BaseAgent` subclasses): Agents in the order of turns.
+        player_names (list of str): Name for each agent, in the same order.
+        card_set (optional, list of `Card`): Cards the kingdom will be chosen from.
+        seed (optional, int): Seed for the game. The same seed always plays the same game.
+        timed (optional, bool): Time the game and return the timings in the result.
+    """
+    players = [klass(name) for klass, name in zip(agent_classes, player_names)]
+    controller = GameController(
+        players=players,
+        card_set=card_set,
+        log=NullLogger(),
+        verbose=False,
+        seed=seed,
+        timer=GameTimer() if timed else None,
+    )
+    winners = controller.run()
+    return GameResult(winners, controller.turn_number - 1, controller.timer)
+
+
+def _play_headless_game_from_args(args):
+    """
+    Unpacks the arguments for `play_headless_game`. `Pool.imap_unordered` only passes a single
+    argument to the function it maps.
+    """
+    return play_headless_game(*args)
+
+
+def iter_game_args(agent_classes, player_names, num_games, card_set, swap_seats, seed,
+        timed):
+    """
+    Yields the arguments of `play_headless_game` for each game of a batch, see `run_games` for
+    the parameters. Drivers that play the games some other way use it so that a seed gives the
+    same games for all of them.
+    """
+    # Every game gets its own seed, drawn in order here, so a game plays the same whichever
+    # process it ends up on.
+    seed_rng = random if seed is None else random.Random(seed)
+    for game_index in range(num_games):
+        game_seed = seed_rng.getrandbits(64)
+        if swap_seats and game_index % 2 == 1:
+            yield (agent_classes[::-1], player_names[::-1], card_set, game_seed, timed)
+        else:
+            yield (agent_classes, player_names, card_set, game_seed, timed)
+
+
+def run_games(agent_classes, player_names, num_games, workers=1, card_set=KINGDOM_CARDS,
+        swap_seats=True, seed=None, timed=False):
+    """
+    Play `num_games` headless games and return a `BatchSummary` of the results.
+
+    Parameters:
+        agent_classes (list of `BaseAgent` subclasses): Agents in the order of turns.
+        player_names (list of str): Name for each agent, in the same order.
+        num_games (int): Number of games to play.
+        workers (optional, int): Number of worker processes. With 1 the games are played in
+            this process. Defaults to 1.
+        card_set (optional, list of `Card`): Cards the kingdom will be chosen from.
+        swap_seats (optional, bool): Reverse the turn order every other game so neither agent
+            always goes first. Defaults to True.
+        seed (optional, int): Seed the seeds of the games are drawn from. A batch with a seed
+            has the same results for any number of workers. Defaults to drawing the seeds from
+            the `random` module.
+        timed (optional, bool): Time every game. The timings of the whole batch are in the
+            summary's `timer`.
+    """
+    summary = BatchSummary(player_names)
+    game_args = iter_game_args(
+        agent_classes, player_names, num_games, card_set, swap_seats, seed, timed
+    )
+    start = time.time()
+    if workers <= 1:
+        for args in game_args:
+            summary.add_result(_play_headless_game_from_args(args))
+    else:
+        chunksize = max(1, num_games // (workers * 4))
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.imap_unordered(
+                _play_headless_game_from_args, game_args, chunksize=chunksize
+            )
+            for result in results:
+                summary.add_result(result)
+    summary.elapsed_seconds = time.time() - start
+    return summary
@@ -0,0 +1,220 @@
+"""
+Optional timing of where a game spends its time: each phase of a turn, each card played and each
+decision made by an agent. Times are kept in histograms that can be merged, so the timings of a
+batch of games played in several processes can be added up.
+"""
+import math
+import threading
+import time
+
+
+# Bucket i of a histogram holds times up to 2 ** i microseconds, the last one everything above.
+NUM_BUCKETS = 32
+BUCKET_BASE_SECONDS = 1e-6
+
+
+class Histogram:
+    """
+    Counts of durations in buckets that double in size, with their exact count, total, minimum
+    and maximum.
+    """
+    def __init__(self):
+        self.buckets = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def bucket_index(seconds):
+        if seconds <= BUCKET_BASE_SECONDS:
+            return 0
+        return min(NUM_BUCKETS - 1, int(math.ceil(math.log2(seconds / BUCKET_BASE_SECONDS))))
+
+    @staticmethod
+    def bucket_upper_bound(index):
+        """
+        Returns the longest duration in seconds that goes in the bucket.
+        """
+        if index == NUM_BUCKETS - 1:
+            return float('inf')
+        return BUCKET_BASE_SECONDS * 2 ** index
+
+    def add(self, seconds):
+        self.buckets[self.bucket_index(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        """
+        Add the durations of the other histogram to this one.
+        """
+        for index, count in enumerate(other.buckets):
+            self.buckets[index] += count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def mean(self):
+        if not self.count:
+            return 0.0
+        return self.total / self.count
+
+    def percentile(self, fraction):
+        """
+        Returns an upper bound on the duration that `fraction` of the durations are at most,
+        e.g. 0.99 for the 99th percentile. Exact to within a factor of two.
+        """
+        if not self.count:
+            return 0.0
+        needed = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= needed:
+                return min(self.bucket_upper_bound(index), self.max)
+        return self.max
+
+
+class _TimedAgent:
+    """
+    Stands in for an agent in the game state and times every decision it makes, including the
+    ones cards ask for while they are played.
+    """
+    def __init__(self, agent, timer):
+        self._agent = agent
+        self._timer = timer
+
+    def make_decision(self, decision, known_state=None):
+        start = time.perf_counter()
+        try:
+            return self._agent.make_decision(decision, known_state)
+        finally:
+            self._timer.add_decision(self._agent, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._agent, name)
+
+
+class GameTimer:
+    """
+    Histograms of how long things took in one or more games.
+
+    `phases` are keyed by the name of the `TurnPhase` and hold the wall time of each phase of
+    each turn. `card_plays` are keyed by the card's class name and `decisions` by the agent's
+    class name. Time an agent spends deciding while a card is played is counted as decision time
+    and left out of the card's time, so the card plays and the rest of the phases only measure
+    the engine.
+
+    Times can be added from several threads at once, e.g. by an `AsyncGameController` whose
+    cards are played on worker threads.
+    """
+    def __init__(self):
+        self.phases = {}
+        self.card_plays = {}
+        self.decisions = {}
+        # Running total of decision time, used to leave it out of card plays.
+        self._decision_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Timers are sent back from worker processes, the lock can't be pickled.
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _histogram(self, histograms, key):
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram()
+        return histogram
+
+    def add_phase(self, phase, seconds):
+        """
+        Parameters:
+            phase (`TurnPhase`): Phase that was played.
+            seconds (float): How long it took.
+        """
+        with self._lock:
+            self._histogram(self.phases, phase.name).add(seconds)
+
+    def add_decision(self, agent, seconds):
+        with self._lock:
+            self._histogram(self.decisions, type(agent).__name__).add(seconds)
+            self._decision_seconds += seconds
+
+    def play_card(self, card, game_state):
+        """
+        Play the card and time it.
+        """
+        decision_seconds = self._decision_seconds
+        start = time.perf_counter()
+        card.play(game_state)
+        elapsed = time.perf_counter() - start
+        elapsed -= self._decision_seconds - decision_seconds
+        with self._lock:
+            self._histogram(self.card_plays, card.__name__).add(elapsed)
+
+    def wrap_agent(self, agent):
+        """
+        Returns an agent that behaves like the given one and times its decisions.
+        """
+        return _TimedAgent(agent, self)
+
+    def merge(self, other):
+        """
+        Add the timings of another `GameTimer` to this one.
+        """
+        with self._lock:
+            for histograms, other_histograms in (
+                (self.phases, other.phases),
+                (self.card_plays, other.card_plays),
+                (self.decisions, other.decisions),
+            ):
+                for key, histogram in other_histograms.items():
+                    self._histogram(histograms, key).merge(histogram)
+            self._decision_seconds += other._decision_seconds
+
+    def agent_seconds(self):
+        """
+        Returns the total time agents spent making decisions.
+        """
+        return sum(histogram.total for histogram in self.decisions.values())
+
+    def engine_seconds(self):
+        """
+        Returns the total time spent in turns outside of agent decisions.
+        """
+        phase_seconds = sum(histogram.total for histogram in self.phases.values())
+        return phase_seconds - self.agent_seconds()
+
+    def __str__(self):
+        lines = [
+            'Engine time: %.3fs' % self.engine_seconds(),
+            'Agent time: %.3fs' % self.agent_seconds(),
+        ]
+        for title, histograms in (
+            ('Phases', self.phases),
+            ('Card plays', self.card_plays),
+            ('Decisions', self.decisions),
+        ):
+            lines.append('%s:' % title)
+            for key, histogram in sorted(histograms.items(), key=lambda item: -item[1].total):
+                lines.append(
+                    '  %-24s count %8d  total %8.3fs  mean %8.1fus  p99 <= %8.1fus' % (
+                        key, histogram.count, histogram.total, 1e6 * histogram.mean(),
+                        1e6 * histogram.percentile(0.99),
+                    )
+                )
+        return '\n'.join(lines)
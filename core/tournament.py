@@ -0,0 +1,265 @@
+"""
+Round-robin tournaments between any number of agents. Every pair of agents plays the same
+number of headless games with seats swapped every other game, spread over a pool of worker
+processes. Results are reported as they come in so a long tournament can be followed.
+"""
+from collections import namedtuple
+import itertools
+import math
+import multiprocessing
+import random
+import time
+
+from base_set.cards import KINGDOM_CARDS
+from core.simulation import play_headless_game
+
+
+# Rating of an average agent.
+ELO_BASE = 1500
+ELO_SCALE = 400
+# Ratings are fit until no rating moves more than this many points.
+ELO_TOLERANCE = 1e-6
+MAX_ELO_ITERATIONS = 10000
+
+
+TournamentGameResult = namedtuple('TournamentGameResult', ['player_names', 'winners', 'turns'])
+TournamentGameResult.__doc__ = """
+The outcome of a single game in a tournament.
+
+Parameters:
+    player_names (list of str): Names of the agents in the order of turns.
+    winners (list of str): Names of the winning agents. More than one means a tie.
+    turns (int): Number of player turns played in the game.
+"""
+
+
+def default_agent_names(agent_classes):
+    """
+    Returns a name for each agent class, its class name followed by a number if the class is
+    entered more than once.
+    """
+    counts = {}
+    for klass in agent_classes:
+        counts[klass.__name__] = counts.get(klass.__name__, 0) + 1
+    names = []
+    seen = {}
+    for klass in agent_classes:
+        name = klass.__name__
+        if counts[name] > 1:
+            seen[name] = seen.get(name, 0) + 1
+            name = '%s-%d' % (name, seen[name])
+        names.append(name)
+    return names
+
+
+class TournamentStandings:
+    """
+    Results of a tournament so far, kept for every ordered pair of agents.
+    """
+    def __init__(self, agent_names):
+        self.agent_names = agent_names
+        self.wins = {name: {other: 0 for other in agent_names} for name in agent_names}
+        self.ties = {name: {other: 0 for other in agent_names} for name in agent_names}
+        self.games = {name: {other: 0 for other in agent_names} for name in agent_names}
+        self.num_games = 0
+        self.total_turns = 0
+        self.elapsed_seconds = 0.0
+
+    def add_result(self, result):
+        """
+        Parameters:
+            result (`TournamentGameResult`): A game between two of the agents.
+        """
+        first, second = result.player_names
+        self.num_games += 1
+        self.total_turns += result.turns
+        self.games[first][second] += 1
+        self.games[second][first] += 1
+        if len(result.winners) == 1:
+            winner = result.winners[0]
+            loser = second if winner == first else first
+            self.wins[winner][loser] += 1
+        else:
+            self.ties[first][second] += 1
+            self.ties[second][first] += 1
+
+    def win_rate(self, name, opponent):
+        """
+        Returns the fraction of games against the opponent that the agent won outright.
+        """
+        if not self.games[name][opponent]:
+            return 0.0
+        return self.wins[name][opponent] / self.games[name][opponent]
+
+    def score(self, name, opponent):
+        """
+        Returns the agent's points per game against the opponent, counting a tie as half a win.
+        """
+        if not self.games[name][opponent]:
+            return 0.0
+        points = self.wins[name][opponent] + 0.5 * self.ties[name][opponent]
+        return points / self.games[name][opponent]
+
+    def ratings(self):
+        """
+        Returns a dict of agent name -> Elo rating, with the average rating at `ELO_BASE`.
+
+        The ratings are the best fit of the Elo model to all games at once, so unlike updating
+        after each game they don't depend on the order the games finished in. Ties count as
+        half a win. Every pair that played is given one extra tie so that an agent that won or
+        lost every game still gets a finite rating.
+        """
+        # Strengths in the Bradley-Terry model, fit with its minorization-maximization update.
+        strengths = {name: 1.0 for name in self.agent_names}
+        points = {}
+        for name in self.agent_names:
+            points[name] = sum(
+                self.wins[name][opponent] + 0.5 * self.ties[name][opponent] + 0.5
+                for opponent in self.agent_names if self.games[name][opponent]
+            )
+        for i in range(MAX_ELO_ITERATIONS):
+            new_strengths = {}
+            for name in self.agent_names:
+                denominator = sum(
+                    (self.games[name][opponent] + 1) / (strengths[name] + strengths[opponent])
+                    for opponent in self.agent_names if self.games[name][opponent]
+                )
+                new_strengths[name] = points[name] / denominator if denominator else 1.0
+            # Strengths are only defined up to a common factor, keep their geometric mean at 1.
+            log_mean = sum(math.log(s) for s in new_strengths.values()) / len(new_strengths)
+            new_strengths = {
+                name: strength / math.exp(log_mean) for name, strength in new_strengths.items()
+            }
+            change = max(
+                abs(math.log10(new_strengths[name] / strengths[name])) for name in strengths
+            )
+            strengths = new_strengths
+            if ELO_SCALE * change < ELO_TOLERANCE:
+                break
+        return {
+            name: ELO_BASE + ELO_SCALE * math.log10(strength)
+            for name, strength in strengths.items()
+        }
+
+    def games_per_second(self):
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.num_games / self.elapsed_seconds
+
+    def __str__(self):
+        width = max(len(name) for name in self.agent_names)
+        column_width = max(width, len('100.00%'))
+        lines = ['Games played: %d' % self.num_games]
+        lines.append('Win rate of row against column:')
+        lines.append(
+            ' ' * width + ''.join(' ' + name.rjust(column_width) for name in self.agent_names)
+        )
+        for name in self.agent_names:
+            cells = []
+            for opponent in self.agent_names:
+                if self.games[name][opponent]:
+                    cell = '%.2f%%' % (100 * self.win_rate(name, opponent))
+                else:
+                    cell = '-'
+                cells.append(' ' + cell.rjust(column_width))
+            lines.append(name.ljust(width) + ''.join(cells))
+        lines.append('Ratings:')
+        ratings = self.ratings()
+        for name in sorted(self.agent_names, key=lambda name: -ratings[name]):
+            lines.append('%s %6.0f' % (name.ljust(width), ratings[name]))
+        lines.append('Games per second: %.1f' % self.games_per_second())
+        return '\n'.join(lines)
+
+
+def _play_tournament_game_from_args(args):
+    """
+    Unpacks the arguments for `play_headless_game` and adds the order of the players to the
+    result.
+    """
+    agent_classes, player_names, card_set, seed = args
+    result = play_headless_game(agent_classes, player_names, card_set, seed)
+    return TournamentGameResult(player_names, result.winners, result.turns)
+
+
+def _iter_tournament_game_args(agent_classes, agent_names, games_per_pairing, card_set, seed):
+    seed_rng = random if seed is None else random.Random(seed)
+    pairings = itertools.combinations(zip(agent_classes, agent_names), 2)
+    for (first_class, first_name), (second_class, second_name) in pairings:
+        for game_index in range(games_per_pairing):
+            game_seed = seed_rng.getrandbits(64)
+            if game_index % 2 == 1:
+                yield ([second_class, first_class], [second_name, first_name], card_set,
+                    game_seed)
+            else:
+                yield ([first_class, second_class], [first_name, second_name], card_set,
+                    game_seed)
+
+
+def iter_tournament_results(agent_classes, agent_names, games_per_pairing, workers=1,
+        card_set=KINGDOM_CARDS, seed=None):
+    """
+    Play a round-robin tournament and yield a `TournamentGameResult` for each game as soon as
+    it finishes. With more than one worker the games finish in no particular order.
+
+    Parameters:
+        agent_classes (list of `BaseAgent` subclasses): Agents in the tournament.
+        agent_names (list of str): Unique name for each agent, in the same order.
+        games_per_pairing (int): Number of games every pair of agents plays. Seats are swapped
+            every other game.
+        workers (optional, int): Number of worker processes. With 1 the games are played in
+            this process. Defaults to 1.
+        card_set (optional, list of `Card`): Cards the kingdoms will be chosen from.
+        seed (optional, int): Seed the seeds of the games are drawn from. A tournament with a
+            seed has the same results for any number of workers.
+    """
+    if len(set(agent_names)) != len(agent_names):
+        raise ValueError('Agent names must be unique.')
+    game_args = _iter_tournament_game_args(
+        agent_classes, agent_names, games_per_pairing, card_set, seed
+    )
+    if workers <= 1:
+        for args in game_args:
+            yield _play_tournament_game_from_args(args)
+        return
+    num_pairings = len(agent_classes) * (len(agent_classes) - 1) // 2
+    # Small chunks so results keep streaming in while the tournament runs.
+    chunksize = max(1, num_pairings * games_per_pairing // (workers * 16))
+    with multiprocessing.Pool(workers) as pool:
+        results = pool.imap_unordered(
+            _play_tournament_game_from_args, game_args, chunksize=chunksize
+        )
+        for result in results:
+            yield result
+
+
+def run_tournament(agent_classes, games_per_pairing, agent_names=None, workers=1,
+        card_set=KINGDOM_CARDS, seed=None, report=None, report_every=None):
+    """
+    Play a round-robin tournament and return the final `TournamentStandings`.
+
+    Parameters:
+        agent_classes (list of `BaseAgent` subclasses): Agents in the tournament.
+        games_per_pairing (int): Number of games every pair of agents plays.
+        agent_names (optional, list of str): Unique name for each agent, in the same order.
+            Defaults to `default_agent_names`.
+        workers (optional, int): Number of worker processes. Defaults to 1.
+        card_set (optional, list of `Card`): Cards the kingdoms will be chosen from.
+        seed (optional, int): Seed the seeds of the games are drawn from.
+        report (optional, function): Called with the standings so far every `report_every`
+            games.
+        report_every (optional, int): Number of games between calls to `report`.
+    """
+    if agent_names is None:
+        agent_names = default_agent_names(agent_classes)
+    standings = TournamentStandings(agent_names)
+    start = time.time()
+    results = iter_tournament_results(
+        agent_classes, agent_names, games_per_pairing, workers, card_set, seed
+    )
+    for result in results:
+        standings.add_result(result)
+        if report is not None and report_every and standings.num_games % report_every == 0:
+            standings.elapsed_seconds = time.time() - start
+            report(standings)
+    standings.elapsed_seconds = time.time() - start
+    return standings
@@ -1,35 +1,91 @@
 import argparse
+import functools
 
 from base_set.cards import KINGDOM_CARDS
+from core.agents.command_line import CommandLineAgent
+from core.agents.remote import RemoteAgent
 from core.game_controller import GameController
+from core.loggers.human import BufferedHumanReadableLogger
 from core.loggers.human import HumanReadableLogger
+from core.simulation import agent_class_from_path
+from core.simulation import run_games
 
+# Agents with paths starting with this are played by the agent server at --server.
+REMOTE_PREFIX = 'remote:'
 
-def play_game(p1_agent, p2_agent):
+
+def agent_class(path, server=None):
+	"""
+	Returns the agent class for a path, or a factory for a remote agent if the path starts
+	with `REMOTE_PREFIX`.
+	"""
+	if not path.startswith(REMOTE_PREFIX):
+		return agent_class_from_path(path)
+	if server is None:
+		raise ValueError('--server is needed to play %s.' % path)
+	return functools.partial(RemoteAgent, agent=path[len(REMOTE_PREFIX):], address=server)
+
+
+def play_game(p1_agent, p2_agent, seed=None):
+	if any(isinstance(agent, CommandLineAgent) for agent in (p1_agent, p2_agent)):
+		# Every event has to be printed before a human is asked to decide.
+		log = HumanReadableLogger()
+	else:
+		log = BufferedHumanReadableLogger()
 	controller = GameController(
-	    players=[p1_agent, p2_agent],
-	    card_set=KINGDOM_CARDS,
-	    log=HumanReadableLogger()
+		players=[p1_agent, p2_agent],
+		card_set=KINGDOM_CARDS,
+		log=log,
+		seed=seed
 	)
 	controller.run()
+	log.close()
 
 
-def _str_to_agent_class(s):
-	parts = s.split('.')
-	klass = parts[-1]
-	module_str = '.'.join(parts[:-1])
-	module = __import__(module_str, fromlist=[klass])
-	klass_obj = getattr(module, klass)
-	return klass_obj
+def play_batch(p1_agent_class, p2_agent_class, num_games, workers, seed=None, timed=False):
+	summary = run_games(
+		agent_classes=[p1_agent_class, p2_agent_class],
+		player_names=['p1', 'p2'],
+		num_games=num_games,
+		workers=workers,
+		seed=seed,
+		timed=timed,
+	)
+	print(summary)
+	if summary.timer is not None:
+		print(summary.timer)
 
 
 if __name__ == '__main__':
 	parser = argparse.ArgumentParser()
 	parser.add_argument("--p1", help="Full path to agent to play as player 1")
 	parser.add_argument("--p2", help="Full path to agent to play as player 2")
+	parser.add_argument(
+		"--games", type=int, help="Play this many headless games and print a summary"
+	)
+	parser.add_argument(
+		"--workers", type=int, default=1, help="Number of processes to play headless games on"
+	)
+	parser.add_argument(
+		"--seed", type=int, help="Seed to reproduce a game, or a batch of games for any --workers"
+	)
+	parser.add_argument(
+		"--timing", action='store_true',
+		help="Time the phases, card plays and agent decisions of headless games"
+	)
+	parser.add_argument(
+		"--server",
+		help="host:port or Unix socket of the agent server that plays agents given as remote:<name>"
+	)
 	args = parser.parse_args()
 	p1_path = args.p1 or 'core.agents.big_money.SimpleBmSmithyAgent'
-	p1_agent = _str_to_agent_class(p1_path)('p1')
 	p2_path = args.p2 or 'core.agents.big_money.SimpleBmSmithyAgent'
-	p2_agent = _str_to_agent_class(p2_path)('p2')
-	play_game(p1_agent, p2_agent)
\ No newline at end of file
+	if args.games:
+		play_batch(
+			agent_class(p1_path, args.server), agent_class(p2_path, args.server), args.games,
+			args.workers, args.seed, args.timing
+		)
+	else:
+		p1_agent = agent_class(p1_path, args.server)('p1')
+		p2_agent = agent_class(p2_path, args.server)('p2')
+		play_game(p1_agent, p2_agent, args.seed)
\ No newline at end of file
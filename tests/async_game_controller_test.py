@@ -0,0 +1,174 @@
+import asyncio
+import concurrent.futures
+import time
+import unittest
+
+from base_set.cards import KINGDOM_CARDS
+from core.agents.async_base import AsyncBaseAgent
+from core.agents.async_base import SyncAgentAdapter
+from core.agents.async_base import as_async_agent
+from core.agents.big_money import DumbMoneyAgent
+from core.agents.test import TestAgent
+from core.async_game_controller import AsyncGameController
+from core.async_game_controller import run_async_games
+from core.game_controller import GameController
+from core.loggers.null import NullLogger
+from core.simulation import run_games
+from core.timing import GameTimer
+from tests.game_controller_test import ClosingAgent
+
+
+# Seconds a `WaitingAgent` waits before each decision.
+WAIT_SECONDS = 0.001
+
+
+class WaitingAgent(AsyncBaseAgent):
+    """
+    Plays like `TestAgent` after waiting on the event loop, like an agent asking a server.
+    """
+    def __init__(self, name):
+        super(WaitingAgent, self).__init__(name)
+        self._agent = TestAgent(name)
+        self.decisions = 0
+
+    def set_rng(self, rng):
+        self._agent.set_rng(rng)
+
+    async def make_decision(self, decision, known_state=None):
+        await asyncio.sleep(WAIT_SECONDS)
+        self.decisions += 1
+        return self._agent.make_decision(decision, known_state)
+
+
+class TaskCountingAgent(WaitingAgent):
+    """
+    A `WaitingAgent` that keeps the most tasks it has seen on the event loop at once.
+    """
+    max_tasks = 0
+
+    async def make_decision(self, decision, known_state=None):
+        TaskCountingAgent.max_tasks = max(
+            TaskCountingAgent.max_tasks, len(asyncio.all_tasks())
+        )
+        return await super(TaskCountingAgent, self).make_decision(decision, known_state)
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class AsyncAgentTest(unittest.TestCase):
+    def test_as_async_agent(self):
+        agent = WaitingAgent('p1')
+        self.assertIs(as_async_agent(agent), agent)
+        adapter = as_async_agent(TestAgent('p1'))
+        self.assertIsInstance(adapter, SyncAgentAdapter)
+        self.assertEqual(adapter.name(), 'p1')
+
+
+class AsyncGameControllerTest(unittest.TestCase):
+    def test_same_game_as_game_controller(self):
+        controller = GameController(
+            [TestAgent('p1'), DumbMoneyAgent('p2')], KINGDOM_CARDS, NullLogger(),
+            verbose=False, seed=17
+        )
+        winners = controller.run()
+        async_controller = AsyncGameController(
+            [WaitingAgent('p1'), SyncAgentAdapter(DumbMoneyAgent('p2'), in_thread=True)],
+            KINGDOM_CARDS, NullLogger(), verbose=False, seed=17
+        )
+        self.assertEqual(run(async_controller.run()), winners)
+        self.assertEqual(async_controller.turn_number, controller.turn_number)
+        self.assertEqual(
+            async_controller.player_name_to_vp(), controller.player_name_to_vp()
+        )
+        self.assertTrue(async_controller.players[0].decisions > 0)
+
+    def test_run_closes_agents(self):
+        players = [ClosingAgent('p1'), ClosingAgent('p2')]
+        controller = AsyncGameController(
+            [players[0], SyncAgentAdapter(players[1], in_thread=True)], KINGDOM_CARDS,
+            NullLogger(), verbose=False, seed=3
+        )
+        run(controller.run())
+        self.assertTrue(all(player.closed for player in players))
+
+    def test_cards_do_not_use_the_default_executor(self):
+        controllers = [
+            AsyncGameController(
+                [
+                    SyncAgentAdapter(TestAgent('p1'), in_thread=True),
+                    SyncAgentAdapter(TestAgent('p2'), in_thread=True),
+                ],
+                KINGDOM_CARDS, NullLogger(), verbose=False, seed=seed, timer=GameTimer()
+            )
+            for seed in range(4)
+        ]
+
+        async def play_all():
+            # With one default thread a card waiting on an agent there would never finish.
+            asyncio.get_running_loop().set_default_executor(
+                concurrent.futures.ThreadPoolExecutor(1)
+            )
+            return await asyncio.wait_for(
+                asyncio.gather(*[controller.run() for controller in controllers]), 60
+            )
+
+        self.assertEqual(len(run(play_all())), 4)
+        self.assertTrue(any(controller.timer.card_plays for controller in controllers))
+
+    def test_games_wait_concurrently(self):
+        controllers = [
+            AsyncGameController(
+                [WaitingAgent('p1'), WaitingAgent('p2')], KINGDOM_CARDS, NullLogger(),
+                verbose=False, seed=seed
+            )
+            for seed in range(10)
+        ]
+
+        async def play_all():
+            return await asyncio.gather(*[controller.run() for controller in controllers])
+
+        start = time.perf_counter()
+        run(play_all())
+        elapsed = time.perf_counter() - start
+        decisions = sum(
+            player.decisions for controller in controllers for player in controller.players
+        )
+        self.assertTrue(
+            elapsed < decisions * WAIT_SECONDS,
+            'The games wait for their agents at the same time.'
+        )
+
+
+class RunAsyncGamesTest(unittest.TestCase):
+    def test_seeded_runs_match_run_games(self):
+        summary = run_games([DumbMoneyAgent, TestAgent], ['p1', 'p2'], num_games=6, seed=5)
+        async_summary = run_async_games(
+            [DumbMoneyAgent, TestAgent], ['p1', 'p2'], num_games=6, concurrent_games=4,
+            seed=5, timed=True
+        )
+        self.assertEqual(async_summary.num_games, 6)
+        self.assertEqual(async_summary.wins, summary.wins)
+        self.assertEqual(async_summary.total_turns, summary.total_turns)
+        self.assertIn('TestAgent', async_summary.timer.decisions)
+
+    def test_games_in_flight_are_bounded(self):
+        TaskCountingAgent.max_tasks = 0
+        summary = run_async_games(
+            [TaskCountingAgent, TestAgent], ['p1', 'p2'], num_games=12, concurrent_games=3,
+            seed=5
+        )
+        self.assertEqual(summary.num_games, 12)
+        # The batch, a task per game under way and one per decision asked for by a card.
+        self.assertTrue(
+            TaskCountingAgent.max_tasks <= 1 + 3 * 2, 'Only the games under way have tasks.'
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import asyncio
+import unittest
+
+from core.agents.big_money import DumbMoneyAgent
+from core.async_game_controller import run_async_games
+from core.batching import BatchAgent
+from core.batching import DecisionBatcher
+from core.decision import BuyDecision
+
+
+class RecordingBatchAgent(BatchAgent):
+    """
+    Plays like `DumbMoneyAgent` and keeps the decisions of every call.
+    """
+    def __init__(self):
+        self._agent = DumbMoneyAgent('batch')
+        self.batches = []
+
+    def make_decisions(self, decisions, known_states):
+        self.batches.append(decisions)
+        return [
+            self._agent.make_decision(decision, known_state)
+            for decision, known_state in zip(decisions, known_states)
+        ]
+
+
+class FailingBatchAgent(BatchAgent):
+    def make_decisions(self, decisions, known_states):
+        raise ValueError('No decisions.')
+
+
+class ShortBatchAgent(BatchAgent):
+    def make_decisions(self, decisions, known_states):
+        return [[] for decision in decisions[1:]]
+
+
+class DecisionBatcherTest(unittest.TestCase):
+    def test_batches_across_games(self):
+        batch_agent = RecordingBatchAgent()
+        batcher = DecisionBatcher(batch_agent)
+        summary = run_async_games(
+            [batcher.seat, batcher.seat], ['p1', 'p2'], num_games=20, concurrent_games=20,
+            seed=3
+        )
+        self.assertEqual(summary.num_games, 20)
+        self.assertEqual(batcher.num_batches, len(batch_agent.batches))
+        self.assertTrue(batcher.mean_batch_size() > 5, 'Games wait for each other.')
+        for batch in batch_agent.batches:
+            self.assertEqual(
+                len(set(type(decision) for decision in batch)), 1,
+                'Every batch has decisions of one class.'
+            )
+
+    def test_max_batch_size(self):
+        batch_agent = RecordingBatchAgent()
+        batcher = DecisionBatcher(batch_agent, max_batch_size=4)
+        run_async_games(
+            [batcher.seat, DumbMoneyAgent], ['p1', 'p2'], num_games=10, concurrent_games=10
+        )
+        self.assertTrue(max(len(batch) for batch in batch_agent.batches) <= 4)
+
+    def decide_twice(self, batcher):
+        async def decide_twice():
+            return await asyncio.gather(
+                batcher.decide(BuyDecision([], 0, 0)),
+                batcher.decide(BuyDecision([], 0, 0)),
+                return_exceptions=True,
+            )
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(decide_twice())
+        finally:
+            loop.close()
+
+    def test_errors_reach_every_decision(self):
+        batcher = DecisionBatcher(FailingBatchAgent())
+        results = self.decide_twice(batcher)
+        self.assertEqual(batcher.num_batches, 1)
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertIsInstance(result, ValueError)
+
+    def test_too_few_choices(self):
+        results = self.decide_twice(DecisionBatcher(ShortBatchAgent()))
+        for result in results:
+            self.assertIsInstance(result, ValueError)
+            self.assertIn('ShortBatchAgent returned 1 choices for 2 decisions', str(result))
+
+
+if __name__ == '__main__':
+    unittest.main()
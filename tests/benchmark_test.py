@@ -0,0 +1,47 @@
+import unittest
+
+from benchmarks.harness import Benchmark
+from benchmarks.harness import find_regressions
+from benchmarks.harness import run_benchmarks
+from benchmarks.harness import time_benchmark
+from benchmarks.macro import MACRO_BENCHMARKS
+from benchmarks.micro import MICRO_BENCHMARKS
+
+
+def report_with_rates(**rates):
+    return {
+        'results': {name: {'rate': rate, 'unit': 'ops/s'} for name, rate in rates.items()}
+    }
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_time_benchmark(self):
+        calls = []
+        benchmark = Benchmark('test', lambda: 2, lambda arg: calls.append(arg), operations=10)
+        rate = time_benchmark(benchmark, min_time=0.001, repeat=2)
+        self.assertTrue(rate > 0)
+        self.assertTrue(len(calls) >= 2)
+        self.assertEqual(set(calls), set([2]), 'Every call gets the result of setup.')
+
+    def test_find_regressions(self):
+        baseline = report_with_rates(a=100.0, b=100.0, c=100.0)
+        report = report_with_rates(a=85.0, b=70.0, d=1.0)
+        regressions = find_regressions(report, baseline, tolerance=0.2)
+        self.assertEqual([regression.name for regression in regressions], ['b'])
+        self.assertEqual(regressions[0].baseline, 100.0)
+        self.assertEqual(regressions[0].rate, 70.0)
+
+    def test_benchmarks_run(self):
+        benchmarks = MICRO_BENCHMARKS + MACRO_BENCHMARKS
+        self.assertEqual(
+            len(set(benchmark.name for benchmark in benchmarks)), len(benchmarks),
+            'Benchmark names must be unique.'
+        )
+        report = run_benchmarks(benchmarks, min_time=0, repeat=1)
+        self.assertEqual(
+            set(report['results']), set(benchmark.name for benchmark in benchmarks)
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import gc
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+
+from base_set.cards import CopperCard
+from base_set.cards import KINGDOM_CARDS
+from base_set.cards import SilverCard
+from core.agents.big_money import SimpleBmSmithyAgent
+from core.agents.test import TestAgent
+from core.card_stack import StackPosition
+from core.counters import CounterId
+from core.counters import CounterName
+from core.events import CardEventType
+from core.events import CardKnowledgeEvent
+from core.events import CardKnowledgeEventType
+from core.events import CardMoveEvent
+from core.events import CounterEvent
+from core.events import CounterEventType
+from core.events import EVENT_CLASSES
+from core.events import ShuffleEvent
+from core.game_controller import GameController
+from core.locations import Location
+from core.locations import LocationName
+from core.loggers.binary import BinaryLogger
+from core.loggers.binary import BinaryLogReader
+from core.loggers.binary import FLAG_CONTINUES
+from core.loggers.binary import KIND_MOVE
+
+
+class ListLogger:
+    event_classes = EVENT_CLASSES
+
+    def __init__(self):
+        self.events = []
+
+    def log(self, event):
+        self.events.append(event)
+
+
+class BinaryLoggerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'game.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_read_events(self):
+        events = [
+            CardMoveEvent(
+                [CopperCard, SilverCard], Location('p1', LocationName.DRAW_PILE),
+                StackPosition.TOP, Location('p1', LocationName.HAND), None, CardEventType.DRAW
+            ),
+            CardMoveEvent(
+                [], Location('p2', LocationName.DRAW_PILE), StackPosition.TOP,
+                Location('p2', LocationName.HAND), None, CardEventType.DRAW
+            ),
+            CounterEvent(CounterId(None, CounterName.COINS), CounterEventType.UPDATE, -3),
+            CounterEvent(CounterId('p2', CounterName.BUYS), CounterEventType.SET, 2),
+            ShuffleEvent(Location('p2', LocationName.DISCARD)),
+            CardKnowledgeEvent(
+                ['p2'], [SilverCard], Location('p1', LocationName.DRAW_PILE),
+                StackPosition.TOP, CardKnowledgeEventType.REVEAL
+            ),
+        ]
+        logger = BinaryLogger(self.path, ['p1', 'p2'], metadata={'seed': 3})
+        for event in events:
+            logger.log(event)
+        logger.close()
+        with BinaryLogReader(self.path) as reader:
+            self.assertEqual(len(reader), 7, 'One record per card and one per other event.')
+            self.assertEqual(reader.player_names, ['p1', 'p2'])
+            self.assertEqual(reader.metadata, {'seed': 3})
+            self.assertEqual(list(reader.iter_events()), events)
+            first = next(reader.iter_records())
+            self.assertEqual(first[0], KIND_MOVE)
+            self.assertEqual(first[2], FLAG_CONTINUES)
+
+    def test_game_round_trip(self):
+        expected = ListLogger()
+        GameController(
+            [TestAgent('p1'), SimpleBmSmithyAgent('p2')], KINGDOM_CARDS, expected,
+            verbose=False, seed=7
+        ).run()
+        logger = BinaryLogger(self.path, ['p1', 'p2'], buffer_records=10)
+        GameController(
+            [TestAgent('p1'), SimpleBmSmithyAgent('p2')], KINGDOM_CARDS, logger,
+            verbose=False, seed=7
+        ).run()
+        logger.close()
+        with BinaryLogReader(self.path) as reader:
+            self.assertEqual(list(reader.iter_events()), expected.events)
+
+    def test_incomplete_log(self):
+        logger = BinaryLogger(self.path, ['p1', 'p2'])
+        logger.flush()
+        with self.assertRaises(ValueError):
+            BinaryLogReader(self.path)
+        logger.close()
+
+    def test_empty_file(self):
+        open(self.path, 'wb').close()
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            with self.assertRaises(ValueError):
+                BinaryLogReader(self.path)
+            gc.collect()
+        self.assertEqual(
+            [warning for warning in caught if warning.category is ResourceWarning], [],
+            'The file is closed.'
+        )
+
+    def test_close_while_iterating(self):
+        logger = BinaryLogger(self.path, ['p1', 'p2'])
+        for value in range(3):
+            logger.log(
+                CounterEvent(CounterId(None, CounterName.COINS), CounterEventType.SET, value)
+            )
+        logger.close()
+        reader = BinaryLogReader(self.path)
+        records = reader.iter_records()
+        first = next(records)
+        reader.close()
+        self.assertEqual([record[10] for record in records], [1, 2])
+        self.assertEqual(first[10], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
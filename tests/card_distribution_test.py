@@ -1,11 +1,15 @@
 import unittest
 
+from core.card_distribution import ArrayCardDistribution
 from core.card_distribution import CardDistribution
+from core.card_distribution import CardIndex
 
 
 class CardDistributionTest(unittest.TestCase):
+    distribution_class = CardDistribution
+
     def setUp(self):
-        self.card_distribution = CardDistribution()
+        self.card_distribution = self.distribution_class()
 
     def test_count(self):
         self.assertEqual(self.card_distribution.count('a'), 0)
@@ -25,29 +29,111 @@ class CardDistributionTest(unittest.TestCase):
         self.assertEqual(self.card_distribution.count('a'), -2)
 
     def test_comparator(self):
-        other = CardDistribution(['a', 'a', 'b'])
+        other = self.distribution_class(['a', 'a', 'b'])
         self.card_distribution.add('a')
         self.card_distribution.add('a')
         self.card_distribution.add('b')
         self.assertTrue(other == self.card_distribution)
 
     def test_size(self):
-        dist = CardDistribution([1, 1, 2])
+        dist = self.distribution_class([1, 1, 2])
         self.assertEqual(dist.size(), 3)
         dist.subtract(1)
         self.assertEqual(dist.size(), 2)
         
     def test_iter(self):
-        dist = CardDistribution([1, 1, 2])
+        dist = self.distribution_class([1, 1, 2])
         self.assertEqual(sorted(list(dist)), [1, 1, 2])
         dist.subtract(2)
         self.assertEqual(sorted(list(dist)), [1, 1])
 
+    def test_deepcopy(self):
+        dist = self.distribution_class([1, 1, 2])
+        dist_copy = dist.deepcopy()
+        self.assertEqual(dist, dist_copy)
+        dist.add(1)
+        self.assertEqual(dist.count(1), 3)
+        self.assertEqual(dist_copy.count(1), 2, 'Changing the original does not change the copy.')
+        dist_copy.subtract(2)
+        self.assertEqual(dist_copy.count(2), 0)
+        self.assertEqual(dist.count(2), 1, 'Changing the copy does not change the original.')
+
     def test_empty(self):
-        dist = CardDistribution([1, 1, 2])
+        dist = self.distribution_class([1, 1, 2])
         dist.empty()
         self.assertEqual(dist.size(), 0)
 
 
+class ArrayCardDistributionTest(CardDistributionTest):
+    distribution_class = ArrayCardDistribution
+
+    def test_cards_to_counts(self):
+        dist = ArrayCardDistribution(['a', 'a', 'b'])
+        dist.subtract('b')
+        self.assertEqual(
+            dist.cards_to_counts(), {'a': 2, 'b': 0},
+            'Cards whose count went back to 0 are still included.'
+        )
+
+    def test_arithmetic(self):
+        card_index = CardIndex(['a', 'b', 'c'])
+        first = ArrayCardDistribution(['a', 'a', 'b'], card_index=card_index)
+        second = ArrayCardDistribution(['a', 'c'], card_index=card_index)
+        total = first + second
+        self.assertEqual(total.cards_to_counts(), {'a': 3, 'b': 1, 'c': 1})
+        self.assertEqual(total.size(), 5)
+        difference = total - second
+        self.assertEqual(difference, first)
+        self.assertEqual(difference.size(), 3)
+
+    def test_arithmetic_with_cards_registered_later(self):
+        card_index = CardIndex(['a'])
+        first = ArrayCardDistribution(['a'], card_index=card_index)
+        card_index.register('b')
+        second = ArrayCardDistribution(['b', 'b'], card_index=card_index)
+        self.assertEqual((first + second).cards_to_counts(), {'a': 1, 'b': 2})
+        self.assertEqual((second - first).cards_to_counts(), {'a': -1, 'b': 2})
+        self.assertEqual((second - first).size(), 1)
+
+    def test_equal_to_card_distribution(self):
+        dist = ArrayCardDistribution(['a', 'a', 'b'])
+        dist.subtract('b')
+        self.assertEqual(dist, CardDistribution(['a', 'a']))
+        self.assertEqual(CardDistribution(['a', 'a']), dist)
+        self.assertNotEqual(dist, CardDistribution(['a']))
+        self.assertNotEqual(CardDistribution(['a', 'b']), dist)
+
+    def test_arithmetic_with_cards_not_in_the_index(self):
+        card_index = CardIndex(['a'])
+        first = ArrayCardDistribution(['a', 'b'], card_index=card_index)
+        second = ArrayCardDistribution(['b', 'c'], card_index=card_index)
+        self.assertEqual((first + second).cards_to_counts(), {'a': 1, 'b': 2, 'c': 1})
+        self.assertEqual((first - second).cards_to_counts(), {'a': 1, 'b': 0, 'c': -1})
+        self.assertEqual(first - second + second, first)
+        self.assertNotEqual(first, second)
+
+    def test_cards_registered_after_creation(self):
+        card_index = CardIndex(['a'])
+        dist = ArrayCardDistribution(['a'], card_index=card_index)
+        card_index.register('b')
+        dist.add('b', 2)
+        self.assertEqual(dist.count('b'), 2)
+        self.assertEqual(dist.size(), 3)
+
+    def test_cards_are_not_registered(self):
+        card_index = CardIndex(['a'])
+        dist = ArrayCardDistribution(['a'], card_index=card_index)
+        dist.add('b', 2)
+        copy = dist.deepcopy()
+        copy.subtract('b')
+        self.assertEqual(dist.count('b'), 2)
+        self.assertEqual(copy.count('b'), 1)
+        self.assertEqual(dist.cards_to_counts(), {'a': 1, 'b': 2})
+        self.assertEqual(dist.size(), 3)
+        self.assertEqual(len(card_index), 1, 'Only cards registered explicitly have an id.')
+        dist.empty()
+        self.assertEqual(dist.cards_to_counts(), {})
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,7 +1,16 @@
 import unittest
+
+from base_set.cards import CopperCard
+from base_set.cards import GoldCard
+from base_set.cards import ProvinceCard
+from base_set.cards import SilverCard
+from base_set.cards import SmithyCard
+from core.card import CardType
+from core.card import KingdomCard
 from core.card_stack import CardStack
 from core.card_stack import UnorderedCardStack
 from core.card_stack import StackPosition
+from core.card_stack import SupplyCardStack
 
 
 class CardStackTest(unittest.TestCase):
@@ -47,6 +56,34 @@ class CardStackTest(unittest.TestCase):
         extracted = card_stack.extract(['b'])
         self.assertEqual(card_stack.distribution.count('b'), 0)
 
+    def test_extract_topmost_copy(self):
+        card_stack = CardStack(['a', 'b', 'a', 'c', 'a'])
+        card_stack.extract(['a'])
+        self.assertEqual(list(card_stack), ['b', 'a', 'c', 'a'])
+        card_stack.add('a', StackPosition.BOTTOM)
+        card_stack.extract(['a', 'a'])
+        self.assertEqual(list(card_stack), ['b', 'c', 'a'])
+        card_stack.add('a')
+        card_stack.extract(['a'])
+        self.assertEqual(list(card_stack), ['b', 'c', 'a'])
+        self.assertEqual(card_stack.distribution.count('a'), 1)
+        with self.assertRaises(ValueError):
+            card_stack.extract(['d'])
+
+    def test_extract_then_draw_and_peek(self):
+        card_stack = CardStack(['a', 'b'] * 20)
+        card_stack.extract(['b'] * 15)
+        remaining = ['a'] * 15 + ['a', 'b'] * 5
+        self.assertEqual(list(card_stack), remaining)
+        self.assertEqual(card_stack.size(), len(remaining))
+        self.assertEqual(card_stack.peek(16), 'b')
+        self.assertEqual(card_stack.peek_from_position(StackPosition.TOP, 2), ['a', 'a'])
+        self.assertEqual(card_stack.peek_from_position(StackPosition.BOTTOM, 3), ['b', 'a', 'b'])
+        self.assertEqual(card_stack.draw(16), ['a'] * 16)
+        self.assertEqual(card_stack.draw(2, StackPosition.BOTTOM), ['b', 'a'])
+        card_stack.extract(['b'])
+        self.assertEqual(list(card_stack), ['a', 'b'] * 3)
+
     def test_size(self):
         self.assertEqual(self.card_stack.size(), 1)
         self.card_stack.add('b')
@@ -60,6 +97,34 @@ class CardStackTest(unittest.TestCase):
         self.assertEqual(self.card_stack.size(), 2)
         self.assertEqual(self.card_stack.distribution.size(), 2)
 
+    def test_restore(self):
+        card_stack = CardStack(['a', 'b', 'c', 'b', 'd'])
+        drawn_keys = []
+        drawn = card_stack.draw(1, StackPosition.BOTTOM, drawn_keys)
+        extracted_keys = []
+        extracted = card_stack.extract(['b', 'a'], extracted_keys)
+        self.assertEqual(list(card_stack), ['c', 'b'])
+        card_stack.restore(extracted, extracted_keys)
+        card_stack.restore(drawn, drawn_keys)
+        self.assertEqual(list(card_stack), ['a', 'b', 'c', 'b', 'd'])
+        self.assertEqual(card_stack.distribution.count('b'), 2)
+        self.assertEqual(card_stack.extract(['b']), ['b'])
+        self.assertEqual(list(card_stack), ['a', 'c', 'b', 'd'])
+
+    def test_get_and_set_order(self):
+        card_stack = CardStack(['a', 'b', 'c'])
+        order = card_stack.get_order()
+        card_stack.reorder(['c', 'a', 'b'])
+        card_stack.set_order(order)
+        self.assertEqual(list(card_stack), ['a', 'b', 'c'])
+
+    def test_draw_too_many(self):
+        self.card_stack.add('b')
+        self.card_stack.add('c')
+        self.assertRaises(IndexError, self.card_stack.draw, 5)
+        self.assertEqual(list(self.card_stack), ['c', 'b', 'a'])
+        self.assertEqual(self.card_stack.distribution.size(), 3)
+
     def test_shuffle(self):
         self.card_stack.add('b')
         self.card_stack.add('c')
@@ -75,7 +140,7 @@ class CardStackTest(unittest.TestCase):
         found_difference = False
         for _ in range(10):
             stack.shuffle()
-            if stack._stack != unshuffled_stack._stack:
+            if list(stack) != list(unshuffled_stack):
                 found_difference = True
                 break
 
@@ -86,7 +151,7 @@ class CardStackTest(unittest.TestCase):
         self.card_stack.add('b')
         stack_copy = self.card_stack.deepcopy()
         self.assertEqual(self.card_stack.size(), stack_copy.size())
-        self.assertEqual(self.card_stack._stack, stack_copy._stack)
+        self.assertEqual(list(self.card_stack), list(stack_copy))
         self.assertEqual(self.card_stack.distribution, stack_copy.distribution)
 
     def test_empty(self):
@@ -159,5 +224,82 @@ class UnorderedCardStackTest(unittest.TestCase):
         self.assertEqual(stack.size(), 2)
 
 
+class SupplyCardStackTest(unittest.TestCase):
+    def test_num_empty_piles(self):
+        supply = SupplyCardStack(['a', 'a', 'b', 'c'])
+        self.assertEqual(supply.num_empty_piles(), 0)
+        supply.extract(['a'])
+        self.assertEqual(supply.num_empty_piles(), 0)
+        supply.extract(['a', 'b'])
+        self.assertEqual(supply.num_empty_piles(), 2)
+        supply.add('b')
+        self.assertEqual(supply.num_empty_piles(), 1)
+        supply.add('d')
+        self.assertEqual(supply.num_empty_piles(), 1, 'Adding a new pile does not change it.')
+        self.assertEqual(supply.deepcopy().num_empty_piles(), 1)
+
+    def test_from_stack_keeps_empty_piles(self):
+        stack = UnorderedCardStack(['a', 'b', 'b'])
+        stack.extract(['a'])
+        supply = SupplyCardStack.from_stack(stack)
+        self.assertEqual(supply.num_empty_piles(), 1)
+        self.assertEqual(supply.size(), 2)
+        self.assertEqual(supply.distribution.cards_to_counts(), {'a': 0, 'b': 2})
+
+
+class DiscountedCard(KingdomCard):
+    types = (CardType.ACTION,)
+    base_cost = 6
+
+    @classmethod
+    def cost(cls, game_state):
+        return game_state['discounted_cost']
+
+
+class SupplyCostIndexTest(unittest.TestCase):
+    def create_supply(self):
+        return SupplyCardStack(
+            [CopperCard, SilverCard, GoldCard, ProvinceCard, SmithyCard, DiscountedCard]
+        )
+
+    def test_cards_costing_at_most(self):
+        supply = self.create_supply()
+        game_state = {'discounted_cost': 6}
+        self.assertEqual(
+            supply.cards_costing_at_most(game_state, 4), [CopperCard, SilverCard, SmithyCard]
+        )
+        self.assertEqual(
+            supply.cards_costing_at_most(game_state, 6, card_type=CardType.TREASURE),
+            [CopperCard, SilverCard, GoldCard]
+        )
+        self.assertEqual(supply.cards_costing_at_most(game_state, 6, card_type=CardType.CURSE), [])
+        supply.extract([SilverCard])
+        self.assertEqual(
+            supply.cards_costing_at_most(game_state, 4), [CopperCard, SmithyCard],
+            'Empty piles are not included.'
+        )
+
+    def test_cost_that_depends_on_game_state(self):
+        supply = self.create_supply()
+        self.assertNotIn(
+            DiscountedCard, supply.cards_costing_at_most({'discounted_cost': 6}, 5)
+        )
+        self.assertIn(
+            DiscountedCard, supply.cards_costing_at_most({'discounted_cost': 2}, 5)
+        )
+
+    def test_cost_that_depends_on_game_state_is_in_cost_order(self):
+        supply = self.create_supply()
+        self.assertEqual(
+            supply.cards_costing_at_most({'discounted_cost': 2}, 6),
+            [CopperCard, DiscountedCard, SilverCard, SmithyCard, GoldCard]
+        )
+        self.assertEqual(
+            supply.cards_costing_at_most({'discounted_cost': 4}, 4),
+            [CopperCard, SilverCard, DiscountedCard, SmithyCard],
+            'Ties with indexed piles are broken by name.'
+        )
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from core.decision import Decision
@@ -57,6 +58,13 @@ class DecisionTest(unittest.TestCase):
             lengths, possible_lengths, 'All choices should be length one when min and max are one'
         )
 
+    def test_choose_random_with_rng(self):
+        decision = Decision(options=[0, 1, 2, 3], min=1, max=3)
+        rng = random.Random(7)
+        choices = [decision.choose_random(rng) for i in range(20)]
+        rng = random.Random(7)
+        self.assertEqual(choices, [decision.choose_random(rng) for i in range(20)])
+
     def test_there_is_no_choice(self):
         single_choice_decision = Decision(options=[0, 1, 2], min=1, max=1)
         self.assertFalse(
@@ -0,0 +1,188 @@
+from collections import Counter
+import random
+import unittest
+
+from base_set.cards import KINGDOM_CARDS
+from base_set.cards import CopperCard
+from base_set.cards import DuchyCard
+from base_set.cards import EstateCard
+from base_set.cards import GoldCard
+from base_set.cards import ProvinceCard
+from base_set.cards import SilverCard
+from core.agents.test import TestAgent
+from core.card_stack import SupplyCardStack
+from core.determinization import DeterminizationSampler
+from core.determinization import KnowledgeTracker
+from core.determinization import PLAYER_LOCATION_NAMES
+from core.game_controller import GameController
+from core.game_state import GameState
+from core.locations import Location
+from core.locations import LocationName
+from core.loggers.null import NullLogger
+
+
+def create_game_state():
+    supply = SupplyCardStack(
+        [ProvinceCard] * 8 + [DuchyCard] * 8 + [GoldCard] * 10 + [SilverCard] * 10
+    )
+    game_state = GameState(
+        player_names=['p1', 'p2'], supply=supply,
+        starting_deck=[CopperCard] * 7 + [EstateCard] * 3, logger=NullLogger()
+    )
+    for player in game_state.player_names:
+        game_state.shuffle(Location(player, LocationName.DRAW_PILE))
+        game_state.draw(5, player)
+    game_state.reset_counters_for_new_turn()
+    game_state.gain(GoldCard, player='p2')
+    for card in list(game_state.get_location(Location('p1', LocationName.HAND))):
+        if card == CopperCard:
+            game_state.play(card)
+    return game_state
+
+
+class CheckedTracker(KnowledgeTracker):
+    """
+    Checks the tracker against the real game state after every event.
+    """
+    def __init__(self, test, *args, **kwargs):
+        super(CheckedTracker, self).__init__(*args, **kwargs)
+        self.test = test
+        self.controller = None
+
+    def log(self, event):
+        super(CheckedTracker, self).log(event)
+        game_state = self.controller.game_state
+        for player in self.player_names:
+            for location_name in PLAYER_LOCATION_NAMES:
+                location = Location(player, location_name)
+                cards = list(game_state.get_location(location))
+                self.test.assertEqual(self.get_size(location), len(cards))
+                known = self.get_known_cards(location)
+                self.test.assertEqual(known - Counter(cards), Counter(), 'Known cards are there.')
+                if player == self.player and location_name != LocationName.DRAW_PILE:
+                    self.test.assertEqual(known, Counter(cards), 'Own cards are all known.')
+                top = self.get_known_top(location)
+                self.test.assertEqual(cards[:len(top)], top)
+
+
+class KnowledgeTrackerTest(unittest.TestCase):
+    def test_tracker_matches_game(self):
+        for seed in range(3):
+            random.seed(seed)
+            players = [TestAgent('p1'), TestAgent('p2')]
+            controller = GameController(players, KINGDOM_CARDS, None, verbose=False)
+            tracker = CheckedTracker(
+                self, 'p1', ['p1', 'p2'], controller.get_starting_deck()
+            )
+            tracker.controller = controller
+            controller.log = tracker
+            controller.run()
+
+    def test_gain_to_top_of_deck_is_known(self):
+        random.seed(3)
+        game_state = create_game_state()
+        tracker = KnowledgeTracker('p2', ['p1', 'p2'], [])
+        game_state.set_logger(tracker)
+        game_state.gain_to_top_of_deck(GoldCard, player='p1')
+        self.assertEqual(
+            tracker.get_known_top(Location('p1', LocationName.DRAW_PILE)), [GoldCard]
+        )
+
+
+class DeterminizationSamplerTest(unittest.TestCase):
+    def assert_consistent(self, sample, game_state, known_locations):
+        self.assertEqual(
+            sample.get_current_player_name(), game_state.get_current_player_name()
+        )
+        for player in game_state.player_names:
+            self.assertEqual(
+                sample.get_deck_distribution(player), game_state.get_deck_distribution(player)
+            )
+            for location_name in PLAYER_LOCATION_NAMES:
+                location = Location(player, location_name)
+                self.assertEqual(
+                    sample.get_location(location).size(),
+                    game_state.get_location(location).size(),
+                    'Locations of the sample have the same sizes as the game.'
+                )
+        for location in known_locations + [Location(None, LocationName.SUPPLY)]:
+            self.assertEqual(
+                sample.get_location(location).distribution,
+                game_state.get_location(location).distribution,
+                'Known locations are the same as the game.'
+            )
+
+    def test_sample_from_view(self):
+        random.seed(3)
+        game_state = create_game_state()
+        sampler = DeterminizationSampler(game_state.get_state_known_to('p1'))
+        for seed in range(5):
+            sample = sampler.sample(random.Random(seed))
+            self.assert_consistent(sample, game_state, [
+                Location('p1', LocationName.HAND),
+                Location('p1', LocationName.IN_PLAY),
+            ])
+
+    def test_sample_from_view_after_shuffles(self):
+        random.seed(5)
+        controller = GameController(
+            [TestAgent('p1'), TestAgent('p2')], KINGDOM_CARDS, NullLogger(), verbose=False
+        )
+        controller.setup_game()
+        controller.turn_number = 1
+        controller.play_until_game_over(max_turns=10)
+        game_state = controller.game_state
+        sampler = DeterminizationSampler(game_state.get_state_known_to('p1'))
+        for seed in range(5):
+            sample = sampler.sample(random.Random(seed))
+            self.assert_consistent(sample, game_state, [Location('p1', LocationName.HAND)])
+
+    def test_sample_with_tracker(self):
+        random.seed(5)
+        players = [TestAgent('p1'), TestAgent('p2')]
+        controller = GameController(players, KINGDOM_CARDS, None, verbose=False)
+        tracker = KnowledgeTracker('p1', ['p1', 'p2'], controller.get_starting_deck())
+        controller.log = tracker
+        controller.setup_game()
+        controller.turn_number = 1
+        controller.play_until_game_over(max_turns=10)
+        game_state = controller.game_state
+        sampler = DeterminizationSampler(game_state.get_state_known_to('p1'), tracker)
+        for seed in range(5):
+            sample = sampler.sample(random.Random(seed))
+            self.assert_consistent(sample, game_state, [
+                Location('p1', LocationName.HAND),
+                Location('p1', LocationName.DISCARD),
+            ])
+            draw_pile = Location('p1', LocationName.DRAW_PILE)
+            self.assertEqual(
+                sample.get_location(draw_pile).distribution,
+                game_state.get_location(draw_pile).distribution,
+                'The rest of the cards must be in the draw pile.'
+            )
+
+    def test_sample_with_tracker_keeps_top_of_discard(self):
+        random.seed(5)
+        players = [TestAgent('p1'), TestAgent('p2')]
+        controller = GameController(players, KINGDOM_CARDS, None, verbose=False)
+        tracker = KnowledgeTracker('p1', ['p1', 'p2'], controller.get_starting_deck())
+        controller.log = tracker
+        controller.setup_game()
+        controller.turn_number = 1
+        controller.play_until_game_over(max_turns=11)
+        view = controller.game_state.get_state_known_to('p1')
+        sampler = DeterminizationSampler(view, tracker)
+        for player in ['p1', 'p2']:
+            discard = Location(player, LocationName.DISCARD)
+            top_of_discard = view.get_location_info(discard).top_card
+            self.assertIsNotNone(top_of_discard)
+            for seed in range(10):
+                sample = sampler.sample(random.Random(seed))
+                self.assertEqual(
+                    sample.get_state_known_to('p1').get_location_info(discard).top_card,
+                    top_of_discard
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+
+from base_set.cards import KINGDOM_CARDS
+from core.agents.big_money import DumbMoneyAgent
+from core.agents.test import TestAgent
+from core.events import CardMoveEvent
+from core.events import CounterEvent
+from core.events import EVENT_CLASSES
+from core.events import ShuffleEvent
+from core.game_controller import GameController
+from core.loggers.bus import EventBus
+
+
+class ListLogger:
+    def __init__(self, event_classes=EVENT_CLASSES):
+        self.event_classes = event_classes
+        self.events = []
+        self.flushes = 0
+        self.closed = False
+
+    def log(self, event):
+        self.events.append(event)
+
+    def flush(self):
+        self.flushes += 1
+
+    def close(self):
+        self.closed = True
+
+
+class BatchLogger(ListLogger):
+    def __init__(self):
+        super(BatchLogger, self).__init__()
+        self.batches = []
+
+    def log_batch(self, events):
+        self.batches.append(events)
+
+
+class ObservingAgent(TestAgent):
+    def __init__(self, name):
+        super(ObservingAgent, self).__init__(name)
+        self.observed = ListLogger((ShuffleEvent,))
+
+    def event_sink(self):
+        return self.observed
+
+
+def play_game(players, log):
+    controller = GameController(players, KINGDOM_CARDS, log, verbose=False, seed=5)
+    controller.run()
+    return controller
+
+
+class EventBusTest(unittest.TestCase):
+    def test_sinks_receive_their_event_classes(self):
+        everything = ListLogger()
+        moves = ListLogger((CardMoveEvent,))
+        bus = EventBus([everything])
+        bus.add_sink(moves)
+        bus.add_sink(ListLogger((CounterEvent,)))
+        self.assertEqual(set(bus.event_classes), set(EVENT_CLASSES))
+        play_game([TestAgent('p1'), DumbMoneyAgent('p2')], bus)
+        self.assertEqual(
+            moves.events,
+            [event for event in everything.events if type(event) is CardMoveEvent]
+        )
+        self.assertEqual(everything.flushes, 1, 'Sinks are flushed when the game ends.')
+
+    def test_only_wanted_events_are_constructed(self):
+        bus = EventBus()
+        bus.add_sink(ListLogger((ShuffleEvent,)))
+        bus.add_sink(ListLogger((CounterEvent,)))
+        self.assertEqual(set(bus.event_classes), {ShuffleEvent, CounterEvent})
+        everything = ListLogger()
+        bus.add_sink(everything, event_classes=(ShuffleEvent,))
+        play_game([TestAgent('p1'), TestAgent('p2')], bus)
+        self.assertTrue(everything.events)
+        self.assertTrue(all(type(event) is ShuffleEvent for event in everything.events))
+
+    def test_filter(self):
+        p1_shuffles = ListLogger((ShuffleEvent,))
+        bus = EventBus()
+        bus.add_sink(p1_shuffles, filter=lambda event: event.location.player == 'p1')
+        play_game([TestAgent('p1'), TestAgent('p2')], bus)
+        self.assertTrue(p1_shuffles.events)
+        for event in p1_shuffles.events:
+            self.assertEqual(event.location.player, 'p1')
+
+    def test_batches(self):
+        batched = BatchLogger()
+        unbatched = ListLogger()
+        bus = EventBus()
+        bus.add_sink(batched, batch_size=3)
+        bus.add_sink(unbatched, batch_size=3)
+        for event in range(7):
+            bus.log(ShuffleEvent(event))
+        self.assertEqual([len(batch) for batch in batched.batches], [3, 3])
+        self.assertEqual(len(unbatched.events), 6)
+        bus.close()
+        self.assertEqual([len(batch) for batch in batched.batches], [3, 3, 1])
+        self.assertEqual(len(unbatched.events), 7, 'The rest are handed over on close.')
+        self.assertTrue(unbatched.closed)
+
+    def test_remove_sink(self):
+        sink = ListLogger()
+        bus = EventBus([sink])
+        bus.remove_sink(sink)
+        bus.log(ShuffleEvent(None))
+        self.assertEqual(sink.events, [])
+        self.assertEqual(bus.event_classes, ())
+        self.assertRaises(ValueError, bus.remove_sink, sink)
+
+    def test_sink_added_to_attached_bus(self):
+        shuffles = ListLogger((ShuffleEvent,))
+        bus = EventBus([shuffles])
+        controller = GameController(
+            [TestAgent('p1'), TestAgent('p2')], KINGDOM_CARDS, bus, verbose=False, seed=5
+        )
+        controller.setup_game()
+        controller.turn_number = 1
+        moves = ListLogger((CardMoveEvent,))
+        bus.add_sink(moves)
+        controller.play_until_game_over(max_turns=4)
+        self.assertTrue(moves.events, 'Game state constructs events for the new sink.')
+        bus.remove_sink(moves)
+        count = len(moves.events)
+        controller.play_until_game_over(max_turns=8)
+        self.assertEqual(len(moves.events), count)
+        self.assertFalse(controller.game_state._log_card_moves)
+
+    def test_agent_sinks(self):
+        log = ListLogger()
+        agent = ObservingAgent('p1')
+        play_game([agent, TestAgent('p2')], log)
+        self.assertEqual(
+            agent.observed.events,
+            [event for event in log.events if type(event) is ShuffleEvent]
+        )
+        self.assertTrue(agent.observed.events)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+
+from base_set.cards import KINGDOM_CARDS
+from base_set.cards import CopperCard
+from base_set.cards import EstateCard
+from core.agents.test import TestAgent
+from core.card_distribution import CARD_INDEX
+from core.card_distribution import CardDistribution
+from core.game_controller import GameController
+from core.locations import Location
+from core.locations import LocationName
+from core.loggers.null import NullLogger
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from core.features import FeatureEncoder
+    from core.features import UNKNOWN_SIZE
+
+
+def played_game_state(turns):
+    controller = GameController(
+        [TestAgent('p1'), TestAgent('p2')], KINGDOM_CARDS, NullLogger(), verbose=False, seed=3
+    )
+    controller.setup_game()
+    controller.turn_number = 1
+    controller.play_until_game_over(max_turns=turns)
+    return controller.game_state
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class FeatureEncoderTest(unittest.TestCase):
+    def setUp(self):
+        self.encoder = FeatureEncoder()
+        self.game_state = played_game_state(9)
+
+    def block(self, features, name):
+        return features[self.encoder.slices[name]]
+
+    def test_encode(self):
+        known_state = self.game_state.get_state_known_to('p1')
+        features = self.encoder.encode(known_state)
+        self.assertEqual(features.shape, (self.encoder.size,))
+        copper = CARD_INDEX.get_id(CopperCard)
+        supply = self.game_state.get_location(Location(None, LocationName.SUPPLY))
+        self.assertEqual(
+            self.block(features, 'supply')[copper], supply.distribution.count(CopperCard)
+        )
+        hand = self.game_state.get_location(Location('p1', LocationName.HAND))
+        self.assertEqual(self.block(features, 'hand').sum(), hand.size())
+        self.assertEqual(
+            self.block(features, 'decks')[copper],
+            self.game_state.get_deck_distribution('p1').count(CopperCard)
+        )
+        sizes = self.block(features, 'sizes')
+        self.assertEqual(sizes[0], hand.size())
+        draw_pile = self.game_state.get_location(Location('p2', LocationName.DRAW_PILE))
+        self.assertEqual(sizes[4], draw_pile.size(), "Other players' draw piles are counted.")
+        self.assertEqual(sizes[2], UNKNOWN_SIZE, "Discard piles can't be counted.")
+
+    def test_players_are_relative_to_the_viewer(self):
+        p1_features = self.encoder.encode(self.game_state.get_state_known_to('p1')).copy()
+        p2_features = self.encoder.encode(self.game_state.get_state_known_to('p2')).copy()
+        num_cards = self.encoder.num_cards
+        p1_decks = self.block(p1_features, 'decks')
+        p2_decks = self.block(p2_features, 'decks')
+        self.assertTrue((p1_decks[:num_cards] == p2_decks[num_cards:]).all())
+        self.assertTrue((p1_decks[num_cards:] == p2_decks[:num_cards]).all())
+        self.assertNotEqual(
+            self.block(p1_features, 'active')[0], self.block(p2_features, 'active')[0]
+        )
+
+    def test_buffer_is_reused(self):
+        first = self.encoder.encode(self.game_state.get_state_known_to('p1'))
+        second = self.encoder.encode(played_game_state(2).get_state_known_to('p2'))
+        self.assertIs(first, second)
+        batch = self.encoder.encode_many([
+            self.game_state.get_state_known_to('p1'),
+            self.game_state.get_state_known_to('p2'),
+        ])
+        self.assertEqual(batch.shape, (2, self.encoder.size))
+        self.assertTrue(
+            (batch[0] == self.encoder.encode(self.game_state.get_state_known_to('p1'))).all()
+        )
+
+    def test_counter_distributions(self):
+        known_state = self.game_state.get_state_known_to('p1')
+        known_state.resolve()
+        known_state._deck_distributions['p1'] = CardDistribution([EstateCard] * 2)
+        features = self.encoder.encode(known_state)
+        self.assertEqual(self.block(features, 'decks')[CARD_INDEX.get_id(EstateCard)], 2)
+        self.assertEqual(self.block(features, 'decks')[CARD_INDEX.get_id(CopperCard)], 0)
+
+    def test_too_many_players(self):
+        known_state = self.game_state.get_state_known_to('p1')
+        self.assertRaises(ValueError, FeatureEncoder(num_players=1).encode, known_state)
+
+
+if __name__ == '__main__':
+    unittest.main()
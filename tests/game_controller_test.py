@@ -3,8 +3,14 @@ import random
 import unittest
 
 from base_set.cards import KINGDOM_CARDS
+from core.agents.big_money import DumbMoneyAgent
 from core.agents.test import TestAgent
+from core.counters import CounterId
+from core.counters import CounterName
 from core.game_controller import GameController
+from core.game_controller import TurnPhase
+from core.locations import Location
+from core.locations import LocationName
 
 
 class TestLogger:
@@ -18,6 +24,29 @@ class TestLogger:
         return self._log
 
 
+class DuckTypedAgent:
+    """
+    An agent that doesn't extend `BaseAgent`, so has no set_rng or event_sink.
+    """
+    def __init__(self, name):
+        self._agent = DumbMoneyAgent(name)
+
+    def name(self):
+        return self._agent.name()
+
+    def make_decision(self, decision, known_state=None):
+        return self._agent.make_decision(decision, known_state)
+
+
+class ClosingAgent(DumbMoneyAgent):
+    def __init__(self, name):
+        super(ClosingAgent, self).__init__(name)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
 class GameControllerTest(unittest.TestCase):
     def create_controller(self):
         gc = GameController(
@@ -35,6 +64,50 @@ class GameControllerTest(unittest.TestCase):
         controller = self.create_controller()
         winner = controller.run()
 
+    def test_play_turn_from_buy_phase(self):
+        random.seed(1221)
+        controller = GameController(
+            players=[DumbMoneyAgent('p1'), DumbMoneyAgent('p2')],
+            card_set=KINGDOM_CARDS,
+            log=TestLogger(),
+        )
+        controller.setup_game()
+        game_state = controller.game_state
+        game_state.reset_counters_for_new_turn()
+        game_state.set_counter(CounterId(None, CounterName.COINS), 8)
+        controller.play_turn(controller.players[0], from_phase=TurnPhase.BUY)
+        self.assertEqual(game_state.get_deck_size('p1'), 11)
+        self.assertEqual(game_state.get_victory_points('p1'), 9, 'Bought a Province.')
+        self.assertEqual(game_state.get_location(Location('p1', LocationName.HAND)).size(), 5)
+
+    def test_same_seed_plays_same_game(self):
+        results = []
+        for i in range(2):
+            controller = GameController(
+                players=[TestAgent('p1'), DumbMoneyAgent('p2')],
+                card_set=KINGDOM_CARDS,
+                log=TestLogger(),
+                seed=1221,
+            )
+            winners = controller.run()
+            results.append((winners, controller.turn_number, controller.log.get_log()))
+        self.assertEqual(results[0], results[1])
+
+    def test_run_game_with_duck_typed_agent(self):
+        controller = GameController(
+            players=[DuckTypedAgent('p1'), DumbMoneyAgent('p2')],
+            card_set=KINGDOM_CARDS,
+            log=TestLogger(),
+            seed=1221,
+        )
+        winners = controller.run()
+        self.assertTrue(set(winners) <= set(['p1', 'p2']))
+
+    def test_run_closes_agents(self):
+        players = [ClosingAgent('p1'), ClosingAgent('p2')]
+        GameController(players, KINGDOM_CARDS, TestLogger(), verbose=False, seed=1221).run()
+        self.assertTrue(all(player.closed for player in players))
+
     def test_get_winner_indices(self):
         controller = self.create_controller()
         winners = controller.get_winner_indices(
@@ -1,11 +1,18 @@
+import pickle
 import random
 import unittest
 
+from base_set.cards import CopperCard
+from base_set.cards import EstateCard
+from base_set.cards import GardensCard
+from base_set.cards import ProvinceCard
 from base_set.cards import SilverCard
 from core.agents.test import TestAgent
 from core.card_distribution import CardDistribution
 from core.card_stack import StackPosition
 from core.card_stack import UnorderedCardStack
+from core.counters import CounterId
+from core.counters import CounterName
 from core.events import CardEventType
 from core.events import CardKnowledgeEvent
 from core.events import CardKnowledgeEventType
@@ -79,6 +86,25 @@ class GameStateTest(unittest.TestCase):
             'Only shuffle event was logged.'
         )
 
+    def test_only_subscribed_events_are_logged(self):
+        game_state = self.create_default_game_state()
+        logger = TestLogger()
+        logger.event_classes = (ShuffleEvent,)
+        game_state.set_logger(logger)
+        current_player = game_state.get_current_player_name()
+        draw_pile_location = Location(current_player, LocationName.DRAW_PILE)
+        draw_pile = game_state.get_location(draw_pile_location)
+        for i in range(10):
+            draw_pile.add(i)
+        game_state.shuffle(draw_pile_location)
+        game_state.draw(5)
+        self.assertEqual(
+            logger.get_log(), [ShuffleEvent(draw_pile_location)],
+            'Card move events are not logged when the logger does not consume them.'
+        )
+        hand = game_state.get_location(Location(current_player, LocationName.HAND))
+        self.assertEqual(hand.size(), 5, 'Game state still changes when events are skipped.')
+
     def test_draw_when_enough_cards_in_draw_pile(self):
         game_state = self.create_default_game_state()
         current_player = game_state.get_current_player_name()
@@ -177,6 +203,75 @@ class GameStateTest(unittest.TestCase):
         self.assertEqual(hand_info.stack, None,
             'Player can not see contents of opponent\'s hand.')
 
+    def test_state_known_to_is_read_before_game_state_changes(self):
+        game_state = self.create_default_game_state()
+        current_player = game_state.get_current_player_name()
+        hand_location = Location(current_player, LocationName.HAND)
+        game_state.get_location(hand_location).add(1)
+        viewable_state = game_state.get_state_known_to(current_player)
+        game_state.play(1)
+        hand_info = viewable_state.get_location_info(hand_location)
+        self.assertEqual(hand_info.size, 1,
+            'View reflects the game state at the time it was created.')
+        self.assertEqual(hand_info.stack.distribution.count(1), 1)
+        in_play_info = viewable_state.get_location_info(
+            Location(current_player, LocationName.IN_PLAY)
+        )
+        self.assertEqual(in_play_info.size, 0)
+
+    def test_supply_of_unread_view(self):
+        supply = UnorderedCardStack([ProvinceCard, ProvinceCard, SilverCard])
+        game_state = GameState(
+            player_names=['p1', 'p2'], supply=supply, starting_deck=[CopperCard] * 10,
+            logger=TestLogger()
+        )
+        viewable_state = game_state.get_state_known_to('p1')
+        supply_distribution = viewable_state.get_supply_distribution()
+        self.assertIsNotNone(viewable_state._game_state, 'Only the supply is read.')
+        game_state.gain(ProvinceCard, player='p1')
+        self.assertEqual(supply_distribution.count(ProvinceCard), 2)
+        self.assertEqual(viewable_state.get_supply_distribution().count(ProvinceCard), 2)
+
+    def test_state_known_to_has_every_players_deck(self):
+        supply = UnorderedCardStack([ProvinceCard, SilverCard])
+        game_state = GameState(
+            player_names=['p1', 'p2'], supply=supply, starting_deck=[CopperCard] * 10,
+            logger=TestLogger()
+        )
+        game_state.draw(5)
+        game_state.gain(ProvinceCard, player='p2')
+        viewable_state = game_state.get_state_known_to('p1')
+        self.assertEqual(viewable_state.player_names, ['p1', 'p2'])
+        deck = viewable_state.get_deck_distribution('p2')
+        self.assertEqual(deck.count(CopperCard), 10)
+        self.assertEqual(deck.count(ProvinceCard), 1)
+
+        copy = pickle.loads(pickle.dumps(viewable_state))
+        self.assertEqual(copy.get_deck_distribution('p2'), deck)
+        hand_location = Location('p1', LocationName.HAND)
+        self.assertEqual(
+            list(copy.get_location_info(hand_location).stack),
+            list(game_state.get_location(hand_location))
+        )
+
+    def test_from_stacks(self):
+        stacks = {
+            Location(None, LocationName.SUPPLY): UnorderedCardStack([SilverCard]),
+            Location('p2', LocationName.HAND): UnorderedCardStack([CopperCard, EstateCard]),
+            Location('p2', LocationName.DISCARD): UnorderedCardStack([ProvinceCard]),
+        }
+        game_state = GameState.from_stacks(
+            ['p1', 'p2'], stacks, {CounterId(None, CounterName.COINS): 2}, 1
+        )
+        self.assertEqual(game_state.get_current_player_name(), 'p2')
+        self.assertEqual(game_state.get_counter(CounterId(None, CounterName.COINS)), 2)
+        self.assertEqual(game_state.get_counter(CounterId(None, CounterName.BUYS)), 0)
+        self.assertEqual(game_state.get_deck_size('p2'), 3)
+        self.assertEqual(game_state.get_victory_points('p2'), 7)
+        self.assertEqual(game_state.get_deck_size('p1'), 0)
+        game_state.buy(SilverCard)
+        self.assertEqual(game_state.get_deck_size('p2'), 4)
+
     def test_gain_to_top_of_deck(self):
         game_state = self.create_default_game_state()
         original_deck = game_state.get_location(
@@ -190,6 +285,175 @@ class GameStateTest(unittest.TestCase):
         self.assertEqual(new_deck[0], SilverCard)
         self.assertEqual(new_deck[1:], [1])
 
+    def test_deck_size_and_victory_points(self):
+        supply = UnorderedCardStack([ProvinceCard, GardensCard, GardensCard, CopperCard])
+        starting_deck = [CopperCard] * 7 + [EstateCard] * 3
+        game_state = GameState(
+            player_names=['p1', 'p2'], supply=supply, starting_deck=starting_deck,
+            logger=TestLogger()
+        )
+        self.assertEqual(game_state.get_deck_size('p1'), 10)
+        self.assertEqual(game_state.get_victory_points('p1'), 3)
+        game_state.gain(ProvinceCard)
+        game_state.gain(GardensCard)
+        self.assertEqual(game_state.get_deck_size('p1'), 12)
+        self.assertEqual(game_state.get_victory_points('p1'), 3 + 6 + 1)
+        game_state.gain(GardensCard, player='p2')
+        self.assertEqual(game_state.get_victory_points('p2'), 3 + 1)
+        game_state.draw(5)
+        game_state.trash(CopperCard)
+        self.assertEqual(game_state.get_deck_size('p1'), 11)
+        self.assertEqual(game_state.get_deck_size('p1'), len(game_state.get_deck('p1')))
+        self.assertEqual(game_state.get_victory_points('p1'), 3 + 6 + 1)
+        game_state.trash(CopperCard)
+        game_state.trash(CopperCard)
+        self.assertEqual(
+            game_state.get_victory_points('p1'), 3 + 6,
+            'Gardens is worth less once the deck drops below 10 cards.'
+        )
+
+    def test_snapshot_and_restore(self):
+        supply = UnorderedCardStack([ProvinceCard, SilverCard])
+        game_state = GameState(
+            player_names=['p1', 'p2'], supply=supply, starting_deck=[CopperCard] * 10,
+            logger=TestLogger()
+        )
+        game_state.draw(5)
+        snapshot = game_state.snapshot()
+        hand_location = Location('p1', LocationName.HAND)
+        hand = list(game_state.get_location(hand_location))
+        draw_pile = list(game_state.get_location(Location('p1', LocationName.DRAW_PILE)))
+        for _ in range(2):
+            game_state.gain(ProvinceCard)
+            game_state.play(CopperCard)
+            game_state.update_counter(CounterId(None, CounterName.COINS), 1)
+            self.assertEqual(game_state.get_victory_points('p1'), 6)
+            game_state.restore(snapshot)
+            self.assertEqual(list(game_state.get_location(hand_location)), hand)
+            self.assertEqual(
+                list(game_state.get_location(Location('p1', LocationName.DRAW_PILE))), draw_pile
+            )
+            self.assertEqual(
+                game_state.get_location(Location(None, LocationName.SUPPLY)).size(), 2
+            )
+            self.assertEqual(game_state.get_counter(CounterId(None, CounterName.COINS)), 0)
+            self.assertEqual(game_state.get_victory_points('p1'), 0)
+            self.assertEqual(game_state.get_deck_size('p1'), 10)
+
+    def test_fork(self):
+        supply = UnorderedCardStack([SilverCard, SilverCard])
+        game_state = GameState(
+            player_names=['p1', 'p2'], supply=supply, starting_deck=[], logger=TestLogger()
+        )
+        game_state.set_counter(CounterId(None, CounterName.COINS), 0)
+        fork = game_state.fork()
+        fork.gain(SilverCard)
+        fork.update_counter(CounterId(None, CounterName.COINS), 3)
+        supply = game_state.get_location(Location(None, LocationName.SUPPLY))
+        self.assertEqual(
+            supply.distribution.count(SilverCard), 2, 'Fork does not change the original.'
+        )
+        self.assertEqual(game_state.get_counter(CounterId(None, CounterName.COINS)), 0)
+        self.assertEqual(game_state.get_deck_size('p1'), 0)
+        self.assertEqual(len(game_state.logger.get_log()), 1, 'Fork does not log to the original.')
+        fork_supply = fork.get_location(Location(None, LocationName.SUPPLY))
+        self.assertEqual(fork_supply.distribution.count(SilverCard), 1)
+        self.assertEqual(fork.get_deck_size('p1'), 1)
+
+    def _get_full_state(self, game_state):
+        locations = {
+            location: list(stack) for location, stack in game_state._locations.items()
+        }
+        victory_points = [game_state.get_victory_points(name) for name in game_state.player_names]
+        deck_sizes = [game_state.get_deck_size(name) for name in game_state.player_names]
+        return locations, dict(game_state._counters), victory_points, deck_sizes
+
+    def test_mark_and_rollback(self):
+        supply = UnorderedCardStack([ProvinceCard, GardensCard, SilverCard])
+        game_state = GameState(
+            player_names=['p1', 'p2'], supply=supply,
+            starting_deck=[CopperCard] * 4 + [EstateCard] * 3, logger=TestLogger()
+        )
+        game_state.set_agents([TestAgent('p1'), TestAgent('p2')])
+        game_state.reset_counters_for_new_turn()
+        game_state.draw(5)
+        game_state.discard([CopperCard, EstateCard])
+        game_state.gain(SilverCard)
+        before = self._get_full_state(game_state)
+
+        mark = game_state.mark()
+        game_state.play(CopperCard)
+        game_state.update_counter(CounterId(None, CounterName.COINS), 1)
+        game_state.set_counter(CounterId(None, CounterName.BUYS), 3)
+        game_state.gain(ProvinceCard)
+        game_state.trash(EstateCard)
+        # Take a card out of the middle of the discard and put it on top of the draw pile
+        game_state.move(
+            cards=[EstateCard],
+            number=None,
+            from_location=Location('p1', LocationName.DISCARD),
+            from_position=None,
+            to_location=Location('p1', LocationName.DRAW_PILE),
+            to_position=StackPosition.TOP,
+            event_type=CardEventType.MOVE
+        )
+        inner_mark = game_state.mark()
+        game_state.gain(GardensCard, player='p2')
+        game_state.draw(5)
+        game_state.rollback(inner_mark)
+        self.assertEqual(game_state.get_victory_points('p2'), 3)
+        game_state.draw(5)
+        self.assertNotEqual(self._get_full_state(game_state), before)
+
+        log_length = len(game_state.logger.get_log())
+        game_state.rollback(mark)
+        self.assertEqual(self._get_full_state(game_state), before)
+        self.assertEqual(
+            len(game_state.logger.get_log()), log_length, 'Rolling back does not log anything.'
+        )
+
+    def test_rollback_restores_order(self):
+        rng = random.Random(5)
+        game_state = GameState(
+            player_names=['p1', 'p2'], supply=UnorderedCardStack([ProvinceCard]),
+            starting_deck=[CopperCard] * 4 + [EstateCard] * 3 + [SilverCard] * 3,
+            logger=TestLogger(), rng=rng
+        )
+        draw_pile = Location('p1', LocationName.DRAW_PILE)
+        discard = Location('p1', LocationName.DISCARD)
+        game_state.move(
+            None, 4, draw_pile, StackPosition.TOP, discard, StackPosition.TOP,
+            CardEventType.MOVE
+        )
+        before = self._get_full_state(game_state)
+        mark = game_state.mark()
+        for i in range(60):
+            from_location, to_location = rng.sample([draw_pile, discard], 2)
+            stack = game_state.get_location(from_location)
+            action = rng.randrange(3)
+            if action == 0 and stack.size():
+                # A card from anywhere in the stack
+                cards = [rng.choice(list(stack))]
+                game_state.move(
+                    cards, None, from_location, None, to_location,
+                    rng.choice(list(StackPosition)), CardEventType.MOVE
+                )
+            elif action == 1 and stack.size():
+                game_state.move(
+                    None, rng.randint(1, stack.size()), from_location,
+                    rng.choice(list(StackPosition)), to_location, rng.choice(list(StackPosition)),
+                    CardEventType.MOVE
+                )
+            else:
+                game_state.shuffle(from_location)
+        for event, undo_info in game_state._journal:
+            if isinstance(event, CardMoveEvent):
+                self.assertEqual(
+                    len(undo_info), len(event.cards), 'Only the moved cards are journaled.'
+                )
+        game_state.rollback(mark)
+        self.assertEqual(self._get_full_state(game_state), before)
+
     def test_reveal_hand(self):
         game_state = self.create_default_game_state()
         hand_location = Location(game_state.get_current_player_name(), LocationName.HAND)
@@ -0,0 +1,66 @@
+import contextlib
+import io
+import unittest
+
+from base_set.cards import KINGDOM_CARDS
+from core.agents.big_money import DumbMoneyAgent
+from core.agents.test import TestAgent
+from core.game_controller import GameController
+from core.loggers.human import BufferedHumanReadableLogger
+from core.loggers.human import HumanReadableLogger
+
+
+class BrokenStream:
+    def write(self, text):
+        raise BrokenPipeError()
+
+    def flush(self):
+        pass
+
+
+class BufferedHumanReadableLoggerTest(unittest.TestCase):
+    def play_game(self, log):
+        controller = GameController(
+            players=[TestAgent('p1'), DumbMoneyAgent('p2')],
+            card_set=KINGDOM_CARDS,
+            log=log,
+            verbose=False,
+            seed=1221,
+        )
+        controller.run()
+
+    def test_same_output_as_human_readable_logger(self):
+        expected = io.StringIO()
+        with contextlib.redirect_stdout(expected):
+            self.play_game(HumanReadableLogger())
+        stream = io.StringIO()
+        log = BufferedHumanReadableLogger(stream, batch_size=7)
+        self.play_game(log)
+        self.assertEqual(stream.getvalue(), expected.getvalue(), 'Flushed at game end.')
+        log.close()
+
+    def test_flush(self):
+        stream = io.StringIO()
+        log = BufferedHumanReadableLogger(stream, batch_size=100)
+        log.format_event = lambda event: str(event)
+        log.log(0)
+        log.flush()
+        self.assertEqual(stream.getvalue(), '0\n', 'A partial batch is written.')
+        log.close()
+        log.log(1)
+        log.close()
+        self.assertEqual(stream.getvalue(), '0\n', 'Nothing is written once closed.')
+
+    def test_write_error(self):
+        log = BufferedHumanReadableLogger(BrokenStream(), batch_size=1, max_queued_batches=4)
+        log.format_event = lambda event: str(event)
+        with self.assertRaises(BrokenPipeError):
+            for event in range(20):
+                log.log(event)
+        self.assertRaises(BrokenPipeError, log.flush)
+        self.assertRaises(BrokenPipeError, log.close)
+        self.assertFalse(log._thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import functools
+import multiprocessing
+import random
+import unittest
+
+from base_set.cards import CopperCard
+from base_set.cards import DuchyCard
+from base_set.cards import EstateCard
+from base_set.cards import GoldCard
+from base_set.cards import ProvinceCard
+from base_set.cards import SilverCard
+from core.agents.ismcts import IsmctsAgent
+from core.agents.ismcts import RolloutAgent
+from core.agents.ismcts import search
+from core.card_stack import SupplyCardStack
+from core.counters import CounterId
+from core.counters import CounterName
+from core.decision import BuyDecision
+from core.game_state import GameState
+from core.locations import Location
+from core.locations import LocationName
+from core.loggers.null import NullLogger
+from core.tournament import run_tournament
+from tests.determinization_test import create_game_state
+
+
+# Simulations per decision in the match against the default policy, enough for the search to
+# overrule the policy's choice. The other settings are the defaults.
+MATCH_ITERATIONS = 100
+# Games in the match, enough to tell a search that follows the noise of its simulations from
+# one that keeps up with its policy.
+MATCH_GAMES = 40
+
+
+def create_endgame_state():
+    """
+    p1 has 8 coins and a better deck but is 6 victory points behind with one Province left, so
+    big money would buy it and end the game as the loser.
+    """
+    supply = SupplyCardStack(
+        [ProvinceCard] * 4 + [DuchyCard] * 8 + [EstateCard] * 8 + [GoldCard] * 10 +
+        [SilverCard] * 10
+    )
+    game_state = GameState(
+        player_names=['p1', 'p2'], supply=supply,
+        starting_deck=[CopperCard] * 7 + [EstateCard] * 3, logger=NullLogger()
+    )
+    for card in [ProvinceCard, GoldCard, GoldCard, SilverCard, SilverCard]:
+        game_state.gain(card, player='p1')
+    for card in [ProvinceCard, ProvinceCard, DuchyCard]:
+        game_state.gain(card, player='p2')
+    for player in game_state.player_names:
+        game_state.shuffle(Location(player, LocationName.DRAW_PILE))
+        game_state.draw(5, player)
+    game_state.reset_counters_for_new_turn()
+    game_state.set_counter(CounterId(None, CounterName.COINS), 8)
+    return game_state
+
+
+class IsmctsAgentTest(unittest.TestCase):
+    def create_buy_decision(self, game_state):
+        supply = game_state.get_location(Location(None, LocationName.SUPPLY))
+        options = supply.cards_costing_at_most(game_state, 8)
+        return BuyDecision(options, 0, 1)
+
+    def test_search(self):
+        random.seed(3)
+        game_state = create_game_state()
+        view = game_state.get_state_known_to('p1')
+        result = search(view, BuyDecision, iterations=20, seed=1, prior_weight=0)
+        self.assertEqual(sum(visits for visits, wins in result.values()), 20)
+        for option in result:
+            self.assertIn(option, [ProvinceCard, DuchyCard, GoldCard, SilverCard, None])
+
+    def test_search_starts_from_the_default_policy(self):
+        random.seed(3)
+        game_state = create_game_state()
+        game_state.set_counter(CounterId(None, CounterName.COINS), 6)
+        view = game_state.get_state_known_to('p1')
+        result = search(view, BuyDecision, iterations=20, seed=1, prior_weight=1)
+        self.assertEqual(sum(visits for visits, wins in result.values()), 40)
+        self.assertTrue(result[GoldCard][0] >= 20, 'Big money buys Gold with 6 coins.')
+
+    def test_search_leaves_the_default_policy_when_it_loses(self):
+        random.seed(3)
+        game_state = create_endgame_state()
+        view = game_state.get_state_known_to('p1')
+        result = search(view, BuyDecision, iterations=200, seed=1)
+        self.assertEqual(
+            max(result, key=result.get), DuchyCard,
+            'Buying the last Province loses, a Duchy keeps the lead.'
+        )
+
+    def test_make_decision(self):
+        random.seed(3)
+        game_state = create_game_state()
+        decision = self.create_buy_decision(game_state)
+        agent = IsmctsAgent('p1', iterations=10, seed=1)
+        choice = agent.make_decision(decision, game_state.get_state_known_to('p1'))
+        self.assertTrue(decision.is_valid(choice))
+
+    def test_make_decision_on_worker_pool(self):
+        random.seed(3)
+        game_state = create_game_state()
+        decision = self.create_buy_decision(game_state)
+        with IsmctsAgent('p1', iterations=5, workers=2, seed=1) as agent:
+            for _ in range(2):
+                choice = agent.make_decision(decision, game_state.get_state_known_to('p1'))
+                self.assertTrue(decision.is_valid(choice))
+        self.assertIsNone(agent._pool)
+
+    def test_keeps_up_with_the_default_policy(self):
+        standings = run_tournament(
+            [functools.partial(IsmctsAgent, iterations=MATCH_ITERATIONS), RolloutAgent],
+            games_per_pairing=MATCH_GAMES, agent_names=['ismcts', 'rollout'],
+            workers=multiprocessing.cpu_count(), seed=3
+        )
+        self.assertTrue(standings.score('ismcts', 'rollout') >= 0.45)
+
+    def test_needs_a_budget(self):
+        with self.assertRaises(ValueError):
+            IsmctsAgent('p1', iterations=None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import random
+import unittest
+
+from base_set.cards import DuchyCard
+from base_set.cards import GoldCard
+from base_set.cards import ProvinceCard
+from base_set.cards import SilverCard
+from base_set.cards import SmithyCard
+from core.agents.big_money import DumbMoneyAgent
+from core.simulation import run_games
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from core.lockstep import BuyRule
+    from core.lockstep import DUMB_MONEY_BUY_TABLE
+    from core.lockstep import LockstepSimulator
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class LockstepSimulatorTest(unittest.TestCase):
+    def test_agrees_with_game_controller(self):
+        random.seed(7)
+        controller_summary = run_games(
+            [DumbMoneyAgent, DumbMoneyAgent], ['p1', 'p2'], num_games=300, swap_seats=False
+        )
+        simulator = LockstepSimulator([DUMB_MONEY_BUY_TABLE] * 2, ['p1', 'p2'], seed=7)
+        lockstep_summary = simulator.run(20000, swap_seats=False)
+        self.assertEqual(lockstep_summary.num_games, 20000)
+        # Over 300 games the standard error of a rate is at most 0.03.
+        for name in ['p1', 'p2']:
+            self.assertAlmostEqual(
+                lockstep_summary.win_rate(name), controller_summary.win_rate(name), delta=0.1
+            )
+        self.assertAlmostEqual(
+            lockstep_summary.tie_rate(), controller_summary.tie_rate(), delta=0.1
+        )
+        self.assertAlmostEqual(
+            lockstep_summary.average_game_length(),
+            controller_summary.average_game_length(),
+            delta=1.5
+        )
+
+    def test_buy_table_conditions(self):
+        duchy_dancing = [
+            BuyRule(ProvinceCard),
+            BuyRule(DuchyCard, max_provinces_left=4),
+            BuyRule(GoldCard),
+            BuyRule(SilverCard),
+        ]
+        simulator = LockstepSimulator(
+            [duchy_dancing, DUMB_MONEY_BUY_TABLE], ['duchy', 'dumb'], seed=1
+        )
+        summary = simulator.run(2000)
+        self.assertGreater(summary.win_rate('duchy'), summary.win_rate('dumb'))
+
+    def test_rejects_action_cards(self):
+        with self.assertRaises(ValueError):
+            LockstepSimulator([[BuyRule(SmithyCard)], DUMB_MONEY_BUY_TABLE], ['p1', 'p2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
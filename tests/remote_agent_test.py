@@ -0,0 +1,244 @@
+import asyncio
+import functools
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import unittest
+
+from base_set.cards import KINGDOM_CARDS
+from base_set.cards import CopperCard
+from base_set.cards import SilverCard
+from base_set.cards.mine import MineGainDecision
+from core.agent_server import AgentServer
+from core.agents.big_money import DumbMoneyAgent
+from core.agents.remote import AsyncRemoteAgent
+from core.agents.remote import RemoteAgent
+from core.agents.test import TestAgent
+from core.async_game_controller import AsyncGameController
+from core.decision import BuyDecision
+from core.game_controller import GameController
+from core.loggers.null import NullLogger
+from core.remote import ConnectionPool
+from core.remote import RemoteAgentError
+from core.remote import close_pools
+from core.remote import decode_decision
+from core.remote import decode_state
+from core.remote import encode_decision
+from core.remote import encode_state
+from core.remote import get_pool
+from core.simulation import run_games
+
+
+class FailingAgent(TestAgent):
+    def make_decision(self, decision, known_state=None):
+        raise ValueError('No decision.')
+
+
+class RecordingAgent(TestAgent):
+    """
+    Keeps every state it was shown, shared by all instances.
+    """
+    known_states = []
+
+    def make_decision(self, decision, known_state=None):
+        RecordingAgent.known_states.append(known_state)
+        return super(RecordingAgent, self).make_decision(decision, known_state)
+
+
+class ClosingAgent(TestAgent):
+    """
+    Counts the agents closed, shared by all instances.
+    """
+    num_closed = 0
+
+    def close(self):
+        ClosingAgent.num_closed += 1
+
+
+AGENT_FACTORIES = {
+    'test': TestAgent,
+    'failing': FailingAgent,
+    'recording': RecordingAgent,
+    'closing': ClosingAgent,
+}
+
+
+class ProtocolTest(unittest.TestCase):
+    def test_decision_round_trip(self):
+        decision = MineGainDecision.__new__(MineGainDecision)
+        decision.options = [CopperCard, SilverCard, CopperCard]
+        decision.min = 0
+        decision.max = 1
+        decoded = decode_decision(encode_decision(decision))
+        self.assertIs(type(decoded), MineGainDecision)
+        self.assertEqual(decoded.options, decision.options)
+        self.assertEqual((decoded.min, decoded.max), (0, 1))
+
+    def test_only_known_classes_are_decoded(self):
+        message = encode_decision(BuyDecision([CopperCard], 0, 1))
+        message['options'] = ['antigravity.Card']
+        with self.assertRaisesRegex(RemoteAgentError, 'antigravity.Card is not a known card'):
+            decode_decision(message)
+        self.assertNotIn('antigravity', sys.modules, 'Nothing is imported for a message.')
+        message = encode_decision(BuyDecision([CopperCard], 0, 1))
+        message['class'] = 'core.simulation.BatchSummary'
+        with self.assertRaisesRegex(RemoteAgentError, 'is not a known decision'):
+            decode_decision(message)
+
+    def test_state_round_trip(self):
+        controller = GameController(
+            [TestAgent('p1'), TestAgent('p2')], KINGDOM_CARDS, NullLogger(), verbose=False,
+            seed=3
+        )
+        controller.setup_game()
+        controller.turn_number = 1
+        controller.play_until_game_over(max_turns=6)
+        known_state = controller.game_state.get_state_known_to('p1')
+        decoded = decode_state(encode_state(known_state))
+        self.assertEqual(decoded.active_player, known_state.active_player)
+        self.assertEqual(decoded.player_names, ['p1', 'p2'])
+        self.assertEqual(decoded.counters, known_state.counters)
+        for info in known_state.iter_location_info():
+            decoded_info = decoded.get_location_info(info.location)
+            self.assertEqual(decoded_info.size, info.size)
+            self.assertEqual(decoded_info.top_card, info.top_card)
+            if info.stack is None:
+                self.assertIsNone(decoded_info.stack)
+            else:
+                self.assertIs(type(decoded_info.stack), type(info.stack))
+                self.assertEqual(list(decoded_info.stack), list(info.stack))
+        self.assertEqual(
+            decoded.get_deck_distribution('p2').cards_to_counts(),
+            known_state.get_deck_distribution('p2').cards_to_counts()
+        )
+
+
+class RemoteAgentTest(unittest.TestCase):
+    def setUp(self):
+        self.server = AgentServer(AGENT_FACTORIES, '127.0.0.1:0')
+        self.server.start()
+        self.pool = ConnectionPool(self.server.address, size=1)
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.shutdown()
+
+    def remote_agent(self, name, agent='test'):
+        return RemoteAgent(name, agent, pool=self.pool)
+
+    def test_remote_agent_sees_the_game(self):
+        RecordingAgent.known_states = []
+        agent = self.remote_agent('p1', 'recording')
+        controller = GameController(
+            [agent, DumbMoneyAgent('p2')], KINGDOM_CARDS, NullLogger(), verbose=False, seed=3
+        )
+        controller.run()
+        self.assertEqual(self.server.num_sessions, 0, 'The session is closed with the game.')
+        self.assertTrue(RecordingAgent.known_states)
+        known_state = RecordingAgent.known_states[-1]
+        self.assertEqual(known_state.viewing_player, 'p1')
+
+    def test_seeded_games_match(self):
+        agent_class = functools.partial(RemoteAgent, agent='test', pool=self.pool)
+        first = run_games([agent_class, DumbMoneyAgent], ['p1', 'p2'], num_games=4, seed=7)
+        second = run_games([agent_class, DumbMoneyAgent], ['p1', 'p2'], num_games=4, seed=7)
+        self.assertEqual(first.total_turns, second.total_turns)
+        self.assertEqual(first.wins, second.wins)
+
+    def test_shared_pool(self):
+        agent_class = functools.partial(RemoteAgent, agent='test', address=self.server.address)
+        summary = run_games([agent_class, DumbMoneyAgent], ['p1', 'p2'], num_games=2, seed=7)
+        self.assertEqual(summary.num_games, 2)
+        self.assertEqual(self.server.num_sessions, 0)
+        pool = get_pool(self.server.address)
+        self.assertTrue(pool._connections, 'The pool stays open after the games.')
+        close_pools()
+        self.assertEqual(pool._connections, [])
+        self.assertIsNot(get_pool(self.server.address), pool)
+        close_pools()
+
+    def test_server_closes_agents(self):
+        ClosingAgent.num_closed = 0
+        controller = GameController(
+            [self.remote_agent('p1', 'closing'), DumbMoneyAgent('p2')], KINGDOM_CARDS,
+            NullLogger(), verbose=False, seed=3
+        )
+        controller.run()
+        self.assertEqual(ClosingAgent.num_closed, 1, 'Closing the session closes the agent.')
+
+        server = AgentServer(AGENT_FACTORIES, '127.0.0.1:0', max_sessions=1)
+        server.start()
+        decision = BuyDecision([CopperCard], 0, 1)
+        for session in ('a', 'b'):
+            response = server.handle_request({
+                'type': 'decide', 'id': 1, 'session': session, 'agent': 'closing',
+                'name': 'p1', 'decision': encode_decision(decision), 'state': None,
+            })
+            self.assertNotIn('error', response)
+        self.assertEqual(ClosingAgent.num_closed, 2, 'A dropped session closes the agent.')
+        server.shutdown()
+        self.assertEqual(ClosingAgent.num_closed, 3, 'Shutting down closes every agent.')
+
+    def test_unused_agent_does_not_connect(self):
+        self.remote_agent('p1').close()
+        self.assertEqual(self.pool._connections, [])
+
+    def test_errors(self):
+        controller = GameController(
+            [self.remote_agent('p1', 'failing'), DumbMoneyAgent('p2')], KINGDOM_CARDS,
+            NullLogger(), verbose=False
+        )
+        with self.assertRaisesRegex(RemoteAgentError, 'No decision'):
+            controller.run()
+        controller = GameController(
+            [self.remote_agent('p1', 'missing'), DumbMoneyAgent('p2')], KINGDOM_CARDS,
+            NullLogger(), verbose=False
+        )
+        with self.assertRaisesRegex(RemoteAgentError, 'No agent named missing'):
+            controller.run()
+
+    def test_games_share_a_connection(self):
+        controllers = [
+            AsyncGameController(
+                [AsyncRemoteAgent('p1', 'test', pool=self.pool), DumbMoneyAgent('p2')],
+                KINGDOM_CARDS, NullLogger(), verbose=False, seed=seed
+            )
+            for seed in range(8)
+        ]
+
+        async def play_all():
+            return await asyncio.gather(*[controller.run() for controller in controllers])
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(play_all())
+        finally:
+            loop.close()
+        self.assertEqual(len(self.pool._connections), 1)
+        self.assertEqual(self.server.num_sessions, 0)
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'Unix sockets are not available.')
+class UnixSocketTest(unittest.TestCase):
+    def test_unix_socket(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'agents.sock')
+        server = AgentServer(AGENT_FACTORIES, path)
+        server.start()
+        pool = ConnectionPool(path)
+        try:
+            controller = GameController(
+                [RemoteAgent('p1', 'test', pool=pool), DumbMoneyAgent('p2')], KINGDOM_CARDS,
+                NullLogger(), verbose=False, seed=1
+            )
+            self.assertTrue(controller.run())
+        finally:
+            pool.close()
+            server.shutdown()
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+
+from base_set.cards import KINGDOM_CARDS
+from core.agents.big_money import SimpleBmSmithyAgent
+from core.agents.test import TestAgent
+from core.counters import CounterId
+from core.counters import CounterName
+from core.events import EVENT_CLASSES
+from core.game_controller import GameController
+from core.game_controller import TurnPhase
+from core.locations import Location
+from core.locations import LocationName
+from core.loggers.null import NullLogger
+from core.replay import Replayer
+
+
+class ListLogger:
+    event_classes = EVENT_CLASSES
+
+    def __init__(self):
+        self.events = []
+
+    def log(self, event):
+        self.events.append(event)
+
+
+class RecordingController(GameController):
+    """
+    Keeps a snapshot of the game state at the start of every turn.
+    """
+    def play_turn(self, player, from_phase=TurnPhase.SETUP):
+        self.turn_snapshots.append(self.game_state.snapshot())
+        super(RecordingController, self).play_turn(player, from_phase)
+
+
+def state_summary(game_state):
+    locations = {}
+    for location in game_state._locations:
+        locations[location] = list(game_state.get_location(location))
+        if location.name != LocationName.DISCARD:
+            # Only the order of discard piles is known in every replayed turn.
+            locations[location].sort(key=repr)
+    counters = {
+        counter_name: game_state.get_counter(CounterId(None, counter_name))
+        for counter_name in CounterName
+    }
+    return (
+        locations,
+        counters,
+        game_state.get_current_player_name(),
+        [game_state.get_victory_points(player) for player in game_state.player_names],
+    )
+
+
+class ReplayerTest(unittest.TestCase):
+    def play_game(self, seed):
+        logger = ListLogger()
+        players = [TestAgent('p1'), SimpleBmSmithyAgent('p2')]
+        controller = RecordingController(
+            players, KINGDOM_CARDS, logger, verbose=False, seed=seed
+        )
+        controller.turn_snapshots = []
+        # A fresh controller with the same seed picks the same kingdom.
+        supply = GameController(
+            players, KINGDOM_CARDS, NullLogger(), verbose=False, seed=seed
+        ).get_starting_supply()
+        controller.run()
+        return controller, supply, logger.events
+
+    def test_state_at_turn(self):
+        controller, supply, events = self.play_game(3)
+        replayer = Replayer(
+            ['p1', 'p2'], supply, controller.get_starting_deck(), events, checkpoint_every=7
+        )
+        self.assertEqual(replayer.num_turns, len(controller.turn_snapshots))
+        expected = controller.game_state.fork()
+        for turn in [12, 1, 30, 29, 8, replayer.num_turns]:
+            expected.restore(controller.turn_snapshots[turn - 1])
+            self.assertEqual(
+                state_summary(replayer.state_at_turn(turn)), state_summary(expected),
+                'State at turn %d' % turn
+            )
+        final_state = replayer.state_at_event(len(events))
+        for player in ['p1', 'p2']:
+            self.assertEqual(
+                final_state.get_victory_points(player),
+                controller.game_state.get_victory_points(player)
+            )
+
+    def test_states_are_independent(self):
+        controller, supply, events = self.play_game(4)
+        replayer = Replayer(['p1', 'p2'], supply, controller.get_starting_deck(), events)
+        expected = state_summary(replayer.state_at_turn(5))
+        game_state = replayer.state_at_turn(5)
+        game_state.discard_location(Location('p1', LocationName.HAND))
+        self.assertEqual(state_summary(replayer.state_at_turn(5)), expected)
+
+    def test_turn_out_of_range(self):
+        controller, supply, events = self.play_game(5)
+        replayer = Replayer(['p1', 'p2'], supply, controller.get_starting_deck(), events)
+        with self.assertRaises(IndexError):
+            replayer.state_at_turn(0)
+        with self.assertRaises(IndexError):
+            replayer.state_at_turn(replayer.num_turns + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
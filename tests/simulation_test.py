@@ -0,0 +1,44 @@
+import unittest
+
+from core.agents.big_money import DumbMoneyAgent
+from core.agents.test import TestAgent
+from core.simulation import BatchSummary
+from core.simulation import GameResult
+from core.simulation import run_games
+
+
+class BatchSummaryTest(unittest.TestCase):
+    def test_add_result(self):
+        summary = BatchSummary(['p1', 'p2'])
+        summary.add_result(GameResult(['p1'], 20))
+        summary.add_result(GameResult(['p1', 'p2'], 30))
+        self.assertEqual(summary.num_games, 2)
+        self.assertEqual(summary.win_rate('p1'), 0.5)
+        self.assertEqual(summary.win_rate('p2'), 0.0)
+        self.assertEqual(summary.tie_rate(), 0.5)
+        self.assertEqual(summary.average_game_length(), 25)
+
+
+class RunGamesTest(unittest.TestCase):
+    def test_run_games_serially(self):
+        summary = run_games([DumbMoneyAgent, TestAgent], ['p1', 'p2'], num_games=4)
+        self.assertEqual(summary.num_games, 4)
+        self.assertEqual(summary.wins['p1'] + summary.wins['p2'] + summary.ties, 4)
+
+    def test_run_games_on_worker_pool(self):
+        summary = run_games([DumbMoneyAgent, TestAgent], ['p1', 'p2'], num_games=4, workers=2)
+        self.assertEqual(summary.num_games, 4)
+        self.assertTrue(summary.average_game_length() > 0)
+
+    def test_seeded_runs_match_for_any_number_of_workers(self):
+        serial = run_games([DumbMoneyAgent, TestAgent], ['p1', 'p2'], num_games=4, seed=5)
+        pooled = run_games(
+            [DumbMoneyAgent, TestAgent], ['p1', 'p2'], num_games=4, workers=2, seed=5
+        )
+        self.assertEqual(serial.wins, pooled.wins)
+        self.assertEqual(serial.ties, pooled.ties)
+        self.assertEqual(serial.total_turns, pooled.total_turns)
+
+
+if __name__ == '__main__':
+    unittest.main()
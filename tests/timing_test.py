@@ -0,0 +1,99 @@
+import unittest
+
+from base_set.cards import KINGDOM_CARDS
+from core.agents.big_money import DumbMoneyAgent
+from core.agents.test import TestAgent
+from core.game_controller import GameController
+from core.game_controller import TurnPhase
+from core.loggers.null import NullLogger
+from core.simulation import run_games
+from core.timing import GameTimer
+from core.timing import Histogram
+
+
+class HistogramTest(unittest.TestCase):
+    def test_add(self):
+        histogram = Histogram()
+        for seconds in (1e-6, 3e-6, 1e-3):
+            histogram.add(seconds)
+        self.assertEqual(histogram.count, 3)
+        self.assertAlmostEqual(histogram.total, 1.004e-3)
+        self.assertEqual(histogram.min, 1e-6)
+        self.assertEqual(histogram.max, 1e-3)
+        self.assertEqual(histogram.percentile(0.5), 4e-6, 'Upper bound of the 2-4us bucket.')
+        self.assertEqual(histogram.percentile(1.0), 1e-3, 'Never more than the maximum.')
+
+    def test_merge(self):
+        histogram = Histogram()
+        histogram.add(2e-6)
+        other = Histogram()
+        other.add(1e-6)
+        other.add(1.0)
+        histogram.merge(other)
+        self.assertEqual(histogram.count, 3)
+        self.assertEqual(sum(histogram.buckets), 3)
+        self.assertEqual(histogram.min, 1e-6)
+        self.assertEqual(histogram.max, 1.0)
+        self.assertEqual(Histogram().percentile(0.5), 0.0)
+
+
+class SlowCard:
+    @classmethod
+    def play(cls, game_state):
+        game_state.agent.make_decision(None)
+
+
+class SlowAgent:
+    def make_decision(self, decision, known_state=None):
+        for i in range(100000):
+            pass
+
+
+class FakeGameState:
+    pass
+
+
+class GameTimerTest(unittest.TestCase):
+    def test_card_play_leaves_out_decisions(self):
+        timer = GameTimer()
+        game_state = FakeGameState()
+        game_state.agent = timer.wrap_agent(SlowAgent())
+        timer.play_card(SlowCard, game_state)
+        decision_seconds = timer.decisions['SlowAgent'].total
+        self.assertTrue(timer.card_plays['SlowCard'].total < decision_seconds)
+        self.assertEqual(timer.agent_seconds(), decision_seconds)
+
+    def test_timed_game(self):
+        timer = GameTimer()
+        controller = GameController(
+            players=[TestAgent('p1'), DumbMoneyAgent('p2')],
+            card_set=KINGDOM_CARDS,
+            log=NullLogger(),
+            verbose=False,
+            seed=1221,
+            timer=timer,
+        )
+        controller.run()
+        turns = controller.turn_number - 1
+        self.assertEqual(set(timer.phases), set(phase.name for phase in TurnPhase))
+        for histogram in timer.phases.values():
+            self.assertEqual(histogram.count, turns)
+        self.assertTrue(timer.card_plays)
+        self.assertEqual(set(timer.decisions), set(['TestAgent', 'DumbMoneyAgent']))
+        self.assertTrue(timer.engine_seconds() > 0)
+
+    def test_timed_batch(self):
+        summary = run_games(
+            [DumbMoneyAgent, TestAgent], ['p1', 'p2'], num_games=4, workers=2, seed=5,
+            timed=True
+        )
+        self.assertEqual(
+            summary.timer.phases[TurnPhase.BUY.name].count, summary.total_turns
+        )
+        self.assertIsNone(
+            run_games([DumbMoneyAgent, TestAgent], ['p1', 'p2'], num_games=2).timer
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
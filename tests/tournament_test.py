@@ -0,0 +1,74 @@
+import unittest
+
+from core.agents.big_money import DumbMoneyAgent
+from core.agents.big_money import SimpleBmSmithyAgent
+from core.agents.test import TestAgent
+from core.tournament import default_agent_names
+from core.tournament import ELO_BASE
+from core.tournament import run_tournament
+from core.tournament import TournamentGameResult
+from core.tournament import TournamentStandings
+
+
+class TournamentStandingsTest(unittest.TestCase):
+    def test_add_result(self):
+        standings = TournamentStandings(['a', 'b', 'c'])
+        standings.add_result(TournamentGameResult(['a', 'b'], ['a'], 20))
+        standings.add_result(TournamentGameResult(['b', 'a'], ['b', 'a'], 30))
+        self.assertEqual(standings.num_games, 2)
+        self.assertEqual(standings.win_rate('a', 'b'), 0.5)
+        self.assertEqual(standings.win_rate('b', 'a'), 0.0)
+        self.assertEqual(standings.score('a', 'b'), 0.75)
+        self.assertEqual(standings.score('b', 'a'), 0.25)
+        self.assertEqual(standings.score('a', 'c'), 0.0, 'No games were played.')
+
+    def test_ratings(self):
+        standings = TournamentStandings(['a', 'b', 'c'])
+        for i in range(10):
+            standings.add_result(TournamentGameResult(['a', 'b'], ['a'], 20))
+            standings.add_result(TournamentGameResult(['b', 'c'], ['b'], 20))
+            standings.add_result(TournamentGameResult(['a', 'c'], ['a'], 20))
+        ratings = standings.ratings()
+        self.assertTrue(ratings['a'] > ratings['b'] > ratings['c'])
+        self.assertAlmostEqual(sum(ratings.values()) / 3, ELO_BASE)
+
+    def test_equal_agents_have_equal_ratings(self):
+        standings = TournamentStandings(['a', 'b'])
+        standings.add_result(TournamentGameResult(['a', 'b'], ['a'], 20))
+        standings.add_result(TournamentGameResult(['b', 'a'], ['b'], 20))
+        ratings = standings.ratings()
+        self.assertAlmostEqual(ratings['a'], ELO_BASE)
+        self.assertAlmostEqual(ratings['b'], ELO_BASE)
+
+
+class RunTournamentTest(unittest.TestCase):
+    def test_default_agent_names(self):
+        self.assertEqual(
+            default_agent_names([DumbMoneyAgent, TestAgent, DumbMoneyAgent]),
+            ['DumbMoneyAgent-1', 'TestAgent', 'DumbMoneyAgent-2'],
+        )
+
+    def test_run_tournament(self):
+        reports = []
+        standings = run_tournament(
+            [DumbMoneyAgent, SimpleBmSmithyAgent, TestAgent], games_per_pairing=2, seed=3,
+            report=lambda standings: reports.append(standings.num_games), report_every=2,
+        )
+        self.assertEqual(standings.num_games, 6)
+        self.assertEqual(reports, [2, 4, 6])
+        for name in standings.agent_names:
+            for opponent in standings.agent_names:
+                if name != opponent:
+                    self.assertEqual(standings.games[name][opponent], 2)
+
+    def test_seeded_tournaments_match_for_any_number_of_workers(self):
+        agent_classes = [DumbMoneyAgent, SimpleBmSmithyAgent, TestAgent]
+        serial = run_tournament(agent_classes, games_per_pairing=2, seed=3)
+        pooled = run_tournament(agent_classes, games_per_pairing=2, workers=2, seed=3)
+        self.assertEqual(serial.wins, pooled.wins)
+        self.assertEqual(serial.ties, pooled.ties)
+        self.assertEqual(serial.total_turns, pooled.total_turns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import argparse
+
+from core.simulation import agent_class_from_path
+from core.tournament import run_tournament
+
+
+def print_standings(standings):
+	print(standings)
+	print()
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser()
+	parser.add_argument("agents", nargs='+', help="Full paths to the agents in the tournament")
+	parser.add_argument(
+		"--games", type=int, default=100, help="Number of games every pair of agents plays"
+	)
+	parser.add_argument(
+		"--workers", type=int, default=1, help="Number of processes to play the games on"
+	)
+	parser.add_argument("--seed", type=int, help="Seed to reproduce the tournament")
+	parser.add_argument(
+		"--report-every", type=int, default=1000,
+		help="Print the standings so far after this many games"
+	)
+	args = parser.parse_args()
+	standings = run_tournament(
+		[agent_class_from_path(path) for path in args.agents],
+		games_per_pairing=args.games,
+		workers=args.workers,
+		seed=args.seed,
+		report=print_standings,
+		report_every=args.report_every,
+	)
+	print(standings)